@@ -0,0 +1,24 @@
+# Advanced RAG Backend with Groq API
+# Heavy dependencies (torch, sentence-transformers, langchain, faiss, fitz, openai)
+# are imported lazily by the classes below on first use.
+
+from .config import Config
+from .parser import PDFParser
+from .chunker import PageChunker, TextChunker
+from .embedder import Embedder
+from .retriever import Retriever
+from .llm import LLMInterface
+from .rag import RAGApplication
+from .server import create_app
+
+__all__ = [
+    "Config",
+    "PDFParser",
+    "TextChunker",
+    "PageChunker",
+    "Embedder",
+    "Retriever",
+    "LLMInterface",
+    "RAGApplication",
+    "create_app",
+]
@@ -0,0 +1,128 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+Scope = Tuple[str, int]
+
+class AnswerCache:
+    """Two-tier cache of answers, scoped per (document_id, index version).
+
+    Tier one matches the normalized question exactly. Tier two compares the
+    question embedding with those of cached questions and reuses an answer
+    when the cosine similarity reaches `similarity_threshold`. Entries expire
+    after `ttl_seconds` and the least recently used are dropped beyond
+    `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Scope, str], dict]" = OrderedDict()
+        self._vectors: Dict[Scope, "OrderedDict[str, List[float]]"] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold > 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        question = " ".join(question.lower().split())
+        return re.sub(r"[\s?.!]+$", "", question)
+
+    @staticmethod
+    def _unit(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def get(self, scope: Scope, question: str, embed: Optional[Callable[[], List[float]]] = None) -> Tuple[Optional[dict], Optional[List[float]]]:
+        """Cached response for the question, tagged with the tier that matched.
+
+        `embed` is only called when the exact tier misses; the vector it returns
+        is handed back so the caller can reuse it for retrieval.
+        """
+        key = self.normalize(question)
+        with self._lock:
+            entry = self._live_entry((scope, key), time.time())
+            if entry:
+                self.exact_hits += 1
+                return {**entry["response"], "cache_tier": "exact"}, None
+
+        vector = embed() if embed is not None and self.semantic_enabled else None
+        with self._lock:
+            if vector is not None:
+                match = self._nearest(scope, self._unit(vector))
+                entry = self._live_entry((scope, match), time.time()) if match else None
+                if entry:
+                    self.semantic_hits += 1
+                    return {**entry["response"], "cache_tier": "semantic"}, vector
+
+            self.misses += 1
+            return None, vector
+
+    def put(self, scope: Scope, question: str, response: dict, vector: Optional[List[float]] = None):
+        key = self.normalize(question)
+        with self._lock:
+            self._entries[(scope, key)] = {"response": response, "expires": time.time() + self.ttl}
+            self._entries.move_to_end((scope, key))
+            if vector is not None and self.semantic_enabled:
+                self._vectors.setdefault(scope, OrderedDict())[key] = self._unit(vector)
+
+            while len(self._entries) > self.max_entries:
+                (old_scope, old_key), _ = self._entries.popitem(last=False)
+                self._forget_vector(old_scope, old_key)
+
+    def invalidate(self, document_id: str):
+        """Drop every cached answer of a document, whatever its index version"""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0][0] == document_id]:
+                del self._entries[entry_key]
+            for scope in [s for s in self._vectors if s[0] == document_id]:
+                del self._vectors[scope]
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _live_entry(self, entry_key: Tuple[Scope, str], now: float) -> Optional[dict]:
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry["expires"] < now:
+            del self._entries[entry_key]
+            self._forget_vector(*entry_key)
+            return None
+        self._entries.move_to_end(entry_key)
+        return entry
+
+    def _forget_vector(self, scope: Scope, key: str):
+        vectors = self._vectors.get(scope)
+        if vectors is not None:
+            vectors.pop(key, None)
+            if not vectors:
+                del self._vectors[scope]
+
+    def _nearest(self, scope: Scope, unit_vector: List[float]) -> Optional[str]:
+        vectors = self._vectors.get(scope)
+        if not vectors:
+            return None
+
+        import numpy as np
+
+        keys = list(vectors)
+        similarities = np.asarray(list(vectors.values()), dtype=np.float32) @ np.asarray(unit_vector, dtype=np.float32)
+        best = int(similarities.argmax())
+        return keys[best] if similarities[best] >= self.similarity_threshold else None
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Tuple
+
+from .profiling import PROFILER
+from .retriever import Retrieval, batch_similarity_search
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+    from langchain.vectorstores import FAISS
+
+    from .embedder import Embedder
+
+class _Request(NamedTuple):
+    vector_store: Any  # None when only the embedding is wanted
+    query: str
+    k: int
+    future: Future
+    vector: Optional[List[float]]
+    with_vector: bool = False  # resolve to a Retrieval rather than the hits alone
+    submitted: float = 0.0
+
+class QueryBatcher:
+    """Coalesces concurrent queries into one embedding pass and one FAISS search per index.
+
+    A background thread waits for the first query, then keeps collecting for up to
+    `max_wait_ms` or until `max_batch_size` queries are queued. Queries may come
+    with a precomputed vector (skipping the encode), ask for the vector only, or
+    ask for the vector and the hits together, so a query needing both pays for
+    one batching window rather than two.
+    """
+
+    def __init__(self, embedder: "Embedder", max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.queries = 0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def search(self, vector_store: "FAISS", query: str, k: int, vector: Optional[List[float]] = None) -> List[Tuple["Document", float]]:
+        """Queue a query and block until its batch has been searched"""
+        return self._submit(vector_store, query, k, vector)
+
+    def embed(self, query: str) -> List[float]:
+        """Queue a query for embedding only"""
+        return self._submit(None, query, 0, None)
+
+    def embed_and_search(self, vector_store: "FAISS", query: str, k: int) -> Retrieval:
+        """Queue a query and block until its batch has been embedded and searched, returning vector and hits"""
+        return self._submit(vector_store, query, k, None, with_vector=True)
+
+    def _submit(self, vector_store: Optional["FAISS"], query: str, k: int, vector: Optional[List[float]],
+                with_vector: bool = False):
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put(_Request(vector_store, query, k, future, vector, with_vector, time.perf_counter()))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Profiled when an on-demand cProfile capture is running
+            PROFILER.wrap(self._process)(batch)
+
+    def _process(self, batch: List[_Request]):
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            # Embed everything that did not arrive with a precomputed vector in one pass
+            pending = [request.query for request in batch if request.vector is None]
+            new_vectors = iter(self.embedder.embed_documents(pending) if pending else [])
+            vectors = [request.vector if request.vector is not None else next(new_vectors) for request in batch]
+            embedded = time.perf_counter()
+
+            # One search per distinct index, over all queries that target it
+            groups = {}
+            for request, vector in zip(batch, vectors):
+                if request.vector_store is None:
+                    request.future.set_result(vector)
+                else:
+                    groups.setdefault(id(request.vector_store), []).append((request, vector))
+
+            for items in groups.values():
+                vector_store = items[0][0].vector_store
+                k = max(request.k for request, _ in items)
+                start = time.perf_counter()
+                results = batch_similarity_search(vector_store, [vector for _, vector in items], k)
+                search_seconds = time.perf_counter() - start
+                for (request, vector), hits in zip(items, results):
+                    if request.with_vector:
+                        request.future.set_result(Retrieval(vector, hits[:request.k], embedded - request.submitted, search_seconds))
+                    else:
+                        request.future.set_result(hits[:request.k])
+
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
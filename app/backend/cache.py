@@ -0,0 +1,244 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+class IngestCache:
+    """Disk-backed cache for extracted text and chunk embeddings.
+
+    Text is keyed by (file hash and page range, parser version) and vectors
+    by (chunk text hash, embedding model). Everything lives in one SQLite file so pool
+    processes share it; entries are evicted least recently used first once
+    the stored payload exceeds `max_mb`.
+
+    Lookups stay read-only as far as possible, so readers in other processes
+    do not queue on SQLite's write lock: hit and miss counts are kept in
+    memory and flushed every FLUSH_INTERVAL_S, and an entry's last use is only
+    rewritten once it is older than TOUCH_INTERVAL_S. The payload size is a
+    running total kept by triggers.
+    """
+
+    COUNTERS = ("text_hits", "text_misses", "embedding_hits", "embedding_misses", "evictions")
+    FLUSH_INTERVAL_S = 5.0
+    TOUCH_INTERVAL_S = 60.0
+    EVICT_BATCH = 256
+
+    def __init__(self, path: str, max_mb: float = 1024):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._init_local_state()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS extractions (
+                    file_hash TEXT, parser_version TEXT, text TEXT, size INTEGER, last_used REAL,
+                    PRIMARY KEY (file_hash, parser_version));
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    chunk_hash TEXT, model TEXT, vector BLOB, size INTEGER, last_used REAL,
+                    PRIMARY KEY (chunk_hash, model));
+                CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+                CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used);
+                CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+
+                -- Running payload size; caches created before it start from the stored total
+                INSERT OR IGNORE INTO counters SELECT 'bytes',
+                    (SELECT COALESCE(SUM(size), 0) FROM extractions) + (SELECT COALESCE(SUM(size), 0) FROM embeddings);
+                CREATE TRIGGER IF NOT EXISTS extractions_added AFTER INSERT ON extractions BEGIN
+                    UPDATE counters SET value = value + NEW.size WHERE name = 'bytes'; END;
+                CREATE TRIGGER IF NOT EXISTS extractions_resized AFTER UPDATE OF size ON extractions BEGIN
+                    UPDATE counters SET value = value + NEW.size - OLD.size WHERE name = 'bytes'; END;
+                CREATE TRIGGER IF NOT EXISTS extractions_removed AFTER DELETE ON extractions BEGIN
+                    UPDATE counters SET value = value - OLD.size WHERE name = 'bytes'; END;
+                CREATE TRIGGER IF NOT EXISTS embeddings_added AFTER INSERT ON embeddings BEGIN
+                    UPDATE counters SET value = value + NEW.size WHERE name = 'bytes'; END;
+                CREATE TRIGGER IF NOT EXISTS embeddings_resized AFTER UPDATE OF size ON embeddings BEGIN
+                    UPDATE counters SET value = value + NEW.size - OLD.size WHERE name = 'bytes'; END;
+                CREATE TRIGGER IF NOT EXISTS embeddings_removed AFTER DELETE ON embeddings BEGIN
+                    UPDATE counters SET value = value - OLD.size WHERE name = 'bytes'; END;
+                COMMIT;
+            """)
+            db.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [(name,) for name in self.COUNTERS])
+
+    def _init_local_state(self):
+        self._local = threading.local()
+        self._pending = Counter()
+        self._pending_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def __getstate__(self):
+        # Connections are per process and thread; only ship the settings to pool workers
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.max_bytes = state["max_bytes"]
+        self._init_local_state()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, name: str, amount: int = 1):
+        """Add to a counter in memory; it reaches the database with the next flush"""
+        if not amount:
+            return
+        with self._pending_lock:
+            self._pending[name] += amount
+            due = time.monotonic() - self._flushed_at >= self.FLUSH_INTERVAL_S
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """Write the counts gathered in this process to the shared counters"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if pending:
+            with self._connect() as db:
+                db.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                               [(amount, name) for name, amount in pending.items()])
+
+    @staticmethod
+    def chunk_hash(chunk: str) -> str:
+        return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+    def get_text(self, file_hash: str, parser_version: str) -> Optional[str]:
+        """Cached extraction result for a file, if any"""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT text, last_used FROM extractions WHERE file_hash = ? AND parser_version = ?",
+                (file_hash, parser_version)
+            ).fetchone()
+            if row and now - row[1] >= self.TOUCH_INTERVAL_S:
+                db.execute(
+                    "UPDATE extractions SET last_used = ? WHERE file_hash = ? AND parser_version = ?",
+                    (now, file_hash, parser_version)
+                )
+        self._count("text_hits" if row else "text_misses")
+        return row[0] if row else None
+
+    def put_text(self, file_hash: str, parser_version: str, text: str):
+        with self._connect() as db:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size triggers
+            db.execute(
+                """INSERT INTO extractions VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (file_hash, parser_version) DO UPDATE SET
+                   text = excluded.text, size = excluded.size, last_used = excluded.last_used""",
+                (file_hash, parser_version, text, len(text.encode("utf-8")), time.time())
+            )
+        self._evict()
+        self.flush_counters()
+
+    def get_vectors(self, chunks: List[str], model: str) -> Dict[str, List[float]]:
+        """Cached vectors for the given chunks, keyed by chunk hash"""
+        hashes = list({self.chunk_hash(chunk) for chunk in chunks})
+        found: Dict[str, List[float]] = {}
+        stale = []
+        now = time.time()
+        with self._connect() as db:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = db.execute(
+                    f"SELECT chunk_hash, vector, last_used FROM embeddings WHERE model = ? AND chunk_hash IN ({placeholders})",
+                    (model, *batch)
+                ).fetchall()
+                for chunk_hash, blob, last_used in rows:
+                    found[chunk_hash] = array("f", blob).tolist()
+                    if now - last_used >= self.TOUCH_INTERVAL_S:
+                        stale.append(chunk_hash)
+            if stale:
+                db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE chunk_hash = ? AND model = ?",
+                    [(now, chunk_hash, model) for chunk_hash in stale]
+                )
+        self._count("embedding_hits", len(found))
+        self._count("embedding_misses", len(hashes) - len(found))
+        return found
+
+    def put_vectors(self, chunks: List[str], vectors: List[List[float]], model: str):
+        now = time.time()
+        rows = []
+        for chunk, vector in zip(chunks, vectors):
+            blob = array("f", vector).tobytes()
+            rows.append((self.chunk_hash(chunk), model, blob, len(blob), now))
+        with self._connect() as db:
+            db.executemany(
+                """INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (chunk_hash, model) DO UPDATE SET
+                   vector = excluded.vector, size = excluded.size, last_used = excluded.last_used""",
+                rows
+            )
+        self._evict()
+        self.flush_counters()
+
+    def embed(self, chunks: List[str], model: str, embed_documents: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Embed chunks, only running the model on chunks not seen before"""
+        cached = self.get_vectors(chunks, model)
+        missing = list(dict.fromkeys(chunk for chunk in chunks if self.chunk_hash(chunk) not in cached))
+        if missing:
+            new_vectors = embed_documents(missing)
+            self.put_vectors(missing, new_vectors, model)
+            for chunk, vector in zip(missing, new_vectors):
+                cached[self.chunk_hash(chunk)] = vector
+        return [cached[self.chunk_hash(chunk)] for chunk in chunks]
+
+    def size_bytes(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its budget"""
+        if self.size_bytes() <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        db = self._connect()
+        while True:
+            # One short write transaction per batch of the oldest entries, read through the last_used indexes
+            with db:
+                size = db.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+                rows = []
+                if size > target:
+                    for table in ("extractions", "embeddings"):
+                        rows += [
+                            (last_used, table, rowid, entry_size) for rowid, entry_size, last_used in db.execute(
+                                f"SELECT rowid, size, last_used FROM {table} ORDER BY last_used LIMIT ?", (self.EVICT_BATCH,)
+                            )
+                        ]
+                for _, table, rowid, entry_size in sorted(rows)[:self.EVICT_BATCH]:
+                    if size <= target:
+                        break
+                    db.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                    size -= entry_size
+                    evicted += 1
+            if not rows or size <= target:
+                break
+        self._count("evictions", evicted)
+
+    def stats(self) -> dict:
+        self.flush_counters()
+        with self._connect() as db:
+            counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+            size = counters.pop("bytes")
+            text_entries = db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+            vector_entries = db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            **counters,
+            "text_entries": text_entries,
+            "embedding_entries": vector_entries,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2)
+        }
@@ -0,0 +1,39 @@
+"""Calibrate the relevance gate of stored document indexes.
+
+Re-runs the calibration for the given document ids (all documents and the
+shared corpus when none are given), stores the new thresholds and prints the
+distances they were derived from. Run it from app/ after changing the
+embedding model or index type, or to inspect how well a document separates
+on- and off-topic questions:
+
+    python -m backend.calibrate
+    python -m backend.calibrate <document_id> corpus
+"""
+import argparse
+
+from .corpus import CORPUS_ID
+from .rag import RAGApplication
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("document_ids", nargs="*", help=f"document ids, or '{CORPUS_ID}' for the shared corpus")
+    args = parser.parse_args()
+
+    rag_app = RAGApplication()
+    document_ids = args.document_ids or [meta["document_id"] for meta in rag_app.registry.list_documents()] + [CORPUS_ID]
+
+    print(f"{'document':<24}{'threshold':>11}{'in-doc p90':>12}{'off-topic p10':>15}")
+    for document_id in document_ids:
+        name = rag_app.document_name(document_id) or document_id
+        try:
+            calibration = rag_app.calibrate_relevance(document_id)
+        except Exception as e:
+            print(f"{name[:23]:<24}  skipped: {e}")
+            continue
+        if calibration["threshold"] is None:
+            print(f"{name[:23]:<24}  not enough chunks to calibrate")
+            continue
+        print(f"{name[:23]:<24}{calibration['threshold']:>11.4f}{calibration['in_document_p90']:>12.4f}{calibration['off_topic_p10']:>15.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import json
+import mmap
+import os
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+from .index_factory import estimate_index_bytes
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+    from langchain.vectorstores import FAISS
+
+    from .embedder import Embedder
+
+def _replace_file(path: str, write):
+    """Write a file next to its destination and rename it into place.
+
+    Readers that already mapped the old file keep a valid view of it.
+    """
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def is_mappable(index) -> bool:
+    """Whether an index is a plain float32 L2 flat index, which MappedFlatIndex can stand in for"""
+    import faiss
+
+    return type(index) in (faiss.IndexFlat, faiss.IndexFlatL2) and index.metric_type == faiss.METRIC_L2
+
+class MappedFlatIndex:
+    """Exact L2 index over a memory-mapped float32 array.
+
+    faiss (1.7.4 as pinned, and 1.8) reads flat and HNSW codes into the heap
+    even with IO_FLAG_MMAP, so flat indexes are stored as a .npy file instead
+    and searched in place with faiss.knn. The vectors stay in the OS page
+    cache, shared by every process, and opening does not read them. Offers
+    the parts of the faiss index API that the rest of the backend uses.
+    """
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.vectors = np.load(path, mmap_mode="r")
+        self.ntotal, self.d = self.vectors.shape
+
+    @staticmethod
+    def write(path: str, index):
+        """Save the vectors of a flat index as a .npy file"""
+        import numpy as np
+
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), dtype=np.float32)
+        with open(path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def search(self, queries, k: int):
+        """Squared L2 distances and row numbers of the k nearest vectors, -1 padded like faiss"""
+        import faiss
+        import numpy as np
+
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        found = min(k, self.ntotal)
+        if found:
+            distances[:, :found], indices[:, :found] = faiss.knn(queries, self.vectors, found)
+        return distances, indices
+
+    def reconstruct_n(self, start: int, n: int):
+        import numpy as np
+
+        return np.array(self.vectors[start:start + n])
+
+    def sa_code_size(self) -> int:
+        return self.d * 4
+
+class ChunkStore:
+    """Columnar, memory-mapped store of chunk texts and metadata.
+
+    Texts are concatenated into one UTF-8 blob addressed by an offsets array.
+    Integer metadata is kept as int64 columns and everything else is
+    dictionary-encoded into int32 codes, so nothing is deserialized on open and
+    Documents are only built for the rows that are actually read.
+    """
+
+    TEXT_FILE = "chunks.bin"
+    OFFSETS_FILE = "chunk_offsets.npy"
+    COLUMNS_FILE = "chunk_columns.json"
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.path = path
+        with open(os.path.join(path, self.COLUMNS_FILE)) as f:
+            self.columns = json.load(f)
+        self.offsets = np.load(os.path.join(path, self.OFFSETS_FILE), mmap_mode="r")
+        self._arrays = [
+            np.load(os.path.join(path, self._column_file(i)), mmap_mode="r")
+            for i in range(len(self.columns))
+        ]
+        with open(os.path.join(path, self.TEXT_FILE), "rb") as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, cls.COLUMNS_FILE))
+
+    @classmethod
+    def _column_file(cls, i: int) -> str:
+        return f"chunk_column_{i}.npy"
+
+    @classmethod
+    def write(cls, path: str, documents: List["Document"]):
+        """Write documents in row order; row i must match vector i of the index"""
+        import numpy as np
+
+        os.makedirs(path, exist_ok=True)
+        encoded = [doc.page_content.encode("utf-8") for doc in documents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(text) for text in encoded])
+
+        keys = sorted({key for doc in documents for key in doc.metadata})
+        columns, arrays = [], []
+        for key in keys:
+            values = [doc.metadata.get(key) for doc in documents]
+            if all(type(value) is int for value in values):
+                columns.append({"name": key, "kind": "int"})
+                arrays.append(np.asarray(values, dtype=np.int64))
+            else:
+                # -1 marks rows without this key
+                categories, codes = {}, []
+                for doc in documents:
+                    if key in doc.metadata:
+                        codes.append(categories.setdefault(json.dumps(doc.metadata[key], sort_keys=True), len(categories)))
+                    else:
+                        codes.append(-1)
+                columns.append({"name": key, "kind": "category", "values": [json.loads(value) for value in categories]})
+                arrays.append(np.asarray(codes, dtype=np.int32))
+
+        def write_text(tmp_path):
+            with open(tmp_path, "wb") as f:
+                for text in encoded:
+                    f.write(text)
+
+        def write_array(array):
+            def write(tmp_path):
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+            return write
+
+        _replace_file(os.path.join(path, cls.TEXT_FILE), write_text)
+        _replace_file(os.path.join(path, cls.OFFSETS_FILE), write_array(offsets))
+        for i, array in enumerate(arrays):
+            _replace_file(os.path.join(path, cls._column_file(i)), write_array(array))
+
+        # The column list is read first on open, so it goes last
+        def write_columns(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(columns, f)
+        _replace_file(os.path.join(path, cls.COLUMNS_FILE), write_columns)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def text(self, row: int) -> str:
+        return bytes(self._text[int(self.offsets[row]):int(self.offsets[row + 1])]).decode("utf-8")
+
+    def metadata(self, row: int) -> dict:
+        metadata = {}
+        for column, array in zip(self.columns, self._arrays):
+            value = int(array[row])
+            if column["kind"] == "int":
+                metadata[column["name"]] = value
+            elif value >= 0:
+                metadata[column["name"]] = column["values"][value]
+        return metadata
+
+    def document(self, row: int) -> "Document":
+        from langchain.docstore.document import Document
+
+        return Document(page_content=self.text(row), metadata=self.metadata(row))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the mapped files; they live in the shared page cache, not the heap"""
+        return len(self._text) + self.offsets.nbytes + sum(array.nbytes for array in self._arrays)
+
+class MappedVectorStore:
+    """Read-only document index opened straight from disk.
+
+    Chunks come from a ChunkStore and only the top-k hits of a search are
+    turned into Documents. Flat float32 indexes, the default below
+    HNSW_THRESHOLD vectors, are kept as a MappedFlatIndex: opening them is
+    near-instant whatever their size and their pages are shared between
+    processes through the OS page cache. Every other index type is written
+    with faiss and read into each process's memory, as faiss cannot map it.
+    It exposes the same search methods as the LangChain vector store, like
+    CorpusIndex.
+    """
+
+    INDEX_FILE = "index.faiss"
+    VECTORS_FILE = "vectors.npy"
+    LEGACY_FILE = "index.pkl"
+
+    def __init__(self, path: str, embedder: "Embedder"):
+        import faiss
+
+        self.path = path
+        self.embedder = embedder
+        vectors_path = os.path.join(path, self.VECTORS_FILE)
+        if os.path.exists(vectors_path):
+            self.index = MappedFlatIndex(vectors_path)
+        else:
+            self.index = faiss.read_index(os.path.join(path, self.INDEX_FILE))
+        self.chunks = ChunkStore(path)
+
+    @property
+    def embeddings(self):
+        return self.embedder.embeddings
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        has_index = os.path.exists(os.path.join(path, cls.VECTORS_FILE)) or os.path.exists(os.path.join(path, cls.INDEX_FILE))
+        return has_index and ChunkStore.exists(path)
+
+    @classmethod
+    def save(cls, vector_store: "FAISS", path: str):
+        """Write a LangChain FAISS store in the mapped format"""
+        import faiss
+
+        documents = [
+            vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+            for i in range(vector_store.index.ntotal)
+        ]
+        os.makedirs(path, exist_ok=True)
+        ChunkStore.write(path, documents)
+        if is_mappable(vector_store.index):
+            written, stale = cls.VECTORS_FILE, cls.INDEX_FILE
+            _replace_file(os.path.join(path, written), lambda tmp_path: MappedFlatIndex.write(tmp_path, vector_store.index))
+        else:
+            written, stale = cls.INDEX_FILE, cls.VECTORS_FILE
+            _replace_file(os.path.join(path, written), lambda tmp_path: faiss.write_index(vector_store.index, tmp_path))
+        # A store saved over one of the other kind must not open the old vectors
+        if os.path.exists(os.path.join(path, stale)):
+            os.remove(os.path.join(path, stale))
+
+    @classmethod
+    def is_legacy(cls, path: str) -> bool:
+        """Whether a directory only holds an index saved by FAISS.save_local (pickled docstore)"""
+        return os.path.exists(os.path.join(path, cls.LEGACY_FILE)) and not cls.exists(path)
+
+    @classmethod
+    def convert_legacy(cls, path: str, embeddings) -> bool:
+        """Rewrite a FAISS.save_local index in the mapped format and delete its pickle.
+
+        Unpickling runs code from the file, so this is never done while
+        serving; it is only called by `python -m backend.convert_indexes`.
+        """
+        if not cls.is_legacy(path):
+            return False
+        from langchain.vectorstores import FAISS
+
+        # The pinned langchain-community (0.0.13) loads pickles without an opt-in flag and rejects
+        # allow_dangerous_deserialization
+        legacy = FAISS.load_local(path, embeddings)
+        cls.save(legacy, path)
+        os.remove(os.path.join(path, cls.LEGACY_FILE))
+        return True
+
+    def batch_search(self, vectors: List[List[float]], k: int) -> List[List[Tuple["Document", float]]]:
+        """Search several query vectors, materializing only the hits"""
+        import numpy as np
+
+        distances, indices = self.index.search(np.asarray(vectors, dtype=np.float32), k)
+        return [
+            [(self.chunks.document(int(i)), float(distance)) for distance, i in zip(row_distances, row_indices) if i != -1]
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List["Document"]:
+        return [doc for doc, _ in self.batch_search([embedding], k)[0]]
+
+    def similarity_search(self, query: str, k: int = 4) -> List["Document"]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k)
+
+    def iter_documents(self) -> Iterator["Document"]:
+        """Every chunk in index order"""
+        for row in range(len(self.chunks)):
+            yield self.chunks.document(row)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate heap memory of the index plus the offsets; mapped vectors and chunk texts stay in the page cache"""
+        index_bytes = 0 if isinstance(self.index, MappedFlatIndex) else estimate_index_bytes(self.index)
+        return index_bytes + self.chunks.offsets.nbytes
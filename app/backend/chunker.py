@@ -0,0 +1,171 @@
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+class TextChunker:
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._text_splitter = None
+
+    @property
+    def text_splitter(self):
+        """LangChain splitter, imported on first use"""
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        return self._text_splitter
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into chunks"""
+        chunks = self.text_splitter.split_text(text)
+        return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+class ChunkBatch(NamedTuple):
+    """Chunks of consecutive pages with their provenance in parallel int32 arrays.
+
+    Offsets index into the text PDFParser returned for the page, so a chunk can
+    be located without searching for it again.
+    """
+    texts: List[str]
+    pages: array      # page the chunk starts on (0-based)
+    starts: array     # offset of its first character within that page
+    end_pages: array  # page the chunk ends on
+    ends: array       # offset just past its last character within that page
+
+    @classmethod
+    def empty(cls) -> "ChunkBatch":
+        return cls([], array("i"), array("i"), array("i"), array("i"))
+
+    def metadata(self, i: int) -> dict:
+        return {"page": self.pages[i], "start": self.starts[i], "end_page": self.end_pages[i], "end": self.ends[i]}
+
+class PageChunker:
+    """Splitter over per-page text that records where every chunk came from.
+
+    Produces the same chunks as TextChunker: LangChain's recursive splitter
+    with the separators kept, re-implemented over (start, end) offsets so no
+    chunk has to be searched for again. The text is split on the first of
+    SEPARATORS it contains, pieces shorter than `chunk_size` are merged up to
+    `chunk_size`, each chunk carrying over trailing pieces of at most
+    `chunk_overlap` characters, and longer pieces are split again on the
+    next separator. Pages are joined with a blank line, as the parser does
+    for a whole document.
+    """
+
+    PAGE_SEPARATOR = "\n\n"
+    SEPARATORS = ("\n\n", "\n", " ", "")
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into chunks"""
+        return [text[start:end] for start, end in self._spans(text)]
+
+    def chunk_pages(self, pages: Iterable[Tuple[int, str]]) -> ChunkBatch:
+        """Chunk (page number, text) pairs as one text, keeping page and offset provenance"""
+        numbers, offsets, parts = [], [], []
+        offset = 0
+        for page_num, page_text in pages:
+            if parts:
+                offset += len(self.PAGE_SEPARATOR)
+            numbers.append(page_num)
+            offsets.append(offset)
+            parts.append(page_text)
+            offset += len(page_text)
+        text = self.PAGE_SEPARATOR.join(parts)
+
+        batch = ChunkBatch.empty()
+        for start, end in self._spans(text):
+            first = bisect_right(offsets, start) - 1
+            last = bisect_right(offsets, end - 1) - 1
+            batch.texts.append(text[start:end])
+            batch.pages.append(numbers[first])
+            batch.starts.append(start - offsets[first])
+            batch.end_pages.append(numbers[last])
+            batch.ends.append(end - offsets[last])
+        return batch
+
+    def _spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) of every chunk, with surrounding whitespace excluded"""
+        return self._split(text, 0, len(text), self.SEPARATORS)
+
+    def _split(self, text: str, start: int, end: int, separators: Tuple[str, ...]) -> List[Tuple[int, int]]:
+        separator, remaining = "", ()
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                break
+            if text.find(candidate, start, end) != -1:
+                separator, remaining = candidate, separators[i + 1:]
+                break
+
+        spans, mergeable = [], []
+        for piece in self._pieces(text, start, end, separator):
+            if piece[1] - piece[0] < self.chunk_size:
+                mergeable.append(piece)
+                continue
+            if mergeable:
+                spans.extend(self._merge(text, mergeable))
+                mergeable = []
+            if remaining:
+                spans.extend(self._split(text, piece[0], piece[1], remaining))
+            else:
+                span = self._strip(text, *piece)
+                if span:
+                    spans.append(span)
+        if mergeable:
+            spans.extend(self._merge(text, mergeable))
+        return spans
+
+    @staticmethod
+    def _pieces(text: str, start: int, end: int, separator: str) -> List[Tuple[int, int]]:
+        """Split [start, end) before every separator, which stays at the start of its piece"""
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+        pieces, piece_start = [], start
+        cut = text.find(separator, start, end)
+        while cut != -1:
+            if cut > piece_start:
+                pieces.append((piece_start, cut))
+            piece_start = cut
+            cut = text.find(separator, cut + len(separator), end)
+        if end > piece_start:
+            pieces.append((piece_start, end))
+        return pieces
+
+    def _merge(self, text: str, pieces: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Merge consecutive pieces into chunks of at most chunk_size, overlapping by whole pieces"""
+        spans, current, total = [], deque(), 0
+        for piece in pieces:
+            length = piece[1] - piece[0]
+            if current and total + length > self.chunk_size:
+                span = self._strip(text, current[0][0], current[-1][1])
+                if span:
+                    spans.append(span)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    first = current.popleft()
+                    total -= first[1] - first[0]
+            current.append(piece)
+            total += length
+        if current:
+            span = self._strip(text, current[0][0], current[-1][1])
+            if span:
+                spans.append(span)
+        return spans
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
@@ -0,0 +1,107 @@
+import os
+from dotenv import load_dotenv
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Config:
+    def __init__(self):
+        load_dotenv()
+        self.GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+        if not self.GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY not found in environment variables")
+
+        self.VECTOR_STORE_PATH = self._path(os.getenv("VECTOR_STORE_PATH", "data/index"))
+        self.UPLOAD_PATH = self._path(os.getenv("UPLOAD_PATH", "data/uploads"))
+        self.PROCESSED_PATH = self._path(os.getenv("PROCESSED_PATH", "data/processed"))
+        self.CACHE_PATH = self._path(os.getenv("CACHE_PATH", "data/cache"))
+        self.MODEL_NAME = os.getenv("MODEL_NAME", "llama3-8b-8192")  # Groq model
+        self.LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+        # Pooled async LLM client: concurrent calls, per-attempt timeout, overall deadline, retries on 429/5xx
+        self.LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+        self.LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", 30))
+        self.LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", 60))
+        self.LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+        self.LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", 0))  # 0 disables hedged requests
+        # /api/query/batch: questions per request and LLM calls one batch may have in flight
+        self.BATCH_QUERY_MAX_QUESTIONS = int(os.getenv("BATCH_QUERY_MAX_QUESTIONS", 1000))
+        self.BATCH_QUERY_CONCURRENCY = int(os.getenv("BATCH_QUERY_CONCURRENCY", 8))
+        self.EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        # sentence-transformers, onnx, onnx-int8 (quantized, CPU) or hashing (no model, for tests)
+        self.EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+        self.EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None  # library default
+        self.CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 500))
+        self.CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 50))
+        self.MAX_RETRIEVED_CHUNKS = int(os.getenv("MAX_RETRIEVED_CHUNKS", 5))
+        # Retrieved chunks are merged, deduplicated and cut to this many context tokens
+        self.CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+        self.CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", 0.9))
+
+        # Ingestion pool: "process" spreads documents across cores, "thread" shares one model copy
+        self.INGEST_EXECUTOR = os.getenv("INGEST_EXECUTOR", "process")
+        self.INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 0)) or None
+        self.INGEST_MAX_CONCURRENT = int(os.getenv("INGEST_MAX_CONCURRENT", 0)) or None
+        # Large PDFs are split into page ranges that are ingested in parallel and indexed as they finish
+        self.INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", 32))
+        self.INGEST_PUBLISH_INTERVAL_S = float(os.getenv("INGEST_PUBLISH_INTERVAL_S", 2))
+        # Chunks are embedded in length buckets of at most this many padded tokens / chunks,
+        # and a page range's chunks are spread over the pool in tasks of INGEST_EMBED_TASK_CHUNKS
+        self.EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 8192))
+        self.EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 128))
+        self.INGEST_EMBED_TASK_CHUNKS = int(os.getenv("INGEST_EMBED_TASK_CHUNKS", 128))
+        # Uploads are streamed to disk and rejected once they exceed this size
+        self.MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", 200))
+        # Uploads run as background jobs; finished job records are kept this long
+        self.JOB_TTL_S = float(os.getenv("JOB_TTL_S", 86400))
+
+        # Upper bound for per-document indexes kept in memory; colder ones reload from disk
+        self.INDEX_MEMORY_BUDGET_MB = float(os.getenv("INDEX_MEMORY_BUDGET_MB", 512))
+
+        # Questions whose best chunk is farther than the index's calibrated distance get a canned answer
+        self.RELEVANCE_GATE_ENABLED = os.getenv("RELEVANCE_GATE_ENABLED", "1") == "1"
+        self.RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", 0)) or None  # fallback for uncalibrated indexes
+        self.RELEVANCE_CALIBRATION_SAMPLES = int(os.getenv("RELEVANCE_CALIBRATION_SAMPLES", 40))
+
+        # Per-document index type ("auto" picks flat/hnsw/ivf_flat/ivf_pq by size) and vector storage
+        self.INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+        self.INDEX_STORAGE = os.getenv("INDEX_STORAGE", "float32")  # float32, float16 or sq8
+        self.HNSW_M = int(os.getenv("HNSW_M", 32))
+        self.HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+        self.IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+
+        # Share of removed chunks in the corpus index that triggers a background compaction
+        self.CORPUS_COMPACT_RATIO = float(os.getenv("CORPUS_COMPACT_RATIO", 0.2))
+
+        # Extracted text and chunk vectors are cached on disk across uploads
+        self.INGEST_CACHE_ENABLED = os.getenv("INGEST_CACHE_ENABLED", "1") == "1"
+        self.INGEST_CACHE_MAX_MB = float(os.getenv("INGEST_CACHE_MAX_MB", 1024))
+
+        # Concurrent queries are embedded and searched together within a short window
+        self.QUERY_BATCHING_ENABLED = os.getenv("QUERY_BATCHING_ENABLED", "1") == "1"
+        self.QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", 16))
+        self.QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", 5))
+
+        # Answers are cached per document index; similarity 0 disables the semantic tier
+        self.ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+        self.ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1024))
+        self.ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", 3600))
+        self.ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+
+        # Load the embedding model in the background once the server is up
+        self.WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+        # Admin endpoints (on-demand profiling) require this token in X-Admin-Token; unset disables them
+        self.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+        self.PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 300))
+
+        # Create directories
+        os.makedirs(self.UPLOAD_PATH, exist_ok=True)
+        os.makedirs(self.PROCESSED_PATH, exist_ok=True)
+        os.makedirs(self.VECTOR_STORE_PATH, exist_ok=True)
+        os.makedirs(self.CACHE_PATH, exist_ok=True)
+
+    @staticmethod
+    def _path(path: str) -> str:
+        """Resolve relative data paths against the app directory"""
+        if os.path.isabs(path):
+            return path
+        return os.path.join(APP_DIR, path)
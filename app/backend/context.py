@@ -0,0 +1,139 @@
+import re
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+class Tokenizer:
+    """Local token counter for prompt budgeting.
+
+    Uses tiktoken's cl100k_base encoding when it is installed, which is close to
+    the Llama 3 tokenizer behind the Groq models; otherwise words and
+    punctuation marks are counted as one token each.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoding_name = encoding
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception:
+                self._encoding = None
+            self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(_WORD_RE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text that fits in max_tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        matches = list(_WORD_RE.finditer(text))
+        return text if len(matches) <= max_tokens else text[:matches[max_tokens - 1].end()]
+
+class PackedContext(NamedTuple):
+    text: str
+    tokens: int          # tokens in the packed context
+    naive_tokens: int    # tokens the retrieved chunks would take joined verbatim
+    blocks: int          # passages after merging adjacent chunks
+    duplicates: int      # passages dropped as near-duplicates
+    truncated: bool      # whether the token budget cut passages
+
+class ContextPacker:
+    """Turns retrieved chunks into a compact, token-budgeted context.
+
+    Chunks of the same document with consecutive `chunk_id`s are merged into
+    one passage with the overlap between them removed, passages whose word
+    3-grams mostly repeat an earlier one are dropped, and passages are added
+    in relevance order until `token_budget` is reached.
+    """
+
+    def __init__(self, token_budget: int = 1500, max_overlap: int = 100, duplicate_threshold: float = 0.9,
+                 tokenizer: Optional[Tokenizer] = None):
+        self.token_budget = token_budget
+        self.max_overlap = max_overlap
+        self.duplicate_threshold = duplicate_threshold
+        self.tokenizer = tokenizer or Tokenizer()
+
+    @staticmethod
+    def _group_key(doc: "Document"):
+        return doc.metadata.get("document_id") or doc.metadata.get("source")
+
+    def _merge_text(self, left: str, right: str) -> str:
+        """Join consecutive chunks, dropping the text the splitter repeated"""
+        for size in range(min(len(left), len(right), self.max_overlap), 0, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+        return f"{left}\n{right}"
+
+    def merge_adjacent(self, docs: List["Document"]) -> List[str]:
+        """Passages built from runs of consecutive chunks, ordered by their best-ranked chunk"""
+        runs = []  # [best rank, group, last chunk_id, text]
+        positions = sorted(
+            range(len(docs)),
+            key=lambda i: (str(self._group_key(docs[i])), docs[i].metadata.get("chunk_id", -1), i)
+        )
+        for i in positions:
+            doc = docs[i]
+            group, chunk_id = self._group_key(doc), doc.metadata.get("chunk_id")
+            previous = runs[-1] if runs else None
+            if previous and chunk_id is not None and previous[1] == group and previous[2] is not None:
+                if chunk_id == previous[2]:
+                    previous[0] = min(previous[0], i)  # same chunk retrieved twice
+                    continue
+                if chunk_id == previous[2] + 1:
+                    previous[0] = min(previous[0], i)
+                    previous[2] = chunk_id
+                    previous[3] = self._merge_text(previous[3], doc.page_content)
+                    continue
+            runs.append([i, group, chunk_id, doc.page_content])
+        return [text for _, _, _, text in sorted(runs, key=lambda run: run[0])]
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        words = text.lower().split()
+        return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+    def pack(self, docs: List["Document"]) -> PackedContext:
+        naive_tokens = self.tokenizer.count("\n\n".join(doc.page_content for doc in docs))
+
+        kept, kept_shingles, duplicates = [], [], 0
+        for passage in self.merge_adjacent(docs):
+            shingles = self._shingles(passage)
+            if any(len(shingles & other) / len(shingles) >= self.duplicate_threshold for other in kept_shingles):
+                duplicates += 1
+                continue
+            kept.append(passage)
+            kept_shingles.append(shingles)
+
+        separator_tokens = self.tokenizer.count("\n\n")
+        passages, used, truncated = [], 0, False
+        for passage in kept:
+            cost = self.tokenizer.count(passage) + (separator_tokens if passages else 0)
+            if used + cost > self.token_budget:
+                truncated = True
+                remaining = self.token_budget - used - (separator_tokens if passages else 0)
+                # A short tail is not worth a passage cut mid-sentence
+                if remaining >= min(64, self.token_budget // 4):
+                    passages.append(self.tokenizer.truncate(passage, remaining))
+                break
+            passages.append(passage)
+            used += cost
+
+        text = "\n\n".join(passages)
+        return PackedContext(text, self.tokenizer.count(text), naive_tokens, len(kept), duplicates, truncated)
@@ -0,0 +1,46 @@
+"""Convert indexes saved by FAISS.save_local to the mapped format.
+
+The server never unpickles a stored index: documents whose index is still an
+`index.pkl` are reported as needing conversion and are not served until this
+has been run once. Unpickling runs code from the file, so only convert
+indexes this application wrote. Run it from app/ with document ids or index
+directories (every stored document that needs it when none are given):
+
+    python -m backend.convert_indexes
+    python -m backend.convert_indexes <document_id> data/index/faiss_index
+"""
+import argparse
+import os
+
+from .chunk_store import MappedVectorStore
+from .rag import RAGApplication
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="document ids or directories holding index.pkl")
+    args = parser.parse_args()
+
+    rag_app = RAGApplication()
+    registry = rag_app.registry
+    targets = args.targets or [
+        meta["document_id"] for meta in registry.list_documents() if registry.needs_conversion(meta["document_id"])
+    ]
+    if not targets:
+        print("No stored index needs converting")
+
+    for target in targets:
+        try:
+            if registry.is_valid_id(target):
+                converted = registry.convert_legacy(target)
+            elif os.path.isdir(target):
+                converted = MappedVectorStore.convert_legacy(target, rag_app.embedder.embeddings)
+            else:
+                print(f"{target}: not a document id or directory")
+                continue
+        except Exception as e:
+            print(f"{target}: failed: {e}")
+            continue
+        print(f"{target}: {'converted' if converted else 'nothing to convert'}")
+
+if __name__ == "__main__":
+    main()
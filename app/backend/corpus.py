@@ -0,0 +1,405 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .storage import SharedPointer, file_lock
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+
+    from .embedder import Embedder
+
+CORPUS_ID = "corpus"
+
+class CorpusIndex:
+    """Shared FAISS index over many documents that is updated in place.
+
+    Chunks get stable int64 ids in an IndexIDMap2, so documents are appended and
+    removed without re-embedding the rest of the corpus. Removing a document
+    only tombstones its ids; searches exclude them with an id selector and a
+    background compaction physically drops them once they make up
+    `compact_ratio` of the index. It exposes the same search methods as the
+    LangChain vector store, so Retriever and QueryBatcher can use it directly.
+
+    On disk the corpus is a base index written by compaction, an append-only
+    vector delta of the chunks added since, and an append-only chunk log.
+    Adding or removing a document only appends to the delta and the log.
+
+    Several worker processes can share one corpus directory: writes hold a
+    file lock and bump the version in `version.json`. Every other worker
+    then reads just the log and delta entries past the offsets it has
+    already applied; only a compaction, which starts a new generation of the
+    files, makes them load the corpus again.
+    """
+
+    INDEX_FILE = "index.faiss"
+    DELTA_FILE = "delta.bin"
+    LOG_FILE = "chunks.jsonl"
+    VERSION_FILE = "version.json"
+    RELEVANCE_FILE = "relevance.json"
+    LOCK_FILE = ".corpus.lock"
+
+    def __init__(self, path: str, embedder: "Embedder", compact_ratio: float = 0.2):
+        self.path = path
+        self.embedder = embedder
+        self.compact_ratio = compact_ratio
+        self.index = None
+        self.docstore: Dict[int, "Document"] = {}
+        self.document_chunks: Dict[str, List[int]] = {}
+        self.tombstones = set()
+        self.version = 0
+        self.generation = 0
+        self._next_id = 0
+        self._log_offset = 0
+        self._delta_offset = 0
+        self._search_filter = None
+        self._loaded = False
+        self._compacting = False
+        self._exclusive_depth = 0
+        self._lock = threading.RLock()
+        self._pointer = SharedPointer(os.path.join(path, self.VERSION_FILE))
+        self._relevance = SharedPointer(os.path.join(path, self.RELEVANCE_FILE))
+
+    @property
+    def embeddings(self):
+        return self.embedder.embeddings
+
+    def _ensure_loaded(self):
+        """Load the corpus on first use and reload it when another worker published a newer version"""
+        if self._loaded and not self._stale():
+            return
+        with self._exclusive():
+            pass
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the corpus against other threads and worker processes, starting from the latest version"""
+        with self._lock:
+            if self._exclusive_depth:
+                # Re-entered from a method that already holds the file lock
+                yield
+                return
+            os.makedirs(self.path, exist_ok=True)
+            with file_lock(os.path.join(self.path, self.LOCK_FILE)):
+                if not self._loaded or self._stale():
+                    self._refresh()
+                self._exclusive_depth += 1
+                try:
+                    yield
+                finally:
+                    self._exclusive_depth -= 1
+
+    def _disk_pointer(self) -> dict:
+        return self._pointer.read() or {"version": 0}
+
+    def _stale(self) -> bool:
+        pointer = self._disk_pointer()
+        if pointer["version"] == 0:
+            return False
+        return pointer["version"] != self.version or pointer.get("generation", 0) != self.generation
+
+    def _refresh(self):
+        """Catch up with the files on disk, incrementally within a generation; callers hold the file lock"""
+        pointer = self._disk_pointer()
+        if self._loaded and pointer.get("generation", 0) == self.generation:
+            self._apply_log()
+            self._apply_delta()
+            self.version = pointer["version"]
+        else:
+            self._load()
+
+    def _load(self):
+        """Read the base index, then the delta and the chunk log from the start"""
+        self.index = None
+        self.docstore = {}
+        self.document_chunks = {}
+        self.tombstones = set()
+        self._search_filter = None
+        self._next_id = 0
+        self._log_offset = 0
+        self._delta_offset = 0
+        self.version = 0
+
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            import faiss
+
+            self.index = faiss.read_index(index_path)
+            self._next_id = int(faiss.vector_to_array(self.index.id_map).max(initial=-1)) + 1
+        self._apply_delta()
+        self._apply_log()
+
+        if self.index is not None:
+            import faiss
+
+            stored_ids = set(faiss.vector_to_array(self.index.id_map).tolist())
+            self.tombstones = stored_ids - set(self.docstore)
+        pointer = self._disk_pointer()
+        self.generation = pointer.get("generation", 0)
+        self.version = pointer["version"] or (1 if self.index is not None else 0)
+        self._loaded = True
+
+    def _apply_log(self):
+        """Replay chunk log records past the last applied offset"""
+        log_path = os.path.join(self.path, self.LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        from langchain.docstore.document import Document
+
+        with open(log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # Only whole lines; a writer appends under the file lock, so there is no partial one
+        data = data[:data.rfind(b"\n") + 1]
+        self._log_offset += len(data)
+        for line in data.decode("utf-8").splitlines():
+            record = json.loads(line)
+            if record["op"] == "add":
+                self.docstore[record["id"]] = Document(page_content=record["text"], metadata=record["metadata"])
+                self.document_chunks.setdefault(record["document_id"], []).append(record["id"])
+            else:
+                removed = self.document_chunks.pop(record["document_id"], [])
+                for chunk_id in removed:
+                    self.docstore.pop(chunk_id, None)
+                self._tombstone(removed)
+
+    def _apply_delta(self):
+        """Add the vectors appended to the delta past the last applied offset"""
+        delta_path = os.path.join(self.path, self.DELTA_FILE)
+        if not os.path.exists(delta_path):
+            return
+        import numpy as np
+
+        with open(delta_path, "rb") as f:
+            dimension = int(np.frombuffer(f.read(4), dtype="<i4")[0])
+            row = np.dtype([("id", "<i8"), ("vector", "<f4", (dimension,))])
+            f.seek(max(self._delta_offset, 4))
+            data = f.read()
+        rows = np.frombuffer(data[:len(data) - len(data) % row.itemsize], dtype=row)
+        self._delta_offset = max(self._delta_offset, 4) + rows.nbytes
+        # Ids only grow, so rows a compaction already folded into the base index are skipped
+        rows = rows[rows["id"] >= self._next_id]
+        if len(rows):
+            self._index_for(dimension).add_with_ids(np.ascontiguousarray(rows["vector"]), np.ascontiguousarray(rows["id"]))
+            self._next_id = int(rows["id"].max()) + 1
+
+    def _index_for(self, dimension: int):
+        if self.index is None:
+            import faiss
+
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+        return self.index
+
+    def _tombstone(self, ids: List[int]):
+        if ids:
+            self.tombstones.update(ids)
+            self._search_filter = None
+
+    def add_document(self, document_id: str, chunks: List[str], vectors: List[List[float]], metadatas: List[dict]) -> int:
+        """Append a document's chunks, replacing any earlier version of it"""
+        import numpy as np
+        from langchain.docstore.document import Document
+
+        if not chunks:
+            return 0
+        with self._exclusive():
+            if document_id in self.document_chunks:
+                self.remove_document(document_id)
+
+            vectors = np.asarray(vectors, dtype=np.float32)
+            ids = np.arange(self._next_id, self._next_id + len(chunks), dtype=np.int64)
+            self._next_id += len(chunks)
+            self._index_for(vectors.shape[1]).add_with_ids(vectors, ids)
+            ids = ids.tolist()
+
+            records = []
+            for chunk_id, chunk, metadata in zip(ids, chunks, metadatas):
+                metadata = {**metadata, "document_id": document_id}
+                self.docstore[chunk_id] = Document(page_content=chunk, metadata=metadata)
+                records.append({"op": "add", "id": chunk_id, "document_id": document_id, "text": chunk, "metadata": metadata})
+            self.document_chunks[document_id] = ids
+            self._append_delta(ids, vectors)
+            self._append_log(records)
+            self._changed()
+        return len(ids)
+
+    def remove_document(self, document_id: str) -> int:
+        """Tombstone every chunk of a document; returns how many were removed"""
+        with self._exclusive():
+            ids = self.document_chunks.pop(document_id, [])
+            if not ids:
+                return 0
+            for chunk_id in ids:
+                self.docstore.pop(chunk_id, None)
+            self._tombstone(ids)
+            self._append_log([{"op": "delete", "document_id": document_id}])
+            self._changed()
+
+        if len(self.tombstones) > self.compact_ratio * self.index.ntotal and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="corpus-compaction", daemon=True).start()
+        return len(ids)
+
+    def batch_search(self, vectors: List[List[float]], k: int) -> List[List[Tuple["Document", float]]]:
+        """Search several query vectors, skipping tombstoned chunks"""
+        import numpy as np
+
+        self._ensure_loaded()
+        with self._lock:
+            if self.index is None or not self.docstore:
+                return [[] for _ in vectors]
+            distances, indices = self.index.search(
+                np.asarray(vectors, dtype=np.float32), min(k, self.index.ntotal), params=self._search_params()
+            )
+
+            results = []
+            for row_distances, row_ids in zip(distances, indices):
+                hits = []
+                for distance, chunk_id in zip(row_distances, row_ids):
+                    doc = self.docstore.get(int(chunk_id))
+                    if doc is not None:
+                        hits.append((doc, float(distance)))
+                        if len(hits) == k:
+                            break
+                results.append(hits)
+            return results
+
+    def _search_params(self):
+        """Search parameters that skip tombstoned ids, rebuilt only after removals; callers hold the lock"""
+        if not self.tombstones:
+            return None
+        if self._search_filter is None:
+            import faiss
+            import numpy as np
+
+            removed = faiss.IDSelectorBatch(np.asarray(sorted(self.tombstones), dtype=np.int64))
+            selector = faiss.IDSelectorNot(removed)
+            # The parameters only point at the selectors, so keep them alive alongside
+            self._search_filter = (faiss.SearchParameters(sel=selector), selector, removed)
+        return self._search_filter[0]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List["Document"]:
+        return [doc for doc, _ in self.batch_search([embedding], k)[0]]
+
+    def similarity_search(self, query: str, k: int = 4) -> List["Document"]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k)
+
+    def compact(self):
+        """Physically drop tombstoned vectors on a copy, then swap it in if nothing changed meanwhile"""
+        import faiss
+        import numpy as np
+
+        try:
+            with self._lock:
+                if not self.tombstones:
+                    return
+                dropped = set(self.tombstones)
+                version = self.version
+                compacted = faiss.clone_index(self.index)
+
+            compacted.remove_ids(faiss.IDSelectorBatch(np.asarray(sorted(dropped), dtype=np.int64)))
+
+            # Compaction keeps the version, as the live chunks are the same; other workers
+            # see the new generation and reload its files on their next access
+            with self._exclusive():
+                if self.version != version:
+                    return  # the corpus changed meanwhile; the next removal retries
+                self.index = compacted
+                self.tombstones -= dropped
+                self._search_filter = None
+                self._save_index()
+                self._reset_delta(compacted.d)
+                self._rewrite_log()
+                self.generation += 1
+                self._pointer.write({"version": self.version, "generation": self.generation})
+        finally:
+            self._compacting = False
+
+    @property
+    def relevance(self) -> Optional[dict]:
+        """Relevance-gate calibration of the corpus, if it was calibrated"""
+        return self._relevance.read()
+
+    @relevance.setter
+    def relevance(self, calibration: dict):
+        os.makedirs(self.path, exist_ok=True)
+        self._relevance.write(calibration)
+
+    def iter_documents(self) -> Iterator["Document"]:
+        """Every live chunk, from a snapshot taken under the lock so concurrent adds and removals are safe"""
+        self._ensure_loaded()
+        with self._lock:
+            docs = list(self.docstore.values())
+        return iter(docs)
+
+    def documents(self) -> Dict[str, int]:
+        """Chunk count per document in the corpus"""
+        self._ensure_loaded()
+        with self._lock:
+            return {document_id: len(ids) for document_id, ids in self.document_chunks.items()}
+
+    def stats(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "documents": len(self.document_chunks),
+                "chunks": len(self.docstore),
+                "tombstones": len(self.tombstones),
+                "index_size": self.index.ntotal if self.index is not None else 0,
+                "version": self.version
+            }
+
+    def _changed(self):
+        """Publish a new version to every worker sharing the corpus directory"""
+        self.version += 1
+        self._pointer.write({"version": self.version, "generation": self.generation})
+
+    def _append_log(self, records: List[dict]):
+        os.makedirs(self.path, exist_ok=True)
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(os.path.join(self.path, self.LOG_FILE), "ab") as f:
+            f.write(data)
+        self._log_offset += len(data)
+
+    def _append_delta(self, ids: List[int], vectors):
+        """Append vectors as (int64 id, float32 vector) rows after an int32 dimension header"""
+        import numpy as np
+
+        delta_path = os.path.join(self.path, self.DELTA_FILE)
+        if not os.path.exists(delta_path):
+            self._reset_delta(vectors.shape[1])
+        row = np.dtype([("id", "<i8"), ("vector", "<f4", (vectors.shape[1],))])
+        rows = np.empty(len(ids), dtype=row)
+        rows["id"] = ids
+        rows["vector"] = vectors
+        with open(delta_path, "ab") as f:
+            f.write(rows.tobytes())
+        self._delta_offset = max(self._delta_offset, 4) + rows.nbytes
+
+    def _reset_delta(self, dimension: int):
+        import numpy as np
+
+        tmp_path = os.path.join(self.path, self.DELTA_FILE + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(np.asarray([dimension], dtype="<i4").tobytes())
+        os.replace(tmp_path, os.path.join(self.path, self.DELTA_FILE))
+        self._delta_offset = 4
+
+    def _rewrite_log(self):
+        tmp_path = os.path.join(self.path, self.LOG_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            for document_id, ids in self.document_chunks.items():
+                for chunk_id in ids:
+                    doc = self.docstore[chunk_id]
+                    f.write(json.dumps({"op": "add", "id": chunk_id, "document_id": document_id, "text": doc.page_content, "metadata": doc.metadata}) + "\n")
+        os.replace(tmp_path, os.path.join(self.path, self.LOG_FILE))
+        self._log_offset = os.path.getsize(os.path.join(self.path, self.LOG_FILE))
+
+    def _save_index(self):
+        import faiss
+
+        tmp_path = os.path.join(self.path, self.INDEX_FILE + ".tmp")
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, self.INDEX_FILE))
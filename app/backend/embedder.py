@@ -0,0 +1,135 @@
+import threading
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+DEFAULT_BACKEND = "sentence-transformers"
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token in English, plus the [CLS]/[SEP] markers
+    return len(text) // 4 + 2
+
+def length_buckets(texts: List[str], max_batch_tokens: int = 8192, max_batch_size: int = 128) -> List[List[int]]:
+    """Indices of texts grouped into batches of similar length, shortest first.
+
+    A batch is padded to its longest text, so batches are cut once batch size
+    times longest text would exceed max_batch_tokens: short chunks go in large
+    batches and long ones in small batches.
+    """
+    batches, batch, longest = [], [], 0
+    for i in sorted(range(len(texts)), key=lambda i: len(texts[i])):
+        tokens = estimate_tokens(texts[i])
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * max(longest, tokens) > max_batch_tokens):
+            batches.append(batch)
+            batch, longest = [], 0
+        batch.append(i)
+        longest = max(longest, tokens)
+    if batch:
+        batches.append(batch)
+    return batches
+
+class Embedder:
+    def __init__(self, model_name: str, backend: str = DEFAULT_BACKEND, threads: Optional[int] = None,
+                 cache_dir: Optional[str] = None, batch_tokens: int = 8192, max_batch: int = 128):
+        self.model_name = model_name
+        self.backend = backend
+        self.threads = threads
+        self.cache_dir = cache_dir
+        self.batch_tokens = batch_tokens
+        self.max_batch = max_batch
+        self._embeddings = None
+        self._lock = threading.Lock()
+        self.vector_store = None
+
+    @property
+    def identity(self) -> str:
+        """Names the vector space; vectors from embedders with different identities do not mix"""
+        if self.backend == DEFAULT_BACKEND:
+            return self.model_name
+        if self.backend == "hashing":
+            return "hashing"
+        return f"{self.backend}:{self.model_name}"
+
+    @property
+    def spec(self) -> tuple:
+        """Constructor arguments, for building the same embedder in a worker process"""
+        return self.model_name, self.backend, self.threads, self.cache_dir, self.batch_tokens, self.max_batch
+
+    @property
+    def embeddings(self):
+        """LangChain embeddings of the configured backend, loaded on first access"""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from .embeddings import create_embeddings
+
+                    self._embeddings = create_embeddings(
+                        self.backend, self.model_name, self.threads, self.cache_dir, batch_size=self.max_batch
+                    )
+        return self._embeddings
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._embeddings is not None
+
+    def warm_up(self):
+        """Load the embedding model and run one encode so the first request is fast"""
+        self.embeddings.embed_query("warm up")
+
+    def create_vector_store(self, chunks: List[str], pdf_filename: str) -> "FAISS":
+        """Create FAISS vector store from text chunks"""
+        from langchain.docstore.document import Document
+        from langchain.vectorstores import FAISS
+
+        documents = [
+            Document(
+                page_content=chunk,
+                metadata={"source": pdf_filename, "chunk_id": i}
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+
+        self.vector_store = FAISS.from_documents(documents, self.embeddings)
+        return self.vector_store
+
+    def embed_documents(self, chunks: List[str]) -> List[List[float]]:
+        """Embed chunks with the shared model, in length buckets so little compute goes to padding"""
+        if len(chunks) <= 1:
+            return self.embeddings.embed_documents(chunks)
+        vectors: List[Optional[List[float]]] = [None] * len(chunks)
+        for batch in length_buckets(chunks, self.batch_tokens, self.max_batch):
+            for i, vector in zip(batch, self.embeddings.embed_documents([chunks[i] for i in batch])):
+                vectors[i] = vector
+        return vectors
+
+    def build_vector_store(self, chunks: List[str], vectors: List[List[float]], pdf_filename: str) -> "FAISS":
+        """Create FAISS vector store from chunks that were already embedded"""
+        from langchain.vectorstores import FAISS
+
+        self.vector_store = FAISS.from_embeddings(
+            text_embeddings=list(zip(chunks, vectors)),
+            embedding=self.embeddings,
+            metadatas=[{"source": pdf_filename, "chunk_id": i} for i in range(len(chunks))]
+        )
+        return self.vector_store
+
+    def save_vector_store(self, path: str):
+        """Save vector store to disk in the MappedVectorStore format"""
+        if self.vector_store:
+            from .chunk_store import MappedVectorStore
+
+            MappedVectorStore.save(self.vector_store, path)
+
+    def load_vector_store(self, path: str):
+        """Open a vector store saved by save_vector_store.
+
+        Pickled LangChain stores are not loaded; convert them once with
+        `python -m backend.convert_indexes <path>`.
+        """
+        from .chunk_store import MappedVectorStore
+
+        if not MappedVectorStore.exists(path):
+            return None
+        self.vector_store = MappedVectorStore(path, self)
+        return self.vector_store
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import os
+import re
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx", "onnx-int8", "hashing")
+
+_WORD_RE = re.compile(r"\w+")
+
+def create_embeddings(backend: str, model_name: str, threads: Optional[int] = None,
+                      cache_dir: Optional[str] = None, batch_size: int = 32) -> Embeddings:
+    """LangChain embeddings object for one of EMBEDDING_BACKENDS"""
+    if backend == "sentence-transformers":
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'batch_size': batch_size}
+        )
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(
+            model_name, quantize=backend == "onnx-int8", threads=threads, cache_dir=cache_dir, batch_size=batch_size
+        )
+    if backend == "hashing":
+        return HashingEmbeddings()
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+class OnnxEmbeddings(Embeddings):
+    """A sentence-transformers model run by ONNX Runtime, optionally with int8 weights.
+
+    The Hugging Face checkpoint is exported to ONNX on first use and cached
+    under `cache_dir`; the int8 variant is a dynamic quantization of that
+    export. Token states are mean-pooled over the attention mask and
+    L2-normalized, as the MiniLM and MPNet sentence-transformers models do.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: Optional[int] = None,
+                 cache_dir: Optional[str] = None, batch_size: int = 32, max_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        path = self._model_path(quantize, cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "onnx-embeddings"))
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _model_path(self, quantize: bool, cache_dir: str) -> str:
+        directory = os.path.join(cache_dir, re.sub(r"[^\w.-]", "_", self.model_name))
+        fp32_path = os.path.join(directory, "model.onnx")
+        int8_path = os.path.join(directory, "model.int8.onnx")
+        if not os.path.exists(fp32_path):
+            os.makedirs(directory, exist_ok=True)
+            self._export(fp32_path)
+        if not quantize:
+            return fp32_path
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path
+
+    def _export(self, path: str):
+        import torch
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(self.model_name, torchscript=True).eval()
+        sample = self.tokenizer(["export"], return_tensors="pt")
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        axes = {name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(sample[name] for name in names), tmp_path,
+                input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=14
+            )
+        os.replace(tmp_path, path)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np"
+            )
+            hidden = self.session.run(None, {name: batch[name].astype(np.int64) for name in self.input_names})[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend(pooled.tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings built by feature hashing.
+
+    No model is loaded and the same text always maps to the same unit
+    vector, which makes it useful for tests and for benchmarking the rest of
+    the pipeline. Words and word pairs are hashed into `dim` signed buckets.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        words = _WORD_RE.findall(text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[value % self.dim] += 1.0 if value >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,200 @@
+"""Local stand-in for the Groq OpenAI-compatible API.
+
+Serves POST /v1/chat/completions (blocking and `stream=True`) with a scripted
+answer, configurable latency and injected failures (500s, 429s with
+Retry-After, and a slow tail), so the backend can be exercised offline:
+
+    python -m backend.fake_llm --port 9000 --first-token-latency 0.3
+    python -m backend.fake_llm --error-rate 0.05 --rate-limit-rate 0.05 --slow-rate 0.02 --slow-latency 2
+    LLM_BASE_URL=http://127.0.0.1:9000/v1 python backend_server.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+DEFAULT_ANSWER = "This is a scripted answer from the local fake LLM server, based on the provided context."
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, answer: str = DEFAULT_ANSWER,
+                 first_token_latency: float = 0.0, token_latency: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 0.0, seed: Optional[int] = None):
+        self.answer = answer
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests_served = 0
+        self.errors_served = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _draw(self) -> tuple:
+        """Decide the fate of one request: (status, extra first-token latency)"""
+        with self._lock:
+            self.requests_served += 1
+            roll = self._random.random()
+            slow = self.slow_latency if self._random.random() < self.slow_rate else 0.0
+            if roll < self.error_rate:
+                self.errors_served += 1
+                return 500, slow
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.errors_served += 1
+                return 429, slow
+            return 200, slow
+
+    def tokens(self) -> List[str]:
+        """Split the scripted answer into word-level tokens, keeping whitespace"""
+        return re.findall(r"\S+\s*", self.answer)
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up, e.g. a cancelled hedge
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, extra_latency = server._draw()
+                if status == 429:
+                    self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "0.1"})
+                    return
+                if status != 200:
+                    time.sleep(extra_latency)
+                    self._send_json(status, {"error": {"message": "Injected server error"}})
+                    return
+
+                if body.get("stream"):
+                    self._stream(body, extra_latency)
+                else:
+                    self._complete(body, extra_latency)
+
+            def _complete(self, body: dict, extra_latency: float):
+                time.sleep(server.first_token_latency + extra_latency + server.token_latency * len(server.tokens()))
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.answer},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(server.tokens()), "total_tokens": len(server.tokens())}
+                })
+
+            def _stream(self, body: dict, extra_latency: float):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                time.sleep(server.first_token_latency + extra_latency)
+                for i, token in enumerate(server.tokens()):
+                    if i:
+                        time.sleep(server.token_latency)
+                    self._send_event(self._chunk(completion_id, body, {"content": token}, None))
+                self._send_event(self._chunk(completion_id, body, {}, "stop"))
+                self._send_chunk(b"data: [DONE]\n\n")
+                self._send_chunk(b"")
+
+            def _chunk(self, completion_id: str, body: dict, delta: dict, finish_reason: Optional[str]) -> dict:
+                return {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+
+            def _send_event(self, payload: dict):
+                self._send_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    parser.add_argument("--first-token-latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds before the first token of slow requests")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.answer, args.first_token_latency, args.token_latency,
+                           args.error_rate, args.rate_limit_rate, args.slow_rate, args.slow_latency, args.seed)
+    print(f"Fake LLM server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import math
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import faiss
+    import numpy as np
+    from langchain.vectorstores import FAISS
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf_flat", "ivf_pq")
+STORAGE_TYPES = ("float32", "float16", "sq8")
+
+# Vector counts at which "auto" switches to the next index type
+HNSW_THRESHOLD = 20_000
+IVF_THRESHOLD = 500_000
+IVF_PQ_THRESHOLD = 5_000_000
+
+# IVF/PQ k-means wants roughly this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+def choose_index_type(n_vectors: int) -> str:
+    """Pick an index type from the number of vectors to store"""
+    if n_vectors < HNSW_THRESHOLD:
+        return "flat"
+    if n_vectors < IVF_THRESHOLD:
+        return "hnsw"
+    if n_vectors < IVF_PQ_THRESHOLD:
+        return "ivf_flat"
+    return "ivf_pq"
+
+def ivf_nlist(n_vectors: int) -> int:
+    """Number of IVF lists: ~4*sqrt(n), limited so every centroid gets enough training points"""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_CENTROID, 65536))
+
+def pq_subquantizers(dim: int) -> int:
+    """Largest PQ sub-vector count giving at least 8 dims per sub-vector that divides dim"""
+    for m in range(dim // 8, 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+def _quantizer_type(storage: str):
+    import faiss
+
+    return {"float16": faiss.ScalarQuantizer.QT_fp16, "sq8": faiss.ScalarQuantizer.QT_8bit}[storage]
+
+def create_index(dim: int, n_vectors: int, index_type: str = "auto", storage: str = "float32",
+                 hnsw_m: int = 32, ef_search: int = 64, nprobe: int = 16) -> Tuple["faiss.Index", str]:
+    """Create an empty (possibly untrained) index, returning it with the resolved type.
+
+    Types that cannot be trained on `n_vectors` points fall back to a flat index.
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown index storage: {storage}")
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+
+    nlist = ivf_nlist(n_vectors)
+    if index_type in ("ivf_flat", "ivf_pq") and nlist < 2:
+        index_type = "flat"
+    if index_type == "ivf_pq" and n_vectors < 256 * MIN_POINTS_PER_CENTROID:
+        index_type = "ivf_flat" if nlist >= 2 else "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim) if storage == "float32" else faiss.IndexScalarQuantizer(dim, _quantizer_type(storage))
+    elif index_type == "hnsw":
+        if storage == "float32":
+            index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        else:
+            index = faiss.IndexHNSWSQ(dim, _quantizer_type(storage), hnsw_m)
+        index.hnsw.efSearch = ef_search
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_pq":
+            # PQ codes are already compact, so the storage option does not apply
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), 8)
+        elif storage == "float32":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, _quantizer_type(storage))
+        index.nprobe = min(nprobe, nlist)
+    return index, index_type
+
+def build_index(vectors: "np.ndarray", index_type: str = "auto", storage: str = "float32",
+                hnsw_m: int = 32, ef_search: int = 64, nprobe: int = 16) -> Tuple["faiss.Index", str]:
+    """Create, train and fill an index with float32 vectors"""
+    index, resolved = create_index(vectors.shape[1], vectors.shape[0], index_type, storage, hnsw_m, ef_search, nprobe)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index, resolved
+
+def rebuild_vector_store(vector_store: "FAISS", index_type: str = "auto", storage: str = "float32",
+                         hnsw_m: int = 32, ef_search: int = 64, nprobe: int = 16) -> Optional[str]:
+    """Swap a LangChain store's flat index for the configured type, keeping vector positions.
+
+    Returns the resolved index type, or None when the store was left untouched.
+    """
+    import faiss
+
+    index = vector_store.index
+    if not isinstance(index, faiss.IndexFlat) or index.ntotal == 0:
+        return None
+    if index_type == "auto" and storage == "float32" and choose_index_type(index.ntotal) == "flat":
+        return None
+
+    vectors = index.reconstruct_n(0, index.ntotal)
+    vector_store.index, resolved = build_index(vectors, index_type, storage, hnsw_m, ef_search, nprobe)
+    return resolved
+
+def estimate_index_bytes(index: "faiss.Index") -> int:
+    """Approximate memory held by an index's vectors"""
+    try:
+        code_size = index.sa_code_size()
+    except RuntimeError:
+        code_size = index.d * 4
+    return index.ntotal * code_size
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from .cache import IngestCache
+from .chunker import ChunkBatch, PageChunker
+from .embedder import Embedder
+from .parser import PDFParser
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+# Per-worker embedder, so each pool process loads the model only once
+_worker_embedder: Optional[Embedder] = None
+
+def _get_worker_embedder(*spec) -> Embedder:
+    global _worker_embedder
+    if _worker_embedder is None or _worker_embedder.spec != spec:
+        _worker_embedder = Embedder(*spec)
+    return _worker_embedder
+
+def _process_context():
+    """Start method for pool processes.
+
+    Forking while other threads run (model warm-up, asyncio.to_thread) can
+    copy a lock one of them holds, such as an import lock, into the child,
+    where nothing ever releases it. forkserver forks from a clean
+    single-threaded server instead; spawn where it is unavailable.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into consecutive ranges of at most pages_per_task pages"""
+    pages_per_task = max(1, pages_per_task)
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+def extract_and_chunk(pdf_path: str, file_hash: str, start: int, end: int, chunk_size: int, chunk_overlap: int,
+                      cache: Optional[IngestCache] = None) -> Tuple[int, ChunkBatch, dict]:
+    """Parse and chunk pages [start, end) of a PDF.
+
+    Returns (text_length, chunks with their page provenance, seconds spent per
+    stage), the timings being measured here because this runs in a worker process.
+    """
+    started = time.perf_counter()
+    if cache is None:
+        pages = list(PDFParser.iter_pages(pdf_path, start, end))
+    else:
+        # Reuse a cached extraction of the same page range of the same file
+        cache_key = f"{file_hash}:{start}-{end}:pages"
+        cached = cache.get_text(cache_key, PDFParser.VERSION)
+        if cached is None:
+            pages = list(PDFParser.iter_pages(pdf_path, start, end))
+            cache.put_text(cache_key, PDFParser.VERSION, json.dumps(pages))
+        else:
+            pages = [tuple(page) for page in json.loads(cached)]
+    parsed = time.perf_counter()
+    chunks = PageChunker(chunk_size, chunk_overlap).chunk_pages(pages)
+    timings = {"parse": parsed - started, "chunk": time.perf_counter() - parsed}
+    return sum(len(text) for _, text in pages), chunks, timings
+
+def embed_chunks(embedder: Embedder, chunks: List[str], cache: Optional[IngestCache] = None) -> List[List[float]]:
+    """Embed chunks, skipping the ones whose vectors are already cached"""
+    if not chunks:
+        return []
+    if cache is None:
+        return embedder.embed_documents(chunks)
+    return cache.embed(chunks, embedder.identity, embedder.embed_documents)
+
+def embed_in_worker(embedding: tuple, chunks: List[str], cache: Optional[IngestCache] = None) -> List[List[float]]:
+    """Embed chunks inside a pool worker with its own copy of the model; `embedding` is Embedder.spec"""
+    return embed_chunks(_get_worker_embedder(*embedding), chunks, cache)
+
+async def embed_parallel(pool: "IngestionPool", embedding: tuple, chunks: List[str], cache: Optional[IngestCache] = None,
+                         task_chunks: int = 128) -> List[List[float]]:
+    """Embed chunks across the pool's worker processes, returning vectors in chunk order.
+
+    Chunks are sorted by length before being split into tasks of task_chunks,
+    so every worker gets texts of similar length and pads little.
+    """
+    order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+    tasks = [order[i:i + task_chunks] for i in range(0, len(order), task_chunks)]
+    results = await asyncio.gather(*(
+        pool.run(embed_in_worker, embedding, [chunks[i] for i in task], cache) for task in tasks
+    ))
+    vectors: List[Optional[List[float]]] = [None] * len(chunks)
+    for task, task_vectors in zip(tasks, results):
+        for i, vector in zip(task, task_vectors):
+            vectors[i] = vector
+    return vectors
+
+class IndexBuilder:
+    """Grows a FAISS vector store batch by batch and hands out read-only snapshots"""
+
+    def __init__(self, embedder: Embedder, pdf_filename: str):
+        self.embedder = embedder
+        self.pdf_filename = pdf_filename
+        self.vector_store: Optional["FAISS"] = None
+        self.chunk_count = 0
+
+    def add(self, chunks: ChunkBatch, vectors: List[List[float]]):
+        """Append already embedded chunks to the index, keeping their page and offsets in the metadata"""
+        if not chunks.texts:
+            return
+        from langchain.vectorstores import FAISS
+
+        text_embeddings = list(zip(chunks.texts, vectors))
+        metadatas = [
+            {"source": self.pdf_filename, "chunk_id": self.chunk_count + i, **chunks.metadata(i)}
+            for i in range(len(chunks.texts))
+        ]
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_embeddings(text_embeddings, self.embedder.embeddings, metadatas=metadatas)
+        else:
+            self.vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+        self.chunk_count += len(chunks.texts)
+
+    def snapshot(self) -> "FAISS":
+        """Copy of the index built so far that stays valid while more chunks are added.
+
+        The docstore only ever grows, so the snapshot can share it; the FAISS
+        index and the id mapping are copied.
+        """
+        import faiss
+        from langchain.vectorstores import FAISS
+
+        store = self.vector_store
+        return FAISS(store.embedding_function, faiss.clone_index(store.index), store.docstore, dict(store.index_to_docstore_id))
+
+class IngestionPool:
+    """Runs the CPU-bound part of ingestion off the event loop with bounded concurrency"""
+
+    def __init__(self, executor: str = "process", max_workers: Optional[int] = None, max_concurrent: Optional[int] = None):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown ingestion executor: {executor}")
+        self.executor_type = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent or self.max_workers
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.documents = 0
+        self.chunks = 0
+        self.seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_process_context())
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+        return self._executor
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.executor_type == "process"
+
+    @asynccontextmanager
+    async def document_slot(self):
+        """Limit how many documents are ingested at once"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            yield
+
+    def record(self, chunks: int, seconds: float):
+        """Account for one ingested document, for sizing ingestion hosts"""
+        self.documents += 1
+        self.chunks += chunks
+        self.seconds += seconds
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "chunks_per_second": round(self.chunks / self.seconds, 1) if self.seconds else 0.0
+        }
+
+    async def run(self, fn, *args, in_process: bool = False):
+        """Run fn(*args) in the pool, or in the loop's default thread pool when in_process is set"""
+        loop = asyncio.get_running_loop()
+        executor = None if in_process and self.uses_processes else self.executor
+        return await loop.run_in_executor(executor, fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from .storage import SharedPointer, write_json_atomic
+
+FINISHED = ("success", "error", "cancelled")
+
+# Counter updates closer together than this are not written; /api/jobs/{id}/events polls at the same rate
+PROGRESS_WRITE_INTERVAL_S = 0.25
+
+class JobStore:
+    """Ingestion jobs kept as one small JSON file each.
+
+    Only the worker running a job writes its file, replacing it atomically on
+    every progress update, so a status request can be answered by any worker
+    process. Finished jobs are deleted after `ttl_seconds`.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        self.path = path
+        self.ttl = ttl_seconds
+        self._jobs = {}  # job id -> record of the jobs this process runs
+        self._pointers = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, job_id: str) -> str:
+        return os.path.join(self.path, f"{job_id}.json")
+
+    def create(self, filename: str) -> dict:
+        self._remove_expired()
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "filename": filename,
+            "status": "queued",
+            "stage": "queued",
+            "pages_total": 0,
+            "pages_parsed": 0,
+            "chunks_total": 0,
+            "chunks_embedded": 0,
+            "progress": 0.0,
+            "created_at": now,
+            "updated_at": now
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            write_json_atomic(self._file(job["job_id"]), job)
+        return dict(job)
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated_at=time.time())
+            write_json_atomic(self._file(job_id), job)
+            if job["status"] in FINISHED:
+                del self._jobs[job_id]
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Latest record of a job, whichever worker runs it"""
+        if not job_id.isalnum():
+            return None
+        with self._lock:
+            if job_id in self._jobs:
+                return dict(self._jobs[job_id])
+            pointer = self._pointers.setdefault(job_id, SharedPointer(self._file(job_id)))
+        job = pointer.read()
+        if job is None or job["status"] in FINISHED:
+            with self._lock:
+                self._pointers.pop(job_id, None)
+        return job
+
+    def _remove_expired(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+class JobProgress:
+    """Per-stage counters of one ingestion, written to its job record as they change.
+
+    Stage changes and the outcome are written straight away; counter updates
+    at most every `min_interval` seconds, as each write replaces a file on
+    the event loop thread. Without a store it only counts, so ingestion code
+    can report progress unconditionally.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, job_id: Optional[str] = None,
+                 min_interval: float = PROGRESS_WRITE_INTERVAL_S):
+        self.store = store
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last_write = float("-inf")
+        self.pages_total = 0
+        self.pages_parsed = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.started: Optional[float] = None
+
+    @property
+    def chunks_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        return round(self.chunks_embedded / elapsed, 1) if elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        """Share of the work done; parsing and embedding each count for half"""
+        if not self.pages_total:
+            return 0.0
+        parsed = self.pages_parsed / self.pages_total
+        embedded = self.chunks_embedded / self.chunks_total if self.chunks_total else 0.0
+        return round(min(1.0, 0.5 * parsed + 0.5 * parsed * embedded), 4)
+
+    def _write(self, force: bool = True, **fields):
+        if self.store is not None:
+            now = time.monotonic()
+            if not force and now - self._last_write < self.min_interval:
+                return
+            self._last_write = now
+            counters = {
+                "pages_total": self.pages_total,
+                "pages_parsed": self.pages_parsed,
+                "chunks_total": self.chunks_total,
+                "chunks_embedded": self.chunks_embedded,
+                "progress": self.fraction,
+                "chunks_per_second": self.chunks_per_second
+            }
+            self.store.update(self.job_id, **{**counters, **fields})
+
+    def stage(self, stage: str, **fields):
+        self._write(status="running", stage=stage, **fields)
+
+    def pages(self, total: int):
+        self.pages_total = total
+        self.started = time.monotonic()
+        self._write()
+
+    def parsed(self, pages: int, chunks: int):
+        self.pages_parsed += pages
+        self.chunks_total += chunks
+        self._write(force=False)
+
+    def embedded(self, chunks: int):
+        self.chunks_embedded += chunks
+        self._write(force=False)
+
+    def finish(self, result: dict):
+        if result.get("status") == "success":
+            self._write(status="success", stage="done", progress=1.0, result=result)
+        elif result.get("status") == "cancelled":
+            self._write(status="cancelled", stage="cancelled", message=result.get("message"), result=result)
+        else:
+            self._write(status="error", stage="failed", message=result.get("message"), result=result)
@@ -0,0 +1,103 @@
+from typing import AsyncIterator, Iterator, Optional
+
+from .llm_client import AsyncLLMClient
+
+SYSTEM_PROMPT = "You are a precise document assistant that only answers based on provided context."
+
+class LLMInterface:
+    ERROR_PREFIX = "Error generating response"
+
+    def __init__(self, api_key: str, model_name: str, base_url: str = "https://api.groq.com/openai/v1",
+                 max_concurrency: int = 8, timeout_s: float = 30.0, max_retries: int = 3, hedge_after_s: float = 0.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model_name = model_name
+        self._client = None
+        # Used by the async request path; the sync methods keep the OpenAI client
+        self.async_client = AsyncLLMClient(
+            base_url,
+            api_key,
+            max_concurrency=max_concurrency,
+            timeout_s=timeout_s,
+            max_retries=max_retries,
+            hedge_after_s=hedge_after_s
+        )
+
+    @property
+    def client(self):
+        """OpenAI-compatible client for the Groq API, created on first use"""
+        if self._client is None:
+            import openai
+
+            self._client = openai.OpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key
+            )
+        return self._client
+
+    @staticmethod
+    def build_prompt(context: str, question: str) -> str:
+        """Enhanced prompt to prevent hallucination"""
+        return f"""You are a helpful assistant that answers questions based STRICTLY on the provided context.
+
+IMPORTANT INSTRUCTIONS:
+1. Only use information from the provided context to answer the question
+2. If the answer is not in the context, say "I cannot find this information in the provided document"
+3. Do not add information from your general knowledge
+4. Be specific and cite relevant parts of the context when possible
+5. If the context is unclear or insufficient, acknowledge this limitation
+
+Context:
+{context}
+
+Question: {question}
+
+Answer based solely on the context provided:"""
+
+    def build_request(self, context: str, question: str) -> dict:
+        """Chat completion parameters shared by the blocking and streaming calls"""
+        return {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self.build_prompt(context, question)}
+            ],
+            "max_tokens": 512,
+            "temperature": 0.1,  # Low temperature to reduce hallucination
+            "top_p": 0.9,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0
+        }
+
+    def generate_answer(self, context: str, question: str) -> str:
+        """Generate answer using Groq API with hallucination prevention"""
+        try:
+            response = self.client.chat.completions.create(**self.build_request(context, question))
+            return response.choices[0].message.content.strip()
+
+        except Exception as e:
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    def stream_answer(self, context: str, question: str) -> Iterator[str]:
+        """Yield answer tokens as the Groq API produces them"""
+        stream = self.client.chat.completions.create(stream=True, **self.build_request(context, question))
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+    async def agenerate_answer(self, context: str, question: str, deadline: Optional[float] = None) -> str:
+        """Async generate_answer over the pooled client, with retries and an optional deadline"""
+        try:
+            response = await self.async_client.complete(self.build_request(context, question), deadline)
+            return response["choices"][0]["message"]["content"].strip()
+
+        except Exception as e:
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    async def astream_answer(self, context: str, question: str, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """Async stream_answer over the pooled client"""
+        async for token in self.async_client.stream(self.build_request(context, question), deadline):
+            yield token
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator, Optional
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AsyncLLMClient:
+    """Async client for OpenAI-compatible chat completions.
+
+    Requests share one pooled httpx connection pool with keep-alive, at most
+    `max_concurrency` run at once, and every call carries a deadline that
+    bounds its attempts and backoff sleeps together. 429/5xx responses and
+    transport errors are retried with full-jitter exponential backoff
+    (honouring Retry-After). With `hedge_after_s` set, a blocking completion
+    still unanswered after that long gets a second, identical request and the
+    first successful response wins; a hedge shares its request's slot.
+    """
+
+    def __init__(self, base_url: str, api_key: str, max_concurrency: int = 8, timeout_s: float = 30.0,
+                 max_retries: int = 3, backoff_base_s: float = 0.25, backoff_max_s: float = 4.0,
+                 hedge_after_s: float = 0.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout_s
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base_s
+        self.backoff_max = backoff_max_s
+        self.hedge_after = hedge_after_s
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self):
+        """Pooled httpx client, created on first use inside the running event loop"""
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=2 * self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30.0
+                )
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _deadline(self, deadline: Optional[float]) -> float:
+        return deadline if deadline is not None else time.monotonic() + self.timeout * (self.max_retries + 1)
+
+    def _attempt_timeout(self, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise Exception("LLM request deadline exceeded")
+        return min(self.timeout, remaining)
+
+    async def _backoff(self, attempt: int, deadline: float, retry_after: Optional[float]):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay >= deadline:
+            raise Exception("LLM request deadline exceeded while retrying")
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _check_status(response):
+        if response.status_code in RETRY_STATUSES:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            raise RetryableError(f"LLM endpoint returned {response.status_code}", retry_after)
+        if response.status_code >= 400:
+            raise Exception(f"LLM endpoint returned {response.status_code}: {response.text[:200]}")
+
+    async def _with_retries(self, attempt_fn, deadline: float):
+        import httpx
+
+        attempt = 0
+        while True:
+            try:
+                self.requests += 1
+                return await attempt_fn(self._attempt_timeout(deadline))
+            except (RetryableError, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    raise Exception(f"LLM request failed after {attempt + 1} attempts: {e}")
+                await self._backoff(attempt, deadline, getattr(e, "retry_after", None))
+                attempt += 1
+
+    async def _complete_once(self, payload: dict, timeout: float) -> dict:
+        response = await self.client.post("/chat/completions", json=payload, timeout=timeout)
+        self._check_status(response)
+        return response.json()
+
+    async def complete(self, payload: dict, deadline: Optional[float] = None) -> dict:
+        """Blocking chat completion; `deadline` is a time.monotonic() timestamp"""
+        deadline = self._deadline(deadline)
+        try:
+            async with self.semaphore:
+                if not self.hedge_after:
+                    return await self._with_retries(lambda t: self._complete_once(payload, t), deadline)
+
+                primary = asyncio.ensure_future(self._with_retries(lambda t: self._complete_once(payload, t), deadline))
+                try:
+                    done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+                    if done:
+                        return primary.result()
+
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(self._with_retries(lambda t: self._complete_once(payload, t), deadline))
+                    return await self._first_success(primary, hedge)
+                finally:
+                    # asyncio.wait does not cancel what it waits on, so a cancelled caller must
+                    primary.cancel()
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def _first_success(self, primary: asyncio.Future, hedge: asyncio.Future) -> dict:
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, payload: dict, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield completion tokens; only failures before the first token are retried"""
+        import httpx
+
+        deadline = self._deadline(deadline)
+        payload = {**payload, "stream": True}
+        async with self.semaphore:
+            attempt = 0
+            started = False
+            while True:
+                try:
+                    self.requests += 1
+                    timeout = self._attempt_timeout(deadline)
+                    async with self.client.stream("POST", "/chat/completions", json=payload, timeout=timeout) as response:
+                        if response.status_code >= 400:
+                            await response.aread()
+                        self._check_status(response)
+                        async for line in response.aiter_lines():
+                            if time.monotonic() > deadline:
+                                raise Exception("LLM request deadline exceeded")
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                return
+                            choices = json.loads(data).get("choices") or []
+                            token = choices[0].get("delta", {}).get("content") if choices else None
+                            if token:
+                                started = True
+                                yield token
+                    return
+                except (RetryableError, httpx.TransportError) as e:
+                    if started or attempt >= self.max_retries:
+                        self.failures += 1
+                        raise Exception(f"LLM stream failed after {attempt + 1} attempts: {e}")
+                    try:
+                        await self._backoff(attempt, deadline, getattr(e, "retry_after", None))
+                    except Exception:
+                        self.failures += 1
+                        raise
+                    attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "max_concurrency": self.max_concurrency
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
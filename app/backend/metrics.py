@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; wide enough for a cached answer (~1 ms) and a whole-document embed
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}_total{_format_labels(self.labels, key)} {_format_value(value)}"
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, in Prometheus' layout"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # label values -> per-bucket counts + [sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, list(counts)) for key, counts in self._series.items())
+        for key, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+class MetricsRegistry:
+    """The process' metrics, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """Every metric, plus `extra` (name, type, help, value) samples of counters kept elsewhere"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, kind, help, value in extra:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{'_total' if kind == 'counter' else ''} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Queries and ingestion share stage names (embed, index) at very different scales, hence the pipeline label
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Time spent in each stage of the query, batch or ingest pipeline", ("pipeline", "stage")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "rag_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+QUERIES = REGISTRY.counter(
+    "rag_queries", "Answered questions by endpoint and outcome (success, cached, gated, error)", ("endpoint", "outcome")
+)
+TOKENS_SENT = REGISTRY.counter("rag_llm_prompt_tokens", "Prompt tokens sent to the LLM")
+DOCUMENTS = REGISTRY.counter("rag_ingested_documents", "Ingested documents by outcome", ("status",))
+PAGES = REGISTRY.counter("rag_ingested_pages", "Pages parsed during ingestion")
+CHUNKS = REGISTRY.counter("rag_ingested_chunks", "Chunks embedded and indexed during ingestion")
+
+def observe_stage(stage: str, seconds: float, timings: Optional["Timings"] = None, pipeline: str = "query"):
+    """Record a stage duration measured elsewhere, e.g. in an ingestion worker process"""
+    if timings is not None:
+        pipeline = timings.pipeline
+        timings.add(stage, seconds)
+    STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage)
+
+def query_outcome(response: dict) -> str:
+    if response.get("status") != "success":
+        return "error"
+    if response.get("cached"):
+        return "cached"
+    if response.get("gated"):
+        return "gated"
+    return "success"
+
+class Timings:
+    """Stage durations of one request or ingestion, also recorded in the stage histogram.
+
+    A stage run several times (one per page range, say) accumulates.
+    `pipeline` is "query", "batch" or "ingest".
+    """
+
+    def __init__(self, pipeline: str = "query"):
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            observe_stage(stage, time.perf_counter() - start, self)
+
+    def as_dict(self) -> dict:
+        """Milliseconds per stage plus the total since the Timings was created"""
+        timings = {f"{stage}_ms": round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+        timings["total_ms"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return timings
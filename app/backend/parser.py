@@ -0,0 +1,39 @@
+from typing import Iterator, Optional, Tuple
+
+class PDFParser:
+    # Bump whenever extraction output changes so cached text is not reused
+    VERSION = "1"
+
+    @staticmethod
+    def page_count(pdf_path: str) -> int:
+        """Number of pages, without extracting any text"""
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+
+    @staticmethod
+    def iter_pages(pdf_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, preprocessed text) for non-empty pages in [start, end)"""
+        import fitz  # PyMuPDF
+
+        try:
+            with fitz.open(pdf_path) as doc:
+                end = doc.page_count if end is None else min(end, doc.page_count)
+                for page_num in range(start, end):
+                    page_text = doc[page_num].get_text()
+
+                    # Basic preprocessing
+                    page_text = page_text.replace('\n\n', '\n')
+                    page_text = page_text.strip()
+
+                    if page_text:
+                        yield page_num, page_text
+
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+
+    @staticmethod
+    def extract_text_from_pdf(pdf_path: str, start: int = 0, end: Optional[int] = None) -> str:
+        """Extract text from PDF using PyMuPDF"""
+        return "\n\n".join(text for _, text in PDFParser.iter_pages(pdf_path, start, end))
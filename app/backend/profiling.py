@@ -0,0 +1,293 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+PROFILE_MODES = ("sample", "cprofile", "memory")
+
+# Innermost frames of threads parked waiting for work, left out of stack samples
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_REPORT_NAME_RE = re.compile(r"^[\w.-]+$")
+
+class CaptureRunning(Exception):
+    pass
+
+class Capture:
+    """One profiling run: what is being recorded, when it stops and what it has collected"""
+
+    def __init__(self, mode: str, report_dir: str, requests: Optional[int], seconds: float, interval_ms: float):
+        self.mode = mode
+        self.report_dir = report_dir
+        self.requests = requests
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{mode}"
+        self.started_at = time.time()
+        self.requests_seen = 0
+        self.profiles: List[cProfile.Profile] = []
+        self.samples = Counter()
+        self.sample_count = 0
+        self.ingestions = []  # (filename, peak MB, overlapped another ingestion) per tracked ingestion
+        self.active_ingestions = 0
+        self.shared_peak = False  # an ingestion started while another was running
+        self.report: Optional[str] = None
+        self.sampler: Optional[threading.Thread] = None
+        self.owns_tracemalloc = False
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+
+    def status(self) -> dict:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "status": "finished" if self.stopped.is_set() else "running",
+            "started_at": self.started_at,
+            "requests": self.requests,
+            "seconds": self.seconds,
+            "requests_seen": self.requests_seen,
+            "samples": self.sample_count,
+            "report": self.report
+        }
+
+class Profiler:
+    """On-demand profiling of this process, one capture at a time.
+
+    sample    a background thread records the stacks of every thread each
+              interval_ms; the report is collapsed stacks for flamegraph tools
+    cprofile  deterministic profiling of the event loop thread and of the
+              functions passed through `wrap`; the report is a pstats file
+    memory    tracemalloc from start to stop, with the peak of every
+              ingestion run under `track_ingestion`; the report is text.
+              tracemalloc only sees this process, so ingestion keeps its
+              work in threads here while the capture runs (`tracing_memory`)
+
+    A capture stops after `requests` requests (ingestions in memory mode) or
+    `seconds`, whichever comes first. While none runs, `wrap` returns its
+    argument and the hooks are a single attribute check.
+    """
+
+    def __init__(self):
+        self.capture: Optional[Capture] = None
+        self.last: Optional[Capture] = None
+        self._loop_profile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+
+    def start(self, mode: str, report_dir: str, requests: Optional[int] = None, seconds: float = 30.0,
+              interval_ms: float = 5.0) -> dict:
+        """Begin a capture; call from the event loop thread, which cprofile mode then profiles"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {', '.join(PROFILE_MODES)}")
+        if requests is not None and requests < 1:
+            raise ValueError("requests must be at least 1")
+        if seconds <= 0 or interval_ms <= 0:
+            raise ValueError("seconds and interval_ms must be positive")
+
+        with self._lock:
+            if self.capture is not None:
+                raise CaptureRunning(f"Capture {self.capture.id} is still running")
+            capture = Capture(mode, report_dir, requests, seconds, interval_ms)
+            os.makedirs(report_dir, exist_ok=True)
+            if mode == "sample":
+                capture.sampler = threading.Thread(target=self._sample, args=(capture,), name="profiler-sampler", daemon=True)
+                capture.sampler.start()
+            elif mode == "cprofile":
+                self._loop_profile = cProfile.Profile()
+                self._loop_profile.enable()
+            elif not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                capture.owns_tracemalloc = True
+            self.capture = capture
+
+        try:
+            asyncio.get_running_loop().call_later(seconds, self.stop, capture.id)
+        except RuntimeError:
+            timer = threading.Timer(seconds, self.stop, args=(capture.id,))
+            timer.daemon = True
+            timer.start()
+        return capture.status()
+
+    def stop(self, capture_id: Optional[str] = None) -> Optional[dict]:
+        """End the running capture (only if it is `capture_id`, when given) and write its report.
+
+        Call from the thread that started it: a cProfile profiler can only be
+        detached from its own thread.
+        """
+        with self._lock:
+            capture = self.capture
+            if capture is None or (capture_id is not None and capture.id != capture_id):
+                return None
+            self.capture = None
+            capture.stopped.set()
+            loop_profile, self._loop_profile = self._loop_profile, None
+            if loop_profile is not None:
+                loop_profile.disable()
+
+        if capture.mode == "sample":
+            capture.sampler.join()
+            capture.report = self._write_collapsed(capture)
+        elif capture.mode == "cprofile":
+            capture.report = self._write_pstats(capture, loop_profile)
+        else:
+            capture.report = self._write_memory(capture)
+        self.last = capture
+        return capture.status()
+
+    def status(self) -> Optional[dict]:
+        capture = self.capture or self.last
+        return capture.status() if capture else None
+
+    @property
+    def tracing_memory(self) -> bool:
+        """Whether a memory capture is running, so work it should see must stay in this process"""
+        capture = self.capture
+        return capture is not None and capture.mode == "memory"
+
+    def request_done(self):
+        """Count a finished request towards the running capture's limit"""
+        capture = self.capture
+        if capture is None or capture.mode == "memory":
+            return
+        with capture.lock:
+            capture.requests_seen += 1
+            done = capture.requests is not None and capture.requests_seen >= capture.requests
+        if done:
+            self.stop(capture.id)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """fn, profiled in whatever thread it runs in while a cprofile capture is running"""
+        capture = self.capture
+        if capture is None or capture.mode != "cprofile":
+            return fn
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with capture.lock:
+                    capture.profiles.append(profile)
+        return profiled
+
+    @contextmanager
+    def track_ingestion(self, filename: str):
+        """Record the traced memory peak of one ingestion while a memory capture is running.
+
+        The peak is process-wide, so ingestions that overlap are flagged as
+        sharing theirs rather than resetting each other's.
+        """
+        capture = self.capture
+        if capture is None or capture.mode != "memory":
+            yield
+            return
+        with capture.lock:
+            if capture.active_ingestions:
+                capture.shared_peak = True
+            else:
+                tracemalloc.reset_peak()
+            capture.active_ingestions += 1
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            with capture.lock:
+                capture.ingestions.append((filename, round(peak / (1024 * 1024), 2), capture.shared_peak))
+                capture.active_ingestions -= 1
+                if not capture.active_ingestions:
+                    capture.shared_peak = False
+                capture.requests_seen += 1
+                done = capture.requests is not None and capture.requests_seen >= capture.requests
+            if done:
+                self.stop(capture.id)
+
+    def _sample(self, capture: Capture):
+        own_id = threading.get_ident()
+        while not capture.stopped.wait(capture.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                capture.samples[";".join(reversed(stack))] += 1
+            capture.sample_count += 1
+
+    @staticmethod
+    def _write_collapsed(capture: Capture) -> str:
+        name = f"{capture.id}.collapsed"
+        with open(os.path.join(capture.report_dir, name), "w") as f:
+            for stack, count in capture.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return name
+
+    @staticmethod
+    def _write_pstats(capture: Capture, loop_profile: cProfile.Profile) -> str:
+        name = f"{capture.id}.pstats"
+        stats = pstats.Stats(loop_profile)
+        with capture.lock:
+            for profile in capture.profiles:
+                stats.add(profile)
+        stats.dump_stats(os.path.join(capture.report_dir, name))
+        return name
+
+    @staticmethod
+    def _write_memory(capture: Capture, top: int = 50) -> str:
+        name = f"{capture.id}.txt"
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if capture.owns_tracemalloc:
+            tracemalloc.stop()
+
+        out = io.StringIO()
+        out.write(f"traced memory: {current / (1024 * 1024):.1f} MB now, {peak / (1024 * 1024):.1f} MB peak\n")
+        out.write("ingestions ran in this process's threads during the capture, so parsing, chunking and embedding are traced\n")
+        for filename, peak_mb, overlapped in capture.ingestions:
+            shared = "  (overlapped other ingestions; the peak covers all of them)" if overlapped else ""
+            out.write(f"ingestion peak: {peak_mb:.1f} MB  {filename}{shared}\n")
+        out.write(f"\ntop {top} allocation sites still held:\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            out.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8} blocks  {stat.traceback}\n")
+        with open(os.path.join(capture.report_dir, name), "w") as f:
+            f.write(out.getvalue())
+        return name
+
+def report_path(report_dir: str, name: str) -> Optional[str]:
+    """Path of a stored report, or None for unknown or unsafe names"""
+    if not _REPORT_NAME_RE.match(name):
+        return None
+    path = os.path.join(report_dir, name)
+    return path if os.path.isfile(path) else None
+
+def list_reports(report_dir: str) -> List[dict]:
+    if not os.path.isdir(report_dir):
+        return []
+    reports = []
+    for name in sorted(os.listdir(report_dir), reverse=True):
+        path = os.path.join(report_dir, name)
+        reports.append({"name": name, "bytes": os.path.getsize(path), "created_at": os.path.getmtime(path)})
+    return reports
+
+# Profiling state is per process, like the metrics registry
+PROFILER = Profiler()
@@ -0,0 +1,771 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+
+from .answer_cache import AnswerCache
+from .batcher import QueryBatcher
+from .cache import IngestCache
+from .chunker import ChunkBatch, PageChunker
+from .config import Config
+from .context import ContextPacker
+from .corpus import CORPUS_ID, CorpusIndex
+from .embedder import Embedder
+from .index_factory import rebuild_vector_store
+from .jobs import JobProgress, JobStore
+from .ingest import IndexBuilder, IngestionPool, embed_chunks, embed_parallel, extract_and_chunk, page_ranges
+from .llm import SYSTEM_PROMPT, LLMInterface
+from .metrics import CHUNKS, DOCUMENTS, PAGES, QUERIES, TOKENS_SENT, Timings, observe_stage, query_outcome
+from .parser import PDFParser
+from .profiling import PROFILER
+from .registry import IndexRegistry
+from .relevance import NO_ANSWER, RelevanceGate, calibrate
+from .retriever import Retriever, batch_similarity_search
+from .storage import SharedPointer
+
+if TYPE_CHECKING:
+    from fastapi import UploadFile
+    from langchain.docstore.document import Document
+    from langchain.vectorstores import FAISS
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+class RAGApplication:
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.pdf_parser = PDFParser()
+        self.chunker = PageChunker(
+            chunk_size=self.config.CHUNK_SIZE,
+            chunk_overlap=self.config.CHUNK_OVERLAP
+        )
+        self.embedder = Embedder(
+            self.config.EMBEDDING_MODEL,
+            backend=self.config.EMBEDDING_BACKEND,
+            threads=self.config.EMBEDDING_THREADS,
+            cache_dir=os.path.join(self.config.CACHE_PATH, "onnx"),
+            batch_tokens=self.config.EMBEDDING_BATCH_TOKENS,
+            max_batch=self.config.EMBEDDING_MAX_BATCH
+        )
+        self.llm = LLMInterface(
+            self.config.GROQ_API_KEY,
+            self.config.MODEL_NAME,
+            self.config.LLM_BASE_URL,
+            max_concurrency=self.config.LLM_MAX_CONCURRENCY,
+            timeout_s=self.config.LLM_TIMEOUT_S,
+            max_retries=self.config.LLM_MAX_RETRIES,
+            hedge_after_s=self.config.LLM_HEDGE_AFTER_S
+        )
+        self.ingestion_pool = IngestionPool(
+            executor=self.config.INGEST_EXECUTOR,
+            max_workers=self.config.INGEST_WORKERS,
+            max_concurrent=self.config.INGEST_MAX_CONCURRENT
+        )
+        self.ingest_cache = IngestCache(
+            os.path.join(self.config.CACHE_PATH, "ingest_cache.sqlite"),
+            max_mb=self.config.INGEST_CACHE_MAX_MB
+        ) if self.config.INGEST_CACHE_ENABLED else None
+        self.query_batcher = QueryBatcher(
+            self.embedder,
+            max_batch_size=self.config.QUERY_BATCH_SIZE,
+            max_wait_ms=self.config.QUERY_BATCH_WINDOW_MS
+        ) if self.config.QUERY_BATCHING_ENABLED else None
+        self.registry = IndexRegistry(
+            os.path.join(self.config.VECTOR_STORE_PATH, "documents"),
+            self.embedder,
+            memory_budget_mb=self.config.INDEX_MEMORY_BUDGET_MB
+        )
+        self.corpus = CorpusIndex(
+            os.path.join(self.config.VECTOR_STORE_PATH, "corpus"),
+            self.embedder,
+            compact_ratio=self.config.CORPUS_COMPACT_RATIO
+        )
+        self.answer_cache = AnswerCache(
+            max_entries=self.config.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=self.config.ANSWER_CACHE_TTL_S,
+            similarity_threshold=self.config.ANSWER_CACHE_SIMILARITY
+        ) if self.config.ANSWER_CACHE_ENABLED else None
+        self.context_packer = ContextPacker(
+            token_budget=self.config.CONTEXT_TOKEN_BUDGET,
+            max_overlap=2 * self.config.CHUNK_OVERLAP,
+            duplicate_threshold=self.config.CONTEXT_DUPLICATE_THRESHOLD
+        )
+        self.relevance_gate = RelevanceGate() if self.config.RELEVANCE_GATE_ENABLED else None
+        self._corpus_calibrating = False
+        self._calibration_lock = threading.Lock()
+        self.jobs = JobStore(os.path.join(self.config.CACHE_PATH, "jobs"), ttl_seconds=self.config.JOB_TTL_S)
+        self._job_tasks = set()
+        # Shared with the other workers serving the same data directory
+        self._current = SharedPointer(os.path.join(self.config.VECTOR_STORE_PATH, "current.json"))
+
+    @property
+    def current_document_id(self) -> Optional[str]:
+        return (self._current.read() or {}).get("document_id")
+
+    @property
+    def current_pdf_name(self) -> Optional[str]:
+        return (self._current.read() or {}).get("filename")
+
+    def _set_current(self, document_id: Optional[str], filename: Optional[str]):
+        """Make a document the default for queries that do not name one"""
+        self._current.write({"document_id": document_id, "filename": filename})
+
+    async def save_upload(self, pdf_file: "UploadFile") -> Tuple[str, str]:
+        """Write an uploaded PDF to the upload directory, returning its path and content hash"""
+        pdf_path = os.path.join(self.config.UPLOAD_PATH, os.path.basename(pdf_file.filename))
+        document_id = await asyncio.to_thread(self._copy_upload, pdf_file.file, pdf_path)
+        return pdf_path, document_id
+
+    def _copy_upload(self, source, pdf_path: str) -> str:
+        """Copy an upload to disk one chunk at a time, hashing it on the way.
+
+        Memory use stays at one chunk whatever the file size, and an upload
+        is rejected as soon as it crosses MAX_UPLOAD_MB. The file is written
+        under a temporary name and renamed, so a concurrent upload of the
+        same name never sees a partial file.
+        """
+        limit = int(self.config.MAX_UPLOAD_MB * 1024 * 1024)
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = f"{pdf_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in iter(lambda: source.read(UPLOAD_CHUNK_BYTES), b""):
+                    size += len(block)
+                    if size > limit:
+                        raise UploadTooLarge(f"File exceeds the {self.config.MAX_UPLOAD_MB:g} MB upload limit")
+                    digest.update(block)
+                    f.write(block)
+            os.replace(tmp_path, pdf_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest.hexdigest()
+
+    async def process_pdf(self, pdf_file: "UploadFile") -> dict:
+        """Save and ingest an uploaded PDF, returning once it is indexed"""
+        try:
+            pdf_path, document_id = await self.save_upload(pdf_file)
+        except UploadTooLarge:
+            raise
+        except Exception as e:
+            return {"status": "error", "message": f"Error processing PDF: {str(e)}"}
+        return await self.ingest_pdf(pdf_path, pdf_file.filename, document_id)
+
+    async def submit_pdf(self, pdf_file: "UploadFile") -> dict:
+        """Save an uploaded PDF and ingest it in the background, returning the new job"""
+        pdf_path, document_id = await self.save_upload(pdf_file)
+        filename = pdf_file.filename
+        job = self.jobs.create(filename)
+        progress = JobProgress(self.jobs, job["job_id"])
+
+        async def run():
+            # The record must not stay "running" when the task dies outside ingest_pdf's own error handling
+            try:
+                result = await self.ingest_pdf(pdf_path, filename, document_id, progress)
+            except asyncio.CancelledError:
+                progress.finish({"status": "cancelled", "message": f"Processing of '{filename}' was cancelled"})
+                raise
+            except BaseException as e:
+                progress.finish({"status": "error", "message": f"Error processing PDF: {str(e)}"})
+                raise
+            progress.finish(result)
+
+        # Keep a reference so the task is not garbage collected while it runs
+        task = asyncio.ensure_future(run())
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+        return job
+
+    async def cancel_jobs(self):
+        """Cancel the ingestion jobs this process is running, marking them cancelled"""
+        tasks = list(self._job_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def ingest_pdf(self, pdf_path: str, filename: str, document_id: str,
+                         progress: Optional[JobProgress] = None) -> dict:
+        """Extract, chunk, embed and index a saved PDF, reporting each stage to `progress`"""
+        with PROFILER.track_ingestion(filename):
+            return await self._ingest_pdf(pdf_path, filename, document_id, progress)
+
+    async def _ingest_pdf(self, pdf_path: str, filename: str, document_id: str,
+                          progress: Optional[JobProgress] = None) -> dict:
+        progress = progress or JobProgress()
+        timings = Timings("ingest")
+        try:
+            # Same content was ingested before: reuse its index instead of re-embedding
+            metadata = self.registry.metadata(document_id)
+            if metadata and metadata.get("embedding", self.config.EMBEDDING_MODEL) == self.embedder.identity:
+                self._set_current(document_id, filename)
+                return {
+                    "status": "success",
+                    "message": f"PDF '{filename}' was already processed",
+                    "document_id": document_id,
+                    "chunks_created": metadata.get("chunks", 0),
+                    "text_length": metadata.get("text_length", 0),
+                    "cached": True
+                }
+
+            # Extract, chunk and embed page ranges off the event loop, growing the index as they finish
+            async with self.ingestion_pool.document_slot():
+                progress.stage("extracting")
+                started = time.monotonic()
+                builder = IndexBuilder(self.embedder, filename)
+                text_length = 0
+                last_publish = time.monotonic()
+                async for range_length, chunks, vectors in self._ingest_ranges(pdf_path, document_id, progress, timings):
+                    text_length += range_length
+                    with timings.span("index"):
+                        await asyncio.to_thread(PROFILER.wrap(builder.add), chunks, vectors)
+
+                    # Make what has been ingested so far queryable by id in this worker. The shared
+                    # default only moves once the index is registered, as other workers cannot see it before
+                    if builder.vector_store is not None and time.monotonic() - last_publish >= self.config.INGEST_PUBLISH_INTERVAL_S:
+                        self.registry.publish(document_id, await asyncio.to_thread(builder.snapshot))
+                        last_publish = time.monotonic()
+
+            if builder.vector_store is None:
+                raise Exception("No text found in PDF")
+            ingest_seconds = time.monotonic() - started
+            self.ingestion_pool.record(builder.chunk_count, ingest_seconds)
+
+            # Register the finished index under the content hash
+            progress.stage("indexing")
+            metadata = {
+                "filename": filename,
+                "chunks": builder.chunk_count,
+                "text_length": text_length,
+                "embedding": self.embedder.identity
+            }
+            with timings.span("index"):
+                await asyncio.to_thread(PROFILER.wrap(self._register_index), document_id, builder.vector_store, metadata)
+
+            self._set_current(document_id, filename)
+            DOCUMENTS.inc(status="success")
+            PAGES.inc(progress.pages_total)
+            CHUNKS.inc(builder.chunk_count)
+
+            return {
+                "status": "success",
+                "message": f"PDF '{filename}' processed successfully",
+                "document_id": document_id,
+                "chunks_created": builder.chunk_count,
+                "text_length": text_length,
+                "chunks_per_second": round(builder.chunk_count / ingest_seconds, 1) if ingest_seconds else 0.0,
+                "timings": timings.as_dict(),
+                "cached": False
+            }
+
+        except asyncio.CancelledError:
+            self.registry.withdraw(document_id)
+            raise
+        except Exception as e:
+            self.registry.withdraw(document_id)
+            DOCUMENTS.inc(status="error")
+            return {
+                "status": "error",
+                "message": f"Error processing PDF: {str(e)}"
+            }
+
+    async def _ingest_ranges(self, pdf_path: str, document_id: str, progress: JobProgress,
+                             timings: Timings) -> AsyncIterator[Tuple[int, ChunkBatch, List[List[float]]]]:
+        """Ingest page ranges in the pool, yielding results in page order with a bounded number in flight"""
+        page_count = await asyncio.to_thread(PDFParser.page_count, pdf_path)
+        progress.pages(page_count)
+        in_flight = deque()
+        try:
+            for start, end in page_ranges(page_count, self.config.INGEST_PAGES_PER_TASK):
+                in_flight.append(asyncio.ensure_future(self._ingest_range(pdf_path, document_id, start, end, progress, timings)))
+                if len(in_flight) >= self.ingestion_pool.max_workers:
+                    yield await in_flight.popleft()
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def _ingest_range(self, pdf_path: str, document_id: str, start: int, end: int,
+                            progress: JobProgress, timings: Timings) -> Tuple[int, ChunkBatch, List[List[float]]]:
+        # A memory capture only traces this process, so keep the work here while one runs
+        in_process = PROFILER.tracing_memory
+        text_length, chunks, stage_seconds = await self.ingestion_pool.run(
+            extract_and_chunk, pdf_path, document_id, start, end, self.config.CHUNK_SIZE,
+            self.config.CHUNK_OVERLAP, self.ingest_cache, in_process=in_process
+        )
+        for stage, seconds in stage_seconds.items():
+            observe_stage(stage, seconds, timings)
+        progress.parsed(end - start, len(chunks.texts))
+        with timings.span("embed"):
+            if self.ingestion_pool.uses_processes and not in_process:
+                # Spread the range's chunks over every worker rather than embedding them where they were parsed
+                vectors = await embed_parallel(
+                    self.ingestion_pool, self._worker_embedding, chunks.texts, self.ingest_cache, self.config.INGEST_EMBED_TASK_CHUNKS
+                )
+            else:
+                vectors = await self.ingestion_pool.run(
+                    embed_chunks, self.embedder, chunks.texts, self.ingest_cache, in_process=in_process
+                )
+        progress.embedded(len(chunks.texts))
+        return text_length, chunks, vectors
+
+    @property
+    def _worker_embedding(self) -> tuple:
+        """Embedder.spec for pool workers, splitting the cores between them unless EMBEDDING_THREADS is set"""
+        model_name, backend, threads, *rest = self.embedder.spec
+        threads = threads or max(1, (os.cpu_count() or 1) // self.ingestion_pool.max_workers)
+        return (model_name, backend, threads, *rest)
+
+    def _register_index(self, document_id: str, vector_store: "FAISS", metadata: dict):
+        """Persist a finished index in the registry and drop answers cached for older versions"""
+        # Ingestion grows a flat index; swap in the configured ANN type now that every vector is known
+        index_type = rebuild_vector_store(
+            vector_store,
+            index_type=self.config.INDEX_TYPE,
+            storage=self.config.INDEX_STORAGE,
+            hnsw_m=self.config.HNSW_M,
+            ef_search=self.config.HNSW_EF_SEARCH,
+            nprobe=self.config.IVF_NPROBE
+        )
+        metadata = {**metadata, "index_type": index_type or "flat", "index_storage": self.config.INDEX_STORAGE if index_type else "float32"}
+        self.registry.register(document_id, vector_store, metadata)
+        if self.relevance_gate:
+            self.calibrate_relevance(document_id)
+        if self.answer_cache:
+            self.answer_cache.invalidate(document_id)
+
+    def add_to_corpus(self, document_id: str) -> int:
+        """Append an ingested document to the shared corpus index.
+
+        Chunk vectors come from the ingest cache, so nothing is re-embedded
+        unless the cache is disabled or has evicted them.
+        """
+        vector_store = self.registry.get(document_id)
+        if vector_store is None:
+            raise Exception(f"Unknown document id '{document_id}'")
+
+        docs = list(vector_store.iter_documents())
+        chunks = [doc.page_content for doc in docs]
+        vectors = embed_chunks(self.embedder, chunks, self.ingest_cache)
+        # The corpus calibration is now stale; the next gated corpus query recalibrates it
+        added = self.corpus.add_document(document_id, chunks, vectors, [doc.metadata for doc in docs])
+        if self.answer_cache:
+            self.answer_cache.invalidate(CORPUS_ID)
+        return added
+
+    def calibrate_relevance(self, document_id: str) -> dict:
+        """Calibrate and store the relevance-gate threshold of a document or the corpus.
+
+        A corpus calibration records the corpus version it was taken at, so it
+        is known to be stale once documents are added or removed.
+        """
+        vector_store = self._vector_store(document_id)
+        if vector_store is None:
+            raise Exception(f"Unknown document id '{document_id}'")
+        version = self.corpus.version
+        chunks = [doc.page_content for doc in vector_store.iter_documents()]
+
+        def search_best(vectors):
+            return [hits[0][1] if hits else None for hits in batch_similarity_search(vector_store, vectors, 1)]
+
+        calibration = calibrate(chunks, self.embedder.embed_documents, search_best, self.config.RELEVANCE_CALIBRATION_SAMPLES)
+        if document_id == CORPUS_ID:
+            calibration = {**calibration, "corpus_version": version}
+            self.corpus.relevance = calibration
+        else:
+            self.registry.update_metadata(document_id, relevance=calibration)
+        return calibration
+
+    def _recalibrate_corpus(self):
+        """Recalibrate the corpus in a background thread, unless a recalibration is already running"""
+        with self._calibration_lock:
+            if self._corpus_calibrating:
+                return
+            self._corpus_calibrating = True
+
+        def run():
+            try:
+                # Another worker sharing the corpus may have recalibrated it already
+                if (self.corpus.relevance or {}).get("corpus_version") != self.corpus.version:
+                    self.calibrate_relevance(CORPUS_ID)
+            except Exception as e:
+                print(f"Warning: could not calibrate the corpus relevance gate: {e}")
+            finally:
+                self._corpus_calibrating = False
+
+        threading.Thread(target=run, name="corpus-calibration", daemon=True).start()
+
+    def _relevance_threshold(self, document_id: str) -> Optional[float]:
+        if document_id == CORPUS_ID:
+            calibration = self.corpus.relevance
+            # Until the recalibration lands, the previous threshold (or the default) keeps gating
+            if (calibration or {}).get("corpus_version") != self.corpus.version:
+                self._recalibrate_corpus()
+        else:
+            calibration = (self.registry.metadata(document_id) or {}).get("relevance")
+        threshold = (calibration or {}).get("threshold")
+        return threshold if threshold is not None else self.config.RELEVANCE_THRESHOLD
+
+    def remove_document(self, document_id: str) -> dict:
+        """Remove a document from the corpus and delete its stored index"""
+        removed_chunks = self.corpus.remove_document(document_id)
+        deleted = self.registry.delete(document_id)
+        if not removed_chunks and not deleted:
+            return {"status": "error", "message": f"Unknown document id '{document_id}'"}
+
+        if self.answer_cache:
+            self.answer_cache.invalidate(document_id)
+            self.answer_cache.invalidate(CORPUS_ID)
+        if self.current_document_id == document_id:
+            self._set_current(None, None)
+        return {
+            "status": "success",
+            "message": f"Document '{document_id}' removed",
+            "chunks_removed": removed_chunks
+        }
+
+    def _vector_store(self, document_id: str):
+        """The shared corpus or a single document's index"""
+        if document_id == CORPUS_ID:
+            return self.corpus if self.corpus.stats()["chunks"] else None
+        return self.registry.get(document_id)
+
+    def _index_version(self, document_id: str) -> int:
+        if document_id == CORPUS_ID:
+            return self.corpus.version
+        return self.registry.version(document_id)
+
+    def _resolve_document(self, document_id: Optional[str]) -> dict:
+        """The document a query targets and its index, or an error response"""
+        document_id = document_id or self.current_document_id
+        if not document_id:
+            return {"error": {
+                "status": "error",
+                "message": "No document has been processed yet. Please upload a PDF first."
+            }}
+
+        vector_store = self._vector_store(document_id)
+        if vector_store is None:
+            return {"error": {
+                "status": "error",
+                "message": f"Unknown document id '{document_id}'. Please upload the PDF first."
+            }}
+        return {"document_id": document_id, "vector_store": vector_store}
+
+    def _prepare_query(self, question: str, document_id: Optional[str] = None, timings: Optional[Timings] = None) -> dict:
+        """Resolve the document, check the answer cache and retrieve chunks.
+
+        Returns a dict with exactly one of "error", "response" (a ready answer
+        from the cache or the relevance gate) or "docs" set, plus
+        the resolved document id, cache scope and question vector.
+        """
+        timings = timings or Timings()
+        resolved = self._resolve_document(document_id)
+        if "error" in resolved:
+            return resolved
+        document_id, vector_store = resolved["document_id"], resolved["vector_store"]
+
+        retriever = Retriever(vector_store, self.embedder.embeddings, self.query_batcher)
+        scope = (document_id, self._index_version(document_id))
+        retrieval = None
+
+        def embed_and_retrieve() -> List[float]:
+            # One trip through the query batcher yields both the vector and the chunks
+            nonlocal retrieval
+            retrieval = retriever.embed_and_retrieve(question, k=self.config.MAX_RETRIEVED_CHUNKS)
+            observe_stage("embed", retrieval.embed_seconds, timings)
+            observe_stage("retrieve", retrieval.search_seconds, timings)
+            return retrieval.vector
+
+        # Documents still being ingested (version 0) are not cached
+        if self.answer_cache and scope[1] > 0:
+            # The semantic tier needs the question vector; the search done along with it is only
+            # wasted on a semantic hit, which is cheaper than waiting for a second batch on a miss
+            cached, _ = self.answer_cache.get(scope, question, embed_and_retrieve)
+            if cached:
+                return self._cached_response(cached, document_id)
+
+        if retrieval is None:
+            embed_and_retrieve()
+        return self._prepared_from_hits(retrieval.hits, document_id, scope, retrieval.vector)
+
+    def _prepare_batch(self, questions: List[str], document_id: Optional[str] = None,
+                       timings: Optional[Timings] = None) -> List[dict]:
+        """_prepare_query for many questions with one embedding pass and one index search.
+
+        Questions that need the LLM also get their packed "context" and "usage".
+        """
+        timings = timings or Timings()
+        resolved = self._resolve_document(document_id)
+        if "error" in resolved:
+            return [resolved] * len(questions)
+        document_id, vector_store = resolved["document_id"], resolved["vector_store"]
+        scope = (document_id, self._index_version(document_id))
+
+        with timings.span("embed"):
+            vectors = self.embedder.embed_documents(questions)
+        prepared: List[Optional[dict]] = [None] * len(questions)
+        if self.answer_cache and scope[1] > 0:
+            for i, (question, vector) in enumerate(zip(questions, vectors)):
+                cached, _ = self.answer_cache.get(scope, question, lambda vector=vector: vector)
+                if cached:
+                    prepared[i] = self._cached_response(cached, document_id)
+
+        misses = [i for i, entry in enumerate(prepared) if entry is None]
+        with timings.span("retrieve"):
+            results = batch_similarity_search(vector_store, [vectors[i] for i in misses], self.config.MAX_RETRIEVED_CHUNKS)
+        for i, hits in zip(misses, results):
+            entry = self._prepared_from_hits(hits, document_id, scope, vectors[i])
+            if "docs" in entry:
+                with timings.span("context"):
+                    entry["context"], entry["usage"] = self._build_context(entry["docs"], questions[i])
+            prepared[i] = entry
+        return prepared
+
+    @staticmethod
+    def _source_pages(docs: List["Document"]) -> List[int]:
+        """1-based pages the retrieved chunks start on, for indexes built with page provenance"""
+        return sorted({doc.metadata["page"] + 1 for doc in docs if "page" in doc.metadata})
+
+    @staticmethod
+    def _cached_response(cached: dict, document_id: str) -> dict:
+        # A cache hit sends nothing, saving the whole prompt
+        cached = {**cached, "cached": True, "tokens_sent": 0, "tokens_saved": cached.get("tokens_sent", 0)}
+        return {"response": cached, "document_id": document_id}
+
+    def _prepared_from_hits(self, hits: List[Tuple["Document", float]], document_id: str, scope: Tuple[str, int],
+                            vector: Optional[List[float]]) -> dict:
+        if not hits:
+            return {"error": {
+                "status": "error",
+                "message": "No relevant information found in the document."
+            }}
+
+        # Out-of-document questions get the canned answer without an LLM round-trip
+        if self.relevance_gate and not self.relevance_gate.allows(hits[0][1], self._relevance_threshold(document_id)):
+            return {"response": {
+                "status": "success",
+                "answer": NO_ANSWER,
+                "sources": 0,
+                "document": self.document_name(document_id),
+                "document_id": document_id,
+                "tokens_sent": 0,
+                "tokens_saved": 0,
+                "cached": False,
+                "gated": True
+            }, "document_id": document_id}
+        return {"docs": [doc for doc, _ in hits], "document_id": document_id, "scope": scope, "vector": vector}
+
+    def _build_context(self, docs: List["Document"], question: str) -> Tuple[str, dict]:
+        """Pack retrieved chunks into the prompt context and measure the prompt tokens"""
+        packed = self.context_packer.pack(docs)
+        prompt_tokens = self.context_packer.tokenizer.count(SYSTEM_PROMPT) + self.context_packer.tokenizer.count(self.llm.build_prompt(packed.text, question))
+        return packed.text, {
+            "tokens_sent": prompt_tokens,
+            "tokens_saved": packed.naive_tokens - packed.tokens
+        }
+
+    def _remember_answer(self, prepared: dict, question: str, response: dict):
+        if self.answer_cache and prepared["scope"][1] > 0 and not response["answer"].startswith(LLMInterface.ERROR_PREFIX):
+            self.answer_cache.put(prepared["scope"], question, response, prepared["vector"])
+
+    def document_name(self, document_id: Optional[str] = None) -> Optional[str]:
+        """Original filename of a registered document"""
+        if not document_id or document_id == self.current_document_id:
+            return self.current_pdf_name
+        if document_id == CORPUS_ID:
+            return "All documents"
+        metadata = self.registry.metadata(document_id)
+        return metadata.get("filename") if metadata else None
+
+    async def query_document(self, question: str, document_id: Optional[str] = None) -> dict:
+        """Query a processed document, defaulting to the most recent upload"""
+        response = await self._query_document(question, document_id)
+        QUERIES.inc(endpoint="query", outcome=query_outcome(response))
+        return response
+
+    async def _query_document(self, question: str, document_id: Optional[str] = None) -> dict:
+        timings = Timings()
+        try:
+            deadline = time.monotonic() + self.config.LLM_DEADLINE_S
+            # Retrieval and context packing are CPU-bound, so they run off the event loop
+            prepared = await asyncio.to_thread(PROFILER.wrap(self._prepare_query), question, document_id, timings)
+            if "error" in prepared:
+                return prepared["error"]
+            if "response" in prepared:
+                return {**prepared["response"], "timings": timings.as_dict()}
+            retrieved_docs = prepared["docs"]
+
+            # Prepare context
+            with timings.span("context"):
+                context, usage = await asyncio.to_thread(PROFILER.wrap(self._build_context), retrieved_docs, question)
+            TOKENS_SENT.inc(usage["tokens_sent"])
+
+            # Generate answer
+            with timings.span("generate"):
+                answer = await self.llm.agenerate_answer(context, question, deadline)
+
+            response = {
+                "status": "success",
+                "answer": answer,
+                "sources": len(retrieved_docs),
+                "pages": self._source_pages(retrieved_docs),
+                "document": self.document_name(prepared["document_id"]),
+                "document_id": prepared["document_id"],
+                **usage
+            }
+            self._remember_answer(prepared, question, response)
+            return {**response, "timings": timings.as_dict(), "cached": False}
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error querying document: {str(e)}"
+            }
+
+    async def stream_query(self, question: str, document_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Query a processed document, yielding answer tokens as events; the final "done" event carries the timings"""
+        timings = Timings()
+        try:
+            deadline = time.monotonic() + self.config.LLM_DEADLINE_S
+            prepared = await asyncio.to_thread(PROFILER.wrap(self._prepare_query), question, document_id, timings)
+            if "error" in prepared:
+                QUERIES.inc(endpoint="stream", outcome="error")
+                yield {"event": "error", **prepared["error"]}
+                return
+            if "response" in prepared:
+                ready = prepared["response"]
+                QUERIES.inc(endpoint="stream", outcome=query_outcome(ready))
+                yield {"event": "start", **{k: v for k, v in ready.items() if k != "answer"}}
+                yield {"event": "token", "content": ready["answer"]}
+                yield {"event": "done", "status": "success", "timings": timings.as_dict()}
+                return
+            retrieved_docs = prepared["docs"]
+            with timings.span("context"):
+                context, usage = await asyncio.to_thread(PROFILER.wrap(self._build_context), retrieved_docs, question)
+            TOKENS_SENT.inc(usage["tokens_sent"])
+
+            response = {
+                "status": "success",
+                "sources": len(retrieved_docs),
+                "pages": self._source_pages(retrieved_docs),
+                "document": self.document_name(prepared["document_id"]),
+                "document_id": prepared["document_id"],
+                **usage
+            }
+            yield {"event": "start", **response, "cached": False}
+
+            tokens = []
+            with timings.span("generate"):
+                async for token in self.llm.astream_answer(context, question, deadline):
+                    if not tokens:
+                        timings.add("first_token", time.perf_counter() - timings.started)
+                    tokens.append(token)
+                    yield {"event": "token", "content": token}
+
+            self._remember_answer(prepared, question, {**response, "answer": "".join(tokens).strip()})
+            QUERIES.inc(endpoint="stream", outcome="success")
+            yield {"event": "done", "status": "success", "timings": timings.as_dict()}
+
+        except Exception as e:
+            QUERIES.inc(endpoint="stream", outcome="error")
+            yield {
+                "event": "error",
+                "status": "error",
+                "message": f"Error querying document: {str(e)}"
+            }
+
+    async def query_batch(self, questions: List[str], document_id: Optional[str] = None,
+                          concurrency: Optional[int] = None) -> AsyncIterator[dict]:
+        """Answer many questions about one document, yielding results as they complete.
+
+        All questions are embedded and searched together, repeated questions are
+        answered once, and at most `concurrency` LLM calls run at a time. Each
+        result carries its `index` in `questions`; a final summary reports the
+        throughput.
+        """
+        start = time.monotonic()
+        timings = Timings("batch")
+        semaphore = asyncio.Semaphore(concurrency or self.config.BATCH_QUERY_CONCURRENCY)
+        counts = {"success": 0, "error": 0}
+
+        # Questions that only differ in case or trailing punctuation share one answer
+        positions = {}
+        for i, question in enumerate(questions):
+            positions.setdefault(AnswerCache.normalize(question), []).append(i)
+        unique = [questions[indexes[0]] for indexes in positions.values()]
+
+        async def answer(question: str, prepared: dict) -> dict:
+            if "error" in prepared:
+                return prepared["error"]
+            if "response" in prepared:
+                return prepared["response"]
+
+            async with semaphore:
+                deadline = time.monotonic() + self.config.LLM_DEADLINE_S
+                TOKENS_SENT.inc(prepared["usage"]["tokens_sent"])
+                with timings.span("generate"):
+                    answer = await self.llm.agenerate_answer(prepared["context"], question, deadline)
+            if answer.startswith(LLMInterface.ERROR_PREFIX):
+                return {"status": "error", "message": answer}
+
+            response = {
+                "status": "success",
+                "answer": answer,
+                "sources": len(prepared["docs"]),
+                "pages": self._source_pages(prepared["docs"]),
+                "document": self.document_name(prepared["document_id"]),
+                "document_id": prepared["document_id"],
+                **prepared["usage"]
+            }
+            self._remember_answer(prepared, question, response)
+            return {**response, "cached": False}
+
+        async def answer_group(indexes: List[int], question: str, prepared: dict) -> Tuple[List[int], dict]:
+            try:
+                return indexes, await answer(question, prepared)
+            except Exception as e:
+                return indexes, {"status": "error", "message": f"Error querying document: {str(e)}"}
+
+        tasks = []
+        try:
+            prepared_all = await asyncio.to_thread(PROFILER.wrap(self._prepare_batch), unique, document_id, timings)
+            tasks = [
+                asyncio.ensure_future(answer_group(indexes, question, prepared))
+                for indexes, question, prepared in zip(positions.values(), unique, prepared_all)
+            ]
+            for next_done in asyncio.as_completed(tasks):
+                indexes, result = await next_done
+                for i in indexes:
+                    counts[result["status"]] += 1
+                    QUERIES.inc(endpoint="batch", outcome=query_outcome(result))
+                    yield {"index": i, "question": questions[i], **result}
+
+        except Exception as e:
+            done = counts["success"] + counts["error"]
+            counts["error"] += len(questions) - done
+            yield {"status": "error", "message": f"Error querying document: {str(e)}"}
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.monotonic() - start
+        yield {
+            "summary": True,
+            "questions": len(questions),
+            "unique_questions": len(unique),
+            "succeeded": counts["success"],
+            "failed": counts["error"],
+            "elapsed_s": round(elapsed, 3),
+            "questions_per_second": round(len(questions) / elapsed, 2) if elapsed > 0 else 0.0,
+            "timings": timings.as_dict()  # generate_ms sums the concurrent LLM calls
+        }
@@ -0,0 +1,206 @@
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .chunk_store import MappedVectorStore
+from .index_factory import estimate_index_bytes
+from .storage import SharedPointer, file_lock, write_json_atomic
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+    from .embedder import Embedder
+
+class IndexRegistry:
+    """Per-document FAISS indexes keyed by the SHA-256 of the PDF.
+
+    Every document lives in its own directory under `root`. Each build is
+    written to a fresh `v<version>/` subdirectory as a MappedVectorStore (index
+    plus chunk store), and `meta.json` is then replaced atomically to point at it.
+    Worker processes sharing `root` check that pointer on every lookup and
+    switch to a new version without a restart, while searches that already
+    hold the previous version finish on it. Opened indexes are kept in an LRU
+    that is trimmed to `memory_budget_mb`.
+    """
+
+    META_FILE = "meta.json"
+    LOCK_FILE = ".registry.lock"
+
+    def __init__(self, root: str, embedder: "Embedder", memory_budget_mb: float = 512):
+        self.root = root
+        self.embedder = embedder
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._resident: "OrderedDict[str, tuple]" = OrderedDict()
+        self._resident_bytes = 0
+        self._pointers: Dict[str, SharedPointer] = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def is_valid_id(document_id: str) -> bool:
+        """Document ids are hex SHA-256 digests, which also keeps them safe as directory names"""
+        return bool(re.fullmatch(r"[0-9a-f]{64}", document_id or ""))
+
+    def path(self, document_id: str) -> str:
+        if not self.is_valid_id(document_id):
+            raise ValueError(f"Invalid document id '{document_id}'")
+        return os.path.join(self.root, document_id)
+
+    def contains(self, document_id: str) -> bool:
+        return self.metadata(document_id) is not None
+
+    def metadata(self, document_id: str) -> Optional[dict]:
+        """Stored metadata of a document, or None if it was never ingested"""
+        if not self.is_valid_id(document_id):
+            return None
+        with self._lock:
+            pointer = self._pointers.get(document_id)
+            if pointer is None:
+                pointer = self._pointers[document_id] = SharedPointer(os.path.join(self.path(document_id), self.META_FILE))
+        return pointer.read()
+
+    def version(self, document_id: str) -> int:
+        """Version of a document's index, bumped every time it is rewritten (0 if unknown)"""
+        return (self.metadata(document_id) or {}).get("version", 0)
+
+    def list_documents(self) -> List[dict]:
+        documents = [self.metadata(name) for name in os.listdir(self.root)]
+        documents = [meta for meta in documents if meta]
+        return sorted(documents, key=lambda meta: meta.get("created", 0), reverse=True)
+
+    def register(self, document_id: str, vector_store: "FAISS", metadata: dict):
+        """Persist a freshly built index as a new version and keep it resident"""
+        path = self.path(document_id)
+        build_dir = os.path.join(path, f"build-{os.getpid()}-{uuid.uuid4().hex}")
+        MappedVectorStore.save(vector_store, build_dir)
+
+        with file_lock(os.path.join(self.root, self.LOCK_FILE)):
+            previous = self.metadata(document_id) or {}
+            version = previous.get("version", 0) + 1
+            index_dir = f"v{version}"
+            os.replace(build_dir, os.path.join(path, index_dir))
+            metadata = {**metadata, "document_id": document_id, "created": time.time(), "version": version, "index_dir": index_dir}
+
+            # Flipping the pointer publishes the new version to every worker
+            write_json_atomic(os.path.join(path, self.META_FILE), metadata)
+            self._remove_old_versions(path, version)
+
+        self._remember(document_id, MappedVectorStore(os.path.join(path, index_dir), self.embedder), version)
+
+    def update_metadata(self, document_id: str, **fields):
+        """Add fields to a document's metadata without creating a new index version"""
+        with file_lock(os.path.join(self.root, self.LOCK_FILE)):
+            metadata = self.metadata(document_id)
+            if metadata is None:
+                raise ValueError(f"Unknown document id '{document_id}'")
+            write_json_atomic(os.path.join(self.path(document_id), self.META_FILE), {**metadata, **fields})
+
+    def publish(self, document_id: str, vector_store: "FAISS"):
+        """Make a partial index queryable in this process while its document is still being ingested"""
+        self._remember(document_id, vector_store, None)
+
+    def withdraw(self, document_id: str):
+        """Drop a partial index left by `publish`, e.g. when its ingestion failed"""
+        with self._lock:
+            entry = self._resident.get(document_id)
+            if entry and entry[2] is None:
+                self._forget(document_id)
+
+    def get(self, document_id: str) -> Optional["MappedVectorStore"]:
+        """Return the current index of a document, opening it from disk when it is not resident"""
+        metadata = self.metadata(document_id)
+        with self._lock:
+            entry = self._resident.get(document_id)
+            if entry and (entry[2] is None or (metadata and metadata["version"] == entry[2])):
+                self._resident.move_to_end(document_id)
+                return entry[0]
+
+        if metadata is None:
+            self._forget(document_id)
+            return None
+
+        index_path = self._index_path(document_id, metadata)
+        if not MappedVectorStore.exists(index_path):
+            if MappedVectorStore.is_legacy(index_path):
+                print(f"Index of {document_id} is in the pickled format; convert it with python -m backend.convert_indexes")
+            return None
+        vector_store = MappedVectorStore(index_path, self.embedder)
+        self._remember(document_id, vector_store, metadata["version"])
+        return vector_store
+
+    def _index_path(self, document_id: str, metadata: dict) -> str:
+        return os.path.join(self.path(document_id), metadata.get("index_dir", ""))
+
+    def needs_conversion(self, document_id: str) -> bool:
+        """Whether a document's current index was saved by FAISS.save_local and cannot be served yet"""
+        metadata = self.metadata(document_id)
+        return metadata is not None and MappedVectorStore.is_legacy(self._index_path(document_id, metadata))
+
+    def convert_legacy(self, document_id: str) -> bool:
+        """Convert a document's pickled index to the mapped format; see MappedVectorStore.convert_legacy"""
+        with file_lock(os.path.join(self.root, self.LOCK_FILE)):
+            metadata = self.metadata(document_id)
+            if metadata is None:
+                return False
+            return MappedVectorStore.convert_legacy(self._index_path(document_id, metadata), self.embedder.embeddings)
+
+    @staticmethod
+    def _remove_old_versions(path: str, version: int):
+        """Delete builds older than the previous version; workers may still be opening that one.
+
+        Processes that mapped an older build keep it alive until they drop it.
+        """
+        for name in os.listdir(path):
+            if re.fullmatch(r"v\d+", name) and int(name[1:]) < version - 1:
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    def delete(self, document_id: str) -> bool:
+        self._forget(document_id)
+        if not self.is_valid_id(document_id) or not os.path.isdir(self.path(document_id)):
+            return False
+        with file_lock(os.path.join(self.root, self.LOCK_FILE)):
+            # Drop the pointer first so other workers stop serving the document
+            try:
+                os.remove(os.path.join(self.path(document_id), self.META_FILE))
+            except OSError:
+                pass
+            shutil.rmtree(self.path(document_id), ignore_errors=True)
+        return True
+
+    def resident_documents(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    @staticmethod
+    def estimate_bytes(vector_store) -> int:
+        """Rough in-memory size: encoded vectors plus chunk text"""
+        if isinstance(vector_store, MappedVectorStore):
+            return vector_store.memory_bytes
+        vector_bytes = estimate_index_bytes(vector_store.index)
+        text_bytes = sum(len(doc.page_content) for doc in vector_store.docstore._dict.values())
+        return vector_bytes + text_bytes
+
+    def _remember(self, document_id: str, vector_store, version: Optional[int]):
+        nbytes = self.estimate_bytes(vector_store)
+        with self._lock:
+            previous = self._resident.pop(document_id, None)
+            if previous:
+                self._resident_bytes -= previous[1]
+            self._resident[document_id] = (vector_store, nbytes, version)
+            self._resident_bytes += nbytes
+
+            # Evict least recently used indexes, but always keep the newest one
+            while self._resident_bytes > self.memory_budget and len(self._resident) > 1:
+                _, (_, evicted_bytes, _) = self._resident.popitem(last=False)
+                self._resident_bytes -= evicted_bytes
+
+    def _forget(self, document_id: str):
+        with self._lock:
+            entry = self._resident.pop(document_id, None)
+            if entry:
+                self._resident_bytes -= entry[1]
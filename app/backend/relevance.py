@@ -0,0 +1,122 @@
+import math
+import random
+import re
+import threading
+from typing import Callable, List, Optional
+
+NO_ANSWER = "I cannot find this information in the provided document."
+
+# Questions no uploaded document is expected to answer
+OFF_TOPIC_QUESTIONS = [
+    "What is the capital of France?",
+    "How do I bake sourdough bread at home?",
+    "Who won the FIFA World Cup in 2018?",
+    "What is the weather forecast for tomorrow?",
+    "How many moons does Jupiter have?",
+    "What is a good name for a golden retriever puppy?",
+    "How do I change a flat tire on a bicycle?",
+    "What are the lyrics of Bohemian Rhapsody?",
+    "Which stocks should I buy this week?",
+    "How long should I boil an egg?",
+    "Who painted the Mona Lisa?",
+    "What is the best way to learn to play guitar?",
+    "How tall is Mount Everest?",
+    "What time does the supermarket close on Sundays?",
+    "Recommend a movie to watch tonight",
+    "How do I get rid of weeds in my lawn?",
+]
+
+# Questions about any document that must never be gated
+GENERIC_QUESTIONS = [
+    "What is the main topic of this document?",
+    "Summarize the key points",
+    "What are the main conclusions?",
+    "What are the key findings?",
+    "Who is the author of this document?",
+    "What is the scope of this document?",
+]
+
+# How in-document probes are made, recorded with every calibration
+PROBE_KIND = "shuffled_window"
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def pseudo_question(chunk: str, max_words: int = 20) -> str:
+    """A question-sized piece of a chunk: its first sentence, capped at max_words"""
+    sentence = re.split(r"(?<=[.!?])\s+", chunk.strip(), maxsplit=1)[0]
+    return " ".join(sentence.split()[:max_words])
+
+def paraphrase_probe(chunk: str, rng: random.Random, keep: float = 0.6) -> str:
+    """A stand-in for a user's question about a chunk.
+
+    Real questions reuse some of a passage's words but rarely its exact
+    wording, so the probe is a window of about `keep` of the first
+    sentence's words, shuffled. A verbatim sentence sits much closer to its
+    own chunk than any question would.
+    """
+    words = pseudo_question(chunk).split()
+    size = max(1, round(len(words) * keep))
+    start = rng.randrange(len(words) - size + 1) if words else 0
+    window = words[start:start + size]
+    rng.shuffle(window)
+    return " ".join(window)
+
+def calibrate(chunks: List[str], embed_documents: Callable[[List[str]], List[List[float]]],
+              search_best: Callable[[List[List[float]]], List[Optional[float]]],
+              sample_size: int = 40, seed: int = 0) -> dict:
+    """Pick the distance above which a question is treated as out-of-document.
+
+    In-document probes (paraphrase-like pieces of sampled chunks, see
+    `paraphrase_probe`, plus generic questions about a document) are
+    compared with off-topic questions. The
+    threshold sits halfway between the 90th percentile of in-document
+    distances and the 10th percentile of off-topic ones, but never below the
+    former, so overlapping distributions err on the side of asking the LLM.
+    """
+    rng = random.Random(seed)
+    sample = rng.sample(chunks, min(sample_size, len(chunks)))
+    probes = [paraphrase_probe(chunk, rng) for chunk in sample if chunk.strip()] + GENERIC_QUESTIONS
+    distances = search_best(embed_documents(probes + OFF_TOPIC_QUESTIONS))
+    in_document = [d for d in distances[:len(probes)] if d is not None]
+    off_topic = [d for d in distances[len(probes):] if d is not None]
+    if not in_document or not off_topic:
+        return {"threshold": None}
+
+    in_p90 = _percentile(in_document, 90)
+    off_p10 = _percentile(off_topic, 10)
+    return {
+        "threshold": round(max(in_p90, (in_p90 + off_p10) / 2), 6),
+        "in_document_p90": round(in_p90, 6),
+        "off_topic_p10": round(off_p10, 6),
+        "probes": len(probes),
+        "probe": PROBE_KIND
+    }
+
+class RelevanceGate:
+    """Answers questions whose best chunk is too far away without calling the LLM.
+
+    Thresholds are L2 distances of the best hit, calibrated per index; a None
+    threshold lets every question through.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.gated = 0
+        self._lock = threading.Lock()
+
+    def allows(self, best_distance: float, threshold: Optional[float]) -> bool:
+        allowed = threshold is None or best_distance <= threshold
+        with self._lock:
+            self.checked += 1
+            if not allowed:
+                self.gated += 1
+        return allowed
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "gated": self.gated,
+            "hit_rate": round(self.gated / self.checked, 4) if self.checked else 0.0
+        }
@@ -0,0 +1,75 @@
+import time
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+    from langchain.vectorstores import FAISS
+
+    from .batcher import QueryBatcher
+
+def batch_similarity_search(vector_store: "FAISS", vectors: List[List[float]], k: int) -> List[List[Tuple["Document", float]]]:
+    """Run one FAISS search for several query vectors, returning (document, distance) pairs per query"""
+    if not vectors:
+        return []
+    if hasattr(vector_store, "batch_search"):
+        # CorpusIndex resolves its own ids and skips removed chunks
+        return vector_store.batch_search(vectors, k)
+    import numpy as np
+
+    distances, indices = vector_store.index.search(np.asarray(vectors, dtype=np.float32), k)
+
+    results = []
+    for row_distances, row_indices in zip(distances, indices):
+        hits = []
+        for distance, i in zip(row_distances, row_indices):
+            if i == -1:
+                continue
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+            hits.append((doc, float(distance)))
+        results.append(hits)
+    return results
+
+class Retrieval(NamedTuple):
+    """A query's vector and hits, with the time spent getting each"""
+    vector: List[float]
+    hits: List[Tuple["Document", float]]
+    embed_seconds: float   # until the vector was ready, including any wait for a batch
+    search_seconds: float
+
+class Retriever:
+    def __init__(self, vector_store: "FAISS", embeddings, batcher: Optional["QueryBatcher"] = None):
+        self.vector_store = vector_store
+        self.embeddings = embeddings
+        self.batcher = batcher
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, batched with concurrent ones when a batcher is set"""
+        if self.batcher is not None:
+            return self.batcher.embed(query)
+        return self.embeddings.embed_query(query)
+
+    def embed_and_retrieve(self, query: str, k: int = 5) -> Retrieval:
+        """Embed a query and retrieve its k closest chunks, in one trip through the batcher when set"""
+        if self.batcher is not None:
+            return self.batcher.embed_and_search(self.vector_store, query, k)
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+        hits = batch_similarity_search(self.vector_store, [vector], k)[0]
+        return Retrieval(vector, hits, embedded - start, time.perf_counter() - embedded)
+
+    def retrieve_similar_chunks(self, query: str, k: int = 5, vector: Optional[List[float]] = None) -> List["Document"]:
+        """Retrieve k most similar chunks for the query, reusing its vector when given"""
+        return [doc for doc, _ in self.retrieve_with_scores(query, k, vector)]
+
+    def retrieve_with_scores(self, query: str, k: int = 5, vector: Optional[List[float]] = None) -> List[Tuple["Document", float]]:
+        """Retrieve (chunk, L2 distance) pairs for the query, closest first"""
+        try:
+            if self.batcher is not None:
+                return self.batcher.search(self.vector_store, query, k, vector)
+            if vector is None:
+                vector = self.embeddings.embed_query(query)
+            return batch_similarity_search(self.vector_store, [vector], k)[0]
+        except Exception as e:
+            print(f"Error in retrieval: {e}")
+            return []
@@ -0,0 +1,311 @@
+import asyncio
+import hmac
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, File, UploadFile, Form, Header, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from .config import APP_DIR, Config
+from .jobs import FINISHED
+from .metrics import HTTP_SECONDS, REGISTRY
+from .profiling import PROFILER, CaptureRunning, list_reports, report_path
+from .rag import RAGApplication, UploadTooLarge
+
+FRONTEND_DIR = os.path.join(os.path.dirname(APP_DIR), "frontend")
+
+class BatchQuery(BaseModel):
+    questions: List[str]
+    document_id: Optional[str] = None
+    concurrency: Optional[int] = None
+
+class ProfileRequest(BaseModel):
+    mode: str = "sample"
+    requests: Optional[int] = None
+    seconds: float = 30.0
+    interval_ms: float = 5.0
+
+def create_app(rag_app: Optional[RAGApplication] = None) -> FastAPI:
+    """Build the FastAPI app around a RAGApplication without loading any models"""
+    rag_app = rag_app or RAGApplication()
+    config = rag_app.config
+
+    app = FastAPI(title="Advanced RAG PDF Query System", version="1.0.0")
+    app.state.rag_app = rag_app
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    upload_limit = int(config.MAX_UPLOAD_MB * 1024 * 1024)
+
+    @app.middleware("http")
+    async def reject_large_uploads(request: Request, call_next):
+        """Refuse oversized uploads from their Content-Length, before any of the body is read"""
+        if request.method == "POST" and request.url.path in ("/api/upload", "/api/documents"):
+            try:
+                too_large = int(request.headers.get("content-length", 0)) > upload_limit + 64 * 1024  # multipart framing
+            except ValueError:
+                too_large = False
+            if too_large:
+                return JSONResponse(
+                    content={"status": "error", "message": f"File exceeds the {config.MAX_UPLOAD_MB:g} MB upload limit"},
+                    status_code=413
+                )
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        """Per-route latency histogram; streaming responses are timed until their headers are sent"""
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=response.status_code
+        )
+        if PROFILER.capture is not None and not request.url.path.startswith("/api/admin/"):
+            PROFILER.request_done()
+        return response
+
+    def component_counters():
+        """Counters the LLM client and answer cache keep themselves, read at scrape time"""
+        llm = rag_app.llm.async_client.stats()
+        counters = [
+            ("rag_llm_requests", "counter", "LLM calls made", llm["requests"]),
+            ("rag_llm_retries", "counter", "LLM calls retried after a 429/5xx or timeout", llm["retries"]),
+            ("rag_llm_hedges", "counter", "Hedged LLM requests sent", llm["hedges"]),
+            ("rag_llm_failures", "counter", "LLM calls that failed after retries", llm["failures"])
+        ]
+        if rag_app.answer_cache:
+            cache = rag_app.answer_cache.stats()
+            counters += [
+                ("rag_answer_cache_hits", "counter", "Answer cache hits, exact and semantic", cache["exact_hits"] + cache["semantic_hits"]),
+                ("rag_answer_cache_misses", "counter", "Answer cache misses", cache["misses"]),
+                ("rag_answer_cache_entries", "gauge", "Answers held in the cache", cache["entries"])
+            ]
+        if rag_app.relevance_gate:
+            gate = rag_app.relevance_gate.stats()
+            counters += [
+                ("rag_relevance_gate_checked", "counter", "Questions checked by the relevance gate", gate["checked"]),
+                ("rag_relevance_gate_gated", "counter", "Questions answered by the relevance gate without the LLM", gate["gated"])
+            ]
+        return counters
+
+    @app.exception_handler(UploadTooLarge)
+    async def upload_too_large(request: Request, exc: UploadTooLarge):
+        # Bodies without a Content-Length are cut off while they are copied to disk
+        return JSONResponse(content={"status": "error", "message": str(exc)}, status_code=413)
+
+    # Mount static files for frontend
+    if os.path.isdir(FRONTEND_DIR):
+        app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+
+    @app.on_event("startup")
+    async def warm_up_models():
+        """Load the embedding model off the request path so /api/health answers immediately"""
+        if config.WARMUP_ON_STARTUP:
+            threading.Thread(target=rag_app.embedder.warm_up, name="embedder-warmup", daemon=True).start()
+
+    @app.on_event("shutdown")
+    async def stop_background_work():
+        await rag_app.cancel_jobs()
+        rag_app.ingestion_pool.shutdown()
+        await rag_app.llm.async_client.aclose()
+
+    @app.post("/api/upload")
+    async def upload_pdf(file: UploadFile = File(...), wait: bool = Form(False)):
+        """Upload a PDF and ingest it as a background job (or before responding with wait=true)"""
+        if not file.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+        if wait:
+            result = await rag_app.process_pdf(file)
+            return JSONResponse(content=result)
+        try:
+            job = await rag_app.submit_pdf(file)
+        except UploadTooLarge:
+            raise
+        except Exception as e:
+            return JSONResponse(content={"status": "error", "message": f"Error processing PDF: {str(e)}"})
+        return JSONResponse(content={"status": "accepted", **job}, status_code=202)
+
+    @app.get("/api/jobs/{job_id}")
+    async def get_job(job_id: str):
+        """Status and per-stage progress of an ingestion job"""
+        job = rag_app.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job id '{job_id}'")
+        return job
+
+    @app.get("/api/jobs/{job_id}/events")
+    async def job_events(job_id: str):
+        """Ingestion job progress as server-sent events, ending once the job has finished"""
+        if rag_app.jobs.get(job_id) is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job id '{job_id}'")
+
+        async def events():
+            last_update = None
+            while True:
+                job = rag_app.jobs.get(job_id)
+                if job is None:
+                    return
+                if job["updated_at"] != last_update:
+                    last_update = job["updated_at"]
+                    yield f"data: {json.dumps(job)}\n\n"
+                if job["status"] in FINISHED:
+                    return
+                await asyncio.sleep(0.25)
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/api/query")
+    async def query_document(question: str = Form(...), document_id: Optional[str] = Form(None)):
+        """Query a processed document (the latest upload unless document_id is given)"""
+        result = await rag_app.query_document(question, document_id)
+        return JSONResponse(content=result)
+
+    @app.post("/api/query/stream")
+    async def stream_query(question: str = Form(...), document_id: Optional[str] = Form(None)):
+        """Query a processed document, streaming answer tokens as server-sent events"""
+        async def events():
+            async for event in rag_app.stream_query(question, document_id):
+                yield f"data: {json.dumps(event)}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/api/query/batch")
+    async def query_batch(request: BatchQuery):
+        """Answer a list of questions, streaming one JSON line per answer as it completes, then a summary"""
+        if not request.questions:
+            raise HTTPException(status_code=400, detail="No questions given")
+        if len(request.questions) > config.BATCH_QUERY_MAX_QUESTIONS:
+            raise HTTPException(status_code=400, detail=f"At most {config.BATCH_QUERY_MAX_QUESTIONS} questions per batch")
+        if request.concurrency is not None and request.concurrency < 1:
+            raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+
+        async def lines():
+            async for result in rag_app.query_batch(request.questions, request.document_id, request.concurrency):
+                yield json.dumps(result) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+    @app.get("/api/documents")
+    async def list_documents():
+        """List every ingested document and the shared corpus"""
+        return {
+            "documents": rag_app.registry.list_documents(),
+            "resident": rag_app.registry.resident_documents(),
+            "current_document_id": rag_app.current_document_id,
+            "corpus": await run_in_threadpool(rag_app.corpus.stats)
+        }
+
+    @app.post("/api/documents")
+    async def add_document(file: UploadFile = File(...)):
+        """Ingest a PDF and append it to the shared corpus (query it with document_id=corpus)"""
+        if not file.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+        result = await rag_app.process_pdf(file)
+        if result["status"] == "success":
+            try:
+                result["corpus_chunks_added"] = await run_in_threadpool(rag_app.add_to_corpus, result["document_id"])
+            except Exception as e:
+                result = {"status": "error", "message": f"Error adding document to corpus: {str(e)}"}
+        return JSONResponse(content=result)
+
+    @app.delete("/api/documents/{document_id}")
+    async def delete_document(document_id: str):
+        """Remove a document from the corpus and delete its index"""
+        result = await run_in_threadpool(rag_app.remove_document, document_id)
+        return JSONResponse(content=result, status_code=200 if result["status"] == "success" else 404)
+
+    @app.get("/api/health")
+    async def health_check():
+        """Health check endpoint"""
+        return {
+            "status": "healthy",
+            "message": "RAG system is running",
+            "models_loaded": rag_app.embedder.is_loaded
+        }
+
+    @app.get("/api/metrics")
+    async def metrics():
+        """Stage latency histograms and counters of this worker process, in the Prometheus text format"""
+        return PlainTextResponse(REGISTRY.render(component_counters()), media_type="text/plain; version=0.0.4")
+
+    profile_dir = os.path.join(config.CACHE_PATH, "profiles")
+
+    def require_admin(x_admin_token: Optional[str] = Header(None)):
+        if not config.ADMIN_TOKEN:
+            raise HTTPException(status_code=404, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+        if not hmac.compare_digest(x_admin_token or "", config.ADMIN_TOKEN):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    @app.post("/api/admin/profile", dependencies=[Depends(require_admin)])
+    async def start_profile(request: ProfileRequest):
+        """Profile this worker for the next `requests` requests or `seconds`, whichever comes first"""
+        if request.seconds > config.PROFILE_MAX_SECONDS:
+            raise HTTPException(status_code=400, detail=f"seconds may be at most {config.PROFILE_MAX_SECONDS:g}")
+        try:
+            capture = PROFILER.start(request.mode, profile_dir, request.requests, request.seconds, request.interval_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except CaptureRunning as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return JSONResponse(content=capture, status_code=202)
+
+    @app.post("/api/admin/profile/stop", dependencies=[Depends(require_admin)])
+    async def stop_profile():
+        """End the running capture now and write its report"""
+        # On the event loop thread, which the cprofile mode's profiler is attached to
+        capture = PROFILER.stop()
+        if capture is None:
+            raise HTTPException(status_code=404, detail="No capture is running in this worker")
+        return capture
+
+    @app.get("/api/admin/profile", dependencies=[Depends(require_admin)])
+    async def profile_status():
+        """This worker's current or last capture, and the reports of every worker"""
+        return {"capture": PROFILER.status(), "reports": list_reports(profile_dir)}
+
+    @app.get("/api/admin/profile/reports/{name}", dependencies=[Depends(require_admin)])
+    async def download_profile(name: str):
+        path = report_path(profile_dir, name)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Unknown report '{name}'")
+        return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+    @app.get("/api/status")
+    async def get_status():
+        """Get current system status"""
+        return {
+            "document_loaded": rag_app.current_pdf_name is not None,
+            "current_document": rag_app.current_pdf_name,
+            "current_document_id": rag_app.current_document_id,
+            "model": config.MODEL_NAME,
+            "embedding_model": config.EMBEDDING_MODEL,
+            "embedding_backend": config.EMBEDDING_BACKEND,
+            "ingestion": rag_app.ingestion_pool.stats(),
+            "ingest_cache": rag_app.ingest_cache.stats() if rag_app.ingest_cache else None,
+            "query_batcher": rag_app.query_batcher.stats() if rag_app.query_batcher else None,
+            "answer_cache": rag_app.answer_cache.stats() if rag_app.answer_cache else None,
+            "relevance_gate": rag_app.relevance_gate.stats() if rag_app.relevance_gate else None,
+            "llm_client": rag_app.llm.async_client.stats()
+        }
+
+    return app
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+def write_json_atomic(path: str, value: dict):
+    """Replace a JSON file in one rename, so readers never see a partial write"""
+    # A unique temp file per call: threads of one process write the same path too
+    with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+        try:
+            json.dump(value, f)
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock shared by every process that opens the same lock file"""
+    with open(path, "a+") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+class SharedPointer:
+    """Small JSON file that several worker processes use to agree on a current value.
+
+    Writers replace the file atomically; readers only re-parse it when its
+    inode or mtime changed, so checking it on every request costs one stat.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp = None
+        self._value: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def read(self) -> Optional[dict]:
+        """Current value, or None if the pointer was never written"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    with open(self.path) as f:
+                        self._value = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                self._stamp = stamp
+            return self._value
+
+    def write(self, value: dict):
+        write_json_atomic(self.path, value)
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+from dotenv import load_dotenv
+
+from backend import create_app
+
+def main():
+    parser = argparse.ArgumentParser(description="InferaRead RAG backend")
+    parser.add_argument("--host", default=os.getenv("BACKEND_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("BACKEND_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BACKEND_WORKERS", 1)),
+                        help="server processes sharing the index files in the data directory")
+    args = parser.parse_args()
+
+    print("Starting Advanced RAG PDF Query System...")
+    print(f"Server will be available at: http://localhost:{args.port}")
+    if args.workers <= 1:
+        uvicorn.run(create_app(), host=args.host, port=args.port, reload=False, log_level="info")
+        return
+
+    # Split the cores between the workers' ingestion pools unless configured explicitly
+    load_dotenv()
+    os.environ.setdefault("INGEST_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+    print(f"Running {args.workers} worker processes")
+    uvicorn.run("backend.server:create_app", factory=True, host=args.host, port=args.port,
+                workers=args.workers, reload=False, log_level="info")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Recall and latency of the ANN index types against exact (flat) search.
+
+Vectors come from the bundled PDFs, or from a synthetic clustered set with
+--synthetic N to try sizes the bundled documents cannot reach. Every index
+type and storage combination is built over the same vectors and queried one
+query at a time; recall@k is measured against the flat index's results.
+
+    python benchmarks/bench_ann.py --synthetic 200000 --k 5
+"""
+import argparse
+import time
+
+from common import SAMPLE_QUESTIONS, load_chunks, percentile
+
+from backend.index_factory import build_index
+
+CONFIGS = [
+    ("flat", "float32"),
+    ("flat", "float16"),
+    ("flat", "sq8"),
+    ("hnsw", "float32"),
+    ("hnsw", "float16"),
+    ("hnsw", "sq8"),
+    ("ivf_flat", "float32"),
+    ("ivf_flat", "sq8"),
+    ("ivf_pq", "float32"),
+]
+
+def synthetic_vectors(n: int, n_queries: int, dim: int, seed: int = 0):
+    """Unit vectors scattered around random cluster centres, like sentence embeddings"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 100), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centres), n + n_queries)
+    vectors = centres[labels] + 0.5 * rng.standard_normal((n + n_queries, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:n], vectors[n:]
+
+def pdf_vectors(model: str, n_queries: int):
+    import itertools
+
+    import numpy as np
+
+    from backend.embedder import Embedder
+
+    embedder = Embedder(model)
+    chunks = [chunk for doc_chunks in load_chunks().values() for chunk in doc_chunks]
+    questions = list(itertools.islice(itertools.cycle(SAMPLE_QUESTIONS), n_queries))
+    vectors = np.asarray(embedder.embed_documents(chunks), dtype=np.float32)
+    queries = np.asarray(embedder.embed_documents(questions), dtype=np.float32)
+    return vectors, queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic vectors instead of the bundled PDFs")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    import faiss
+
+    if args.synthetic:
+        vectors, queries = synthetic_vectors(args.synthetic, args.queries, args.dim)
+    else:
+        vectors, queries = pdf_vectors(args.model, args.queries)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    print(f"{'index':<22}{'build s':>9}{'MB':>9}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}")
+
+    truth = None
+    for index_type, storage in CONFIGS:
+        start = time.perf_counter()
+        index, resolved = build_index(vectors, index_type, storage, ef_search=args.ef_search, nprobe=args.nprobe)
+        build_time = time.perf_counter() - start
+        label = f"{resolved}/{storage}" + ("" if resolved == index_type else " (fallback)")
+
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query.reshape(1, -1), args.k)
+            latencies.append(time.perf_counter() - start)
+            results.append(set(ids[0].tolist()) - {-1})
+
+        if truth is None:
+            truth = results  # the first config is exact flat search
+        recall = sum(len(found & exact) for found, exact in zip(results, truth)) / sum(len(exact) for exact in truth)
+        size_mb = faiss.serialize_index(index).nbytes / 1024 / 1024
+        print(f"{label:<22}{build_time:>9.2f}{size_mb:>9.1f}{recall:>10.3f}{percentile(latencies, 50) * 1000:>9.3f}{percentile(latencies, 99) * 1000:>9.3f}")
+
+if __name__ == "__main__":
+    main()
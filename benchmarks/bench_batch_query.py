@@ -0,0 +1,85 @@
+"""Bulk question answering: sequential /api/query calls vs one /api/query/batch request.
+
+Starts the backend against a fake LLM endpoint with a per-call latency,
+ingests one bundled PDF, then asks the same distinct questions both ways and
+reports questions/s. The answer cache is disabled so every question is
+embedded, searched and sent to the (fake) LLM.
+
+    python benchmarks/bench_batch_query.py --questions 200 --concurrency 8 --llm-latency 0.2
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+from bench_workers import start_backend
+from common import SAMPLE_QUESTIONS, bundled_pdfs
+
+from backend.fake_llm import FakeLLMServer
+
+def make_questions(total: int):
+    # Distinct texts, so the batch endpoint cannot fold repeats into one answer
+    return [f"{SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]} (variant {i})" for i in range(total)]
+
+def run_sequential(url: str, document_id: str, questions):
+    session = requests.Session()
+    start = time.perf_counter()
+    for question in questions:
+        response = session.post(f"{url}/api/query", data={"question": question, "document_id": document_id})
+        response.raise_for_status()
+    return len(questions) / (time.perf_counter() - start)
+
+def run_batch(url: str, document_id: str, questions, concurrency: int):
+    start = time.perf_counter()
+    first_result, summary = None, None
+    payload = {"questions": questions, "document_id": document_id, "concurrency": concurrency}
+    with requests.post(f"{url}/api/query/batch", json=payload, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("summary"):
+                summary = result
+            elif first_result is None:
+                first_result = time.perf_counter() - start
+    return len(questions) / (time.perf_counter() - start), first_result, summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds the fake LLM takes per answer")
+    args = parser.parse_args()
+
+    pdf_path = bundled_pdfs()[0]
+    questions = make_questions(args.questions)
+    print(f"document: {os.path.basename(pdf_path)}, {args.questions} questions, fake LLM latency {args.llm_latency * 1000:.0f} ms")
+
+    with FakeLLMServer(answer="Benchmark answer.", first_token_latency=args.llm_latency) as llm, \
+            tempfile.TemporaryDirectory() as data_dir:
+        proc, url = start_backend(1, data_dir, llm.base_url)
+        try:
+            with open(pdf_path, "rb") as f:
+                upload = requests.post(f"{url}/api/upload", data={"wait": "true"},
+                                       files={"file": (os.path.basename(pdf_path), f, "application/pdf")}).json()
+            document_id = upload["document_id"]
+            run_sequential(url, document_id, questions[:3])  # warm up the embedding model
+
+            sequential_qps = run_sequential(url, document_id, questions)
+            batch_qps, first_result, summary = run_batch(url, document_id, questions, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{'mode':<28}{'questions/s':>12}")
+    print(f"{'sequential /api/query':<28}{sequential_qps:>12.1f}")
+    print(f"{'/api/query/batch':<28}{batch_qps:>12.1f}   ({batch_qps / sequential_qps:.1f}x)")
+    print(f"first batch result after {first_result * 1000:.0f} ms; "
+          f"server reported {summary['questions_per_second']} questions/s, {summary['failed']} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Chunking throughput: LangChain's recursive splitter (TextChunker) vs the page-aware PageChunker.
+
+Both chunkers split the text of the bundled PDFs (repeated --repeat times)
+with the same size and overlap. The text is extracted once up front, so only
+chunking is timed. Reported per chunker: MB/s, chunk count, mean and max
+chunk length.
+
+    python benchmarks/bench_chunker.py --chunk-size 500 --chunk-overlap 50 --repeat 20
+"""
+import argparse
+import time
+
+from common import bundled_pdfs
+
+from backend.chunker import PageChunker, TextChunker
+from backend.parser import PDFParser
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20, help="chunk the bundled text this many times")
+    args = parser.parse_args()
+
+    pages = [page for path in bundled_pdfs() for page in PDFParser.iter_pages(path)] * args.repeat
+    pages = [(i, text) for i, (_, text) in enumerate(pages)]
+    text = PageChunker.PAGE_SEPARATOR.join(text for _, text in pages)
+    megabytes = len(text) / 1e6
+    print(f"{len(pages)} pages, {megabytes:.1f} MB of text, chunk size {args.chunk_size}, overlap {args.chunk_overlap}")
+    print(f"{'chunker':<14}{'seconds':>9}{'MB/s':>8}{'chunks':>9}{'mean len':>10}{'max len':>9}")
+
+    text_chunker = TextChunker(args.chunk_size, args.chunk_overlap)
+    text_chunker.chunk_text("warm up")  # import LangChain outside the timing
+    page_chunker = PageChunker(args.chunk_size, args.chunk_overlap)
+    runs = [
+        ("TextChunker", lambda: text_chunker.chunk_text(text)),
+        ("PageChunker", lambda: page_chunker.chunk_pages(pages).texts),
+    ]
+    for name, run in runs:
+        start = time.perf_counter()
+        chunks = run()
+        elapsed = time.perf_counter() - start
+        lengths = [len(chunk) for chunk in chunks]
+        print(f"{name:<14}{elapsed:>9.2f}{megabytes / elapsed:>8.1f}{len(chunks):>9}"
+              f"{sum(lengths) / len(lengths):>10.0f}{max(lengths):>9}")
+
+if __name__ == "__main__":
+    main()
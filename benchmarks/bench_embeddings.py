@@ -0,0 +1,79 @@
+"""Throughput and retrieval quality of the embedding backends on the bundled PDFs.
+
+Every backend embeds the chunks of the PDFs in app/data/uploads and a set
+of probe questions (the first sentence of sampled chunks). Reported per
+backend:
+
+  chunks/s   ingestion-side embedding throughput
+  query ms   median latency of embedding a single question
+  self@k     share of probes whose source chunk is in the top k
+  agree@k    overlap of its top k with the sentence-transformers top k
+
+    python benchmarks/bench_embeddings.py --backends sentence-transformers,onnx,onnx-int8,hashing --threads 4
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from common import load_chunks, percentile
+
+from backend.embedder import Embedder
+from backend.relevance import pseudo_question
+
+def top_k(vectors, queries, k: int):
+    import numpy as np
+
+    distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backends", default="sentence-transformers,onnx,onnx-int8,hashing")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = library default)")
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50, help="single-question embeddings timed per backend")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    import numpy as np
+
+    chunks = [chunk for doc_chunks in load_chunks().values() for chunk in doc_chunks]
+    sources = random.Random(0).sample(range(len(chunks)), min(args.probes, len(chunks)))
+    probes = [pseudo_question(chunks[i]) for i in sources]
+    print(f"{len(chunks)} chunks, {len(probes)} probes, k={args.k}, threads={args.threads or 'default'}")
+    print(f"{'backend':<24}{'load s':>8}{'chunks/s':>10}{'query ms':>10}{'self@k':>8}{'agree@k':>9}")
+
+    reference = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for backend in args.backends.split(","):
+            embedder = Embedder(args.model, backend=backend, threads=args.threads or None, cache_dir=cache_dir)
+            start = time.perf_counter()
+            embedder.warm_up()
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            vectors = np.asarray(embedder.embed_documents(chunks), dtype=np.float32)
+            chunks_per_s = len(chunks) / (time.perf_counter() - start)
+
+            latencies = []
+            for question in probes[:args.queries]:
+                start = time.perf_counter()
+                embedder.embeddings.embed_query(question)
+                latencies.append(time.perf_counter() - start)
+
+            hits = top_k(vectors, np.asarray(embedder.embed_documents(probes), dtype=np.float32), args.k)
+            self_recall = float(np.mean([source in row for source, row in zip(sources, hits)]))
+            if reference is None and backend == "sentence-transformers":
+                reference = hits
+            if reference is not None:
+                agreement = float(np.mean([len(set(a) & set(b)) / args.k for a, b in zip(hits, reference)]))
+                agree = f"{agreement:>9.3f}"
+            else:
+                agree = f"{'-':>9}"
+            print(f"{backend:<24}{load_time:>8.1f}{chunks_per_s:>10.1f}{percentile(latencies, 50) * 1000:>10.2f}"
+                  f"{self_recall:>8.3f}{agree}")
+
+if __name__ == "__main__":
+    main()
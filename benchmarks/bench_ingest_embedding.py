@@ -0,0 +1,63 @@
+"""Ingestion embedding throughput: one default-batched call vs length buckets vs a process pool.
+
+Embeds the chunks of the bundled PDFs (repeated --repeat times) with
+  single     one embed_documents call on the model, library batching
+  bucketed   Embedder.embed_documents, sorted into length buckets
+  pool xN    embed_parallel over N worker processes, each with its own model
+and reports chunks/s, the number to size ingestion hosts with.
+
+    python benchmarks/bench_ingest_embedding.py --workers 2,4 --repeat 4 --backend onnx-int8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from common import load_chunks
+
+from backend.embedder import Embedder
+from backend.ingest import IngestionPool, embed_parallel
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--workers", default="2,4")
+    parser.add_argument("--repeat", type=int, default=2, help="embed the bundled chunks this many times")
+    parser.add_argument("--task-chunks", type=int, default=128)
+    args = parser.parse_args()
+
+    chunks = [chunk for doc_chunks in load_chunks().values() for chunk in doc_chunks] * args.repeat
+    cores = os.cpu_count() or 1
+    print(f"{len(chunks)} chunks, backend {args.backend}, {cores} cores")
+    print(f"{'mode':<14}{'seconds':>9}{'chunks/s':>10}{'speed-up':>10}")
+
+    embedder = Embedder(args.model, backend=args.backend)
+    embedder.warm_up()
+    results = [
+        ("single", timed(lambda: embedder.embeddings.embed_documents(chunks))),
+        ("bucketed", timed(lambda: embedder.embed_documents(chunks))),
+    ]
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        pool = IngestionPool("process", max_workers=workers)
+        spec = (args.model, args.backend, max(1, cores // workers), *embedder.spec[3:])
+        try:
+            # First call loads a model copy in every worker
+            asyncio.run(embed_parallel(pool, spec, chunks[:workers * 8], task_chunks=8))
+            elapsed = timed(lambda: asyncio.run(embed_parallel(pool, spec, chunks, task_chunks=args.task_chunks)))
+        finally:
+            pool.shutdown()
+        results.append((f"pool x{workers}", elapsed))
+
+    baseline = results[0][1]
+    for mode, elapsed in results:
+        print(f"{mode:<14}{elapsed:>9.2f}{len(chunks) / elapsed:>10.1f}{baseline / elapsed:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
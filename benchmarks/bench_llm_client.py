@@ -0,0 +1,71 @@
+"""Success rate and tail latency of the async LLM client under injected failures.
+
+Starts the fake LLM server with a share of 500s, 429s and slow responses and
+sends concurrent completions through AsyncLLMClient with retries off, retries
+on, and retries plus hedging. Reports success rate, p50/p99 latency and how
+many retries and hedged requests were needed.
+
+    python benchmarks/bench_llm_client.py --requests 500 --error-rate 0.05 --slow-rate 0.05 --slow-latency 1
+"""
+import argparse
+import asyncio
+import time
+
+from common import percentile
+
+from backend.fake_llm import FakeLLMServer
+from backend.llm_client import AsyncLLMClient
+
+PAYLOAD = {"model": "fake", "messages": [{"role": "user", "content": "question"}], "max_tokens": 64}
+
+async def run(client: AsyncLLMClient, total: int, deadline_s: float):
+    async def timed():
+        start = time.perf_counter()
+        try:
+            await client.complete(PAYLOAD, time.monotonic() + deadline_s)
+            return time.perf_counter() - start
+        except Exception:
+            return None
+
+    try:
+        results = await asyncio.gather(*(timed() for _ in range(total)))
+    finally:
+        await client.aclose()
+    latencies = [r for r in results if r is not None]
+    return len(latencies) / total, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="normal response latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--hedge-after", type=float, default=0.2)
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+
+    modes = [
+        ("no retries", {"max_retries": 0}),
+        ("retries", {"max_retries": 3}),
+        (f"retries + hedge@{args.hedge_after:g}s", {"max_retries": 3, "hedge_after_s": args.hedge_after}),
+    ]
+    print(f"{args.requests} requests, concurrency {args.concurrency}, errors {args.error_rate:.0%} + 429s {args.rate_limit_rate:.0%}, "
+          f"slow {args.slow_rate:.0%} (+{args.slow_latency:g}s)")
+    print(f"{'mode':<26}{'success':>9}{'p50 ms':>9}{'p99 ms':>9}{'retries':>9}{'hedges':>8}{'won':>6}")
+
+    for label, options in modes:
+        server = FakeLLMServer(first_token_latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                               slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=0)
+        with server:
+            client = AsyncLLMClient(server.base_url, "benchmark", max_concurrency=args.concurrency, backoff_base_s=0.05, **options)
+            success, latencies = asyncio.run(run(client, args.requests, args.deadline))
+        stats = client.stats()
+        p50 = percentile(latencies, 50) * 1000 if latencies else float("nan")
+        p99 = percentile(latencies, 99) * 1000 if latencies else float("nan")
+        print(f"{label:<26}{success:>9.1%}{p50:>9.1f}{p99:>9.1f}{stats['retries']:>9}{stats['hedges']:>8}{stats['hedge_wins']:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""End-to-end load test: ingestion pages/s and query latency percentiles over HTTP.
+
+Starts backend_server.py against a throwaway data directory and a fake
+Groq endpoint with scripted latency, then
+  1. uploads the bundled PDFs (each --upload-repeat times, made distinct so
+     nothing is deduplicated) through the background-job API and reports
+     pages/s overall and per document;
+  2. for every --concurrency level, sends --queries /api/query requests drawn
+     from a question mix and reports throughput and p50/p95/p99 latency;
+  3. reads the server's own per-stage means from /api/metrics.
+
+Question mix sources (--mix name=weight,...):
+  repeat    the sample questions, so repeats can hit the answer cache
+  unique    distinct variants of the sample questions
+  offtopic  questions the relevance gate should answer without the LLM
+  file      lines of --questions-file
+
+--output writes the results as JSON. --baseline compares them with an earlier
+JSON file and exits 1 when throughput or pages/s fall, or p95/p99 rise, by
+more than --tolerance.
+
+    python benchmarks/bench_load.py --concurrency 1,8,32 --queries 300 --llm-latency 0.2 --output load.json
+    python benchmarks/bench_load.py --baseline load.json --tolerance 0.15
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_workers import start_backend
+from common import ROOT_DIR, SAMPLE_QUESTIONS, bundled_pdfs, percentile
+
+from backend.fake_llm import FakeLLMServer
+from backend.llm import LLMInterface
+from backend.relevance import OFF_TOPIC_QUESTIONS
+
+# metric -> True when higher is better
+GATED_METRICS = {"pages_per_second": True, "throughput_qps": True, "p95_ms": False, "p99_ms": False}
+
+def parse_mix(spec: str):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("repeat", "unique", "offtopic", "file"):
+            raise SystemExit(f"unknown question source '{name}'")
+        mix[name] = float(weight or 1)
+    return mix
+
+def make_questions(mix: dict, total: int, file_questions, seed: int):
+    rng = random.Random(seed)
+    counter = itertools.count()
+    sources = {
+        "repeat": lambda: rng.choice(SAMPLE_QUESTIONS),
+        "unique": lambda: f"{rng.choice(SAMPLE_QUESTIONS)} (variant {next(counter)})",
+        "offtopic": lambda: rng.choice(OFF_TOPIC_QUESTIONS),
+        "file": lambda: rng.choice(file_questions),
+    }
+    names = list(mix)
+    picks = rng.choices(names, weights=[mix[name] for name in names], k=total)
+    return [(name, sources[name]()) for name in picks]
+
+def distinct_copy(data: bytes, copy: int) -> bytes:
+    # A trailing PDF comment changes the content hash without changing the document
+    return data if copy == 0 else data + f"\n%load-test copy {copy}\n".encode()
+
+def ingest(url: str, uploads, concurrency: int, poll_s: float = 0.1):
+    """Upload (filename, bytes) pairs as background jobs and wait for every job to finish"""
+    def run(upload):
+        filename, data = upload
+        start = time.perf_counter()
+        response = requests.post(f"{url}/api/upload", files={"file": (filename, data, "application/pdf")})
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        while True:
+            job = requests.get(f"{url}/api/jobs/{job_id}").json()
+            if job["status"] in ("success", "error"):
+                break
+            time.sleep(poll_s)
+        elapsed = time.perf_counter() - start
+        return {
+            "filename": filename,
+            "status": job["status"],
+            "pages": job["pages_total"],
+            "chunks": job["chunks_total"],
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(job["pages_total"] / elapsed, 2) if elapsed else 0.0,
+            "document_id": (job.get("result") or {}).get("document_id")
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        documents = list(pool.map(run, uploads))
+    elapsed = time.perf_counter() - start
+    pages = sum(doc["pages"] for doc in documents if doc["status"] == "success")
+    return {
+        "documents": len(documents),
+        "failed": sum(doc["status"] != "success" for doc in documents),
+        "pages": pages,
+        "chunks": sum(doc["chunks"] for doc in documents),
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 2) if elapsed else 0.0,
+        "per_document": documents
+    }
+
+def query_level(url: str, document_ids, questions, concurrency: int):
+    session = requests.Session()
+    targets = itertools.cycle(document_ids)
+    jobs = [(source, question, next(targets)) for source, question in questions]
+
+    def timed(job):
+        _, question, document_id = job
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/api/query", data={"question": question, "document_id": document_id})
+            result = response.json() if response.status_code == 200 else {}
+            ok = result.get("status") == "success" and not result.get("answer", "").startswith(LLMInterface.ERROR_PREFIX)
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, jobs))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for latency, _ in results]
+    by_source = {}
+    for (source, _, _), (latency, _) in zip(jobs, results):
+        by_source.setdefault(source, []).append(latency)
+    return {
+        "concurrency": concurrency,
+        "queries": len(results),
+        "errors": sum(not ok for _, ok in results),
+        "seconds": round(elapsed, 3),
+        "throughput_qps": round(len(results) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "by_source": {
+            source: {"queries": len(values), "p50_ms": round(percentile(values, 50) * 1000, 2),
+                     "p95_ms": round(percentile(values, 95) * 1000, 2)}
+            for source, values in sorted(by_source.items())
+        }
+    }
+
+def server_stage_means(url: str) -> dict:
+    """Mean milliseconds per "pipeline:stage" from the backend's Prometheus histograms"""
+    text = requests.get(f"{url}/api/metrics").text
+    sums, counts = {}, {}
+    pattern = r'^rag_stage_duration_seconds_(sum|count)\{pipeline="([^"]+)",stage="([^"]+)"\} (\S+)$'
+    for match in re.finditer(pattern, text, re.M):
+        kind, pipeline, stage, value = match.groups()
+        (sums if kind == "sum" else counts)[f"{pipeline}:{stage}"] = float(value)
+    return {stage: round(sums[stage] / counts[stage] * 1000, 2) for stage in sorted(counts) if counts[stage]}
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Regressions of the gated metrics beyond tolerance, as messages"""
+    pairs = [("ingestion", results["ingestion"], baseline["ingestion"])]
+    previous = {level["concurrency"]: level for level in baseline["queries"]}
+    pairs += [(f"concurrency {level['concurrency']}", level, previous[level["concurrency"]])
+              for level in results["queries"] if level["concurrency"] in previous]
+
+    failures = []
+    for label, current, old in pairs:
+        for metric, higher_is_better in GATED_METRICS.items():
+            if metric not in current or not old.get(metric):
+                continue
+            change = (current[metric] - old[metric]) / old[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                failures.append(f"{label}: {metric} {old[metric]} -> {current[metric]} ({change:+.1%})")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--concurrency", default="1,8,32", help="concurrent query clients, one run per value")
+    parser.add_argument("--queries", type=int, default=300, help="queries per concurrency level")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed queries before the first level")
+    parser.add_argument("--mix", default="repeat=0.3,unique=0.6,offtopic=0.1")
+    parser.add_argument("--questions-file", help="one question per line, used by the 'file' source")
+    parser.add_argument("--upload-repeat", type=int, default=1, help="upload every bundled PDF this many times")
+    parser.add_argument("--upload-concurrency", type=int, default=1)
+    parser.add_argument("--answer-cache", action="store_true", help="keep the answer cache on")
+    parser.add_argument("--ingest-cache", action="store_true", help="keep the extraction/embedding cache on")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before the fake LLM's first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="seconds between fake LLM tokens")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="share of LLM calls delayed by --llm-slow-latency")
+    parser.add_argument("--llm-slow-latency", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls answered with a 500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="earlier --output file to gate against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    file_questions = []
+    if "file" in mix:
+        if not args.questions_file:
+            raise SystemExit("the 'file' source needs --questions-file")
+        with open(args.questions_file) as f:
+            file_questions = [line.strip() for line in f if line.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    questions = make_questions(mix, args.warmup + args.queries * len(levels), file_questions, args.seed)
+
+    uploads = []
+    for copy in range(args.upload_repeat):
+        for path in bundled_pdfs():
+            with open(path, "rb") as f:
+                name = os.path.basename(path)
+                uploads.append((name if copy == 0 else f"copy{copy}-{name}", distinct_copy(f.read(), copy)))
+
+    env = {
+        "ANSWER_CACHE_ENABLED": "1" if args.answer_cache else "0",
+        "INGEST_CACHE_ENABLED": "1" if args.ingest_cache else "0",
+    }
+    llm_options = dict(
+        answer="Load test answer.", first_token_latency=args.llm_latency, token_latency=args.llm_token_latency,
+        slow_rate=args.llm_slow_rate, slow_latency=args.llm_slow_latency, error_rate=args.llm_error_rate, seed=args.seed
+    )
+    print(f"{len(uploads)} uploads, {args.workers} worker(s), mix {args.mix}, fake LLM latency {args.llm_latency * 1000:.0f} ms")
+
+    with FakeLLMServer(**llm_options) as llm, tempfile.TemporaryDirectory() as data_dir:
+        proc, url = start_backend(args.workers, data_dir, llm.base_url, extra_env=env)
+        try:
+            ingestion = ingest(url, uploads, args.upload_concurrency)
+            document_ids = [doc["document_id"] for doc in ingestion["per_document"] if doc["document_id"]]
+            if not document_ids:
+                raise SystemExit("no document was ingested")
+            print(f"ingestion: {ingestion['pages']} pages, {ingestion['chunks']} chunks in {ingestion['seconds']:.1f} s "
+                  f"= {ingestion['pages_per_second']:.1f} pages/s ({ingestion['failed']} failed)")
+
+            query_level(url, document_ids, questions[:args.warmup], max(levels))
+            offset = args.warmup
+            results = []
+            print(f"{'clients':<9}{'queries/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+            for concurrency in levels:
+                level = query_level(url, document_ids, questions[offset:offset + args.queries], concurrency)
+                offset += args.queries
+                results.append(level)
+                print(f"{concurrency:<9}{level['throughput_qps']:>10.1f}{level['p50_ms']:>9.0f}{level['p95_ms']:>9.0f}"
+                      f"{level['p99_ms']:>9.0f}{level['errors']:>8}")
+            stages = server_stage_means(url)
+        finally:
+            proc.terminate()
+            proc.wait()
+    print("server stage means (ms): " + ", ".join(f"{stage} {ms:g}" for stage, ms in stages.items()))
+
+    report = {
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "settings": vars(args),
+        "ingestion": ingestion,
+        "queries": results,
+        "server_stage_mean_ms": stages
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+    if baseline is not None:
+        failures = compare(report, baseline, args.tolerance)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        if not failures:
+            print(f"no regression beyond {args.tolerance:.0%} against {baseline.get('revision', args.baseline)}")
+        sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
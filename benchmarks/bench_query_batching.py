@@ -0,0 +1,63 @@
+"""Throughput vs. latency of micro-batched query retrieval.
+
+Builds an index over the bundled PDFs, then fires concurrent queries through
+the Retriever with and without a QueryBatcher for each (batch size, window)
+combination and reports queries/s plus p50/p99 latency.
+
+    python benchmarks/bench_query_batching.py --concurrency 32 --batch-sizes 1,8,32 --windows 0,2,5
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SAMPLE_QUESTIONS, load_chunks, percentile
+
+from backend.batcher import QueryBatcher
+from backend.embedder import Embedder
+from backend.retriever import Retriever
+
+def run(retriever: Retriever, concurrency: int, total: int, k: int):
+    questions = list(itertools.islice(itertools.cycle(SAMPLE_QUESTIONS), total))
+
+    def timed(question):
+        start = time.perf_counter()
+        retriever.retrieve_similar_chunks(question, k=k)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, questions))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, percentile(latencies, 50), percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-sizes", default="1,8,16,32")
+    parser.add_argument("--windows", default="0,2,5,10", help="batch windows in ms")
+    args = parser.parse_args()
+
+    embedder = Embedder(args.model)
+    chunks = [chunk for doc_chunks in load_chunks().values() for chunk in doc_chunks]
+    vector_store = embedder.build_vector_store(chunks, embedder.embed_documents(chunks), "benchmark")
+    embedder.warm_up()
+
+    print(f"{len(chunks)} chunks indexed, {args.concurrency} concurrent clients, {args.queries} queries")
+    print(f"{'mode':<24}{'queries/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+
+    qps, p50, p99 = run(Retriever(vector_store, embedder.embeddings), args.concurrency, args.queries, args.k)
+    print(f"{'unbatched':<24}{qps:>12.1f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        for window in (float(w) for w in args.windows.split(",")):
+            batcher = QueryBatcher(embedder, max_batch_size=batch_size, max_wait_ms=window)
+            qps, p50, p99 = run(Retriever(vector_store, embedder.embeddings, batcher), args.concurrency, args.queries, args.k)
+            label = f"batch={batch_size} window={window:g}ms"
+            print(f"{label:<24}{qps:>12.1f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}  (avg batch {batcher.stats()['avg_batch_size']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Retrieval quality vs. cost for chunk size, overlap, k and index type.
+
+Builds a labeled question -> passage set from the bundled PDFs. A passage is
+a sentence span (page, start, end) of the parser's page text, and its
+question is the sentence's opening words. Labels are spans rather than
+chunk ids, so the same set scores every chunking. A retrieved chunk is
+relevant when its page/offset provenance overlaps at least half of the
+passage (or of the chunk, when the chunk is shorter). Hand-written labels can be given with --labels: a JSONL file of
+{"file", "question", "page", "start", "end"}. --write-labels saves the
+generated set for review.
+
+For every chunk size x overlap x index type, and every k, reports:
+
+  recall@k    share of questions with a relevant chunk in the top k
+  MRR         mean reciprocal rank of the first relevant chunk (up to the largest k)
+  ctx tokens  mean prompt context after ContextPacker, i.e. what each query pays
+  index KB    serialized FAISS index size
+  ingest s    chunking + embedding + index build time
+
+and names the cheapest configuration that reaches --min-recall: fewest
+context tokens, then smallest index, then fastest ingestion.
+
+    python benchmarks/bench_retrieval.py --chunk-sizes 250,500,1000 --overlaps 0,50,100 --ks 3,5,8 --min-recall 0.9
+    python benchmarks/bench_retrieval.py --backend hashing --index-types flat,hnsw --scope corpus --output retrieval.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from common import bundled_pdfs
+
+from backend.chunker import PageChunker
+from backend.context import ContextPacker
+from backend.embedder import Embedder
+from backend.index_factory import build_index
+from backend.parser import PDFParser
+from backend.relevance import pseudo_question
+
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]")
+
+def load_pages():
+    return {os.path.basename(path): list(PDFParser.iter_pages(path)) for path in bundled_pdfs()}
+
+def page_offsets(pages) -> dict:
+    """Offset of every page in the text PageChunker joins them into"""
+    offsets, offset = {}, 0
+    for i, (page_num, text) in enumerate(pages):
+        if i:
+            offset += len(PageChunker.PAGE_SEPARATOR)
+        offsets[page_num] = offset
+        offset += len(text)
+    return offsets
+
+def make_labels(pages_by_file: dict, per_file: int, question_words: int, seed: int):
+    rng = random.Random(seed)
+    labels = []
+    for filename, pages in pages_by_file.items():
+        candidates = []
+        for page_num, text in pages:
+            for match in SENTENCE_RE.finditer(text):
+                sentence = match.group()
+                if len(sentence.split()) >= 8:
+                    start = match.start() + len(sentence) - len(sentence.lstrip())
+                    candidates.append((page_num, start, match.end(), sentence.strip()))
+        for page_num, start, end, sentence in rng.sample(candidates, min(per_file, len(candidates))):
+            labels.append({
+                "file": filename, "question": pseudo_question(sentence, question_words),
+                "page": page_num, "start": start, "end": end
+            })
+    return labels
+
+def chunk_documents(chunker: PageChunker, pages_by_file: dict):
+    """Chunk texts and their global (start, end) spans per file"""
+    documents = {}
+    for filename, pages in pages_by_file.items():
+        batch = chunker.chunk_pages(pages)
+        offsets = page_offsets(pages)
+        spans = [
+            (offsets[batch.pages[i]] + batch.starts[i], offsets[batch.end_pages[i]] + batch.ends[i])
+            for i in range(len(batch.texts))
+        ]
+        documents[filename] = (batch.texts, spans)
+    return documents
+
+def is_relevant(span, label_span) -> bool:
+    overlap = min(span[1], label_span[1]) - max(span[0], label_span[0])
+    # Half of the shorter span, so a chunk smaller than a long passage can still count
+    return overlap >= 0.5 * min(span[1] - span[0], label_span[1] - label_span[0])
+
+def evaluate(documents: dict, vectors: dict, labels, label_spans, question_vectors, index_type: str,
+             scope: str, ks, packer: ContextPacker):
+    """Build the index(es) for one configuration and score every label at every k"""
+    import faiss
+    import numpy as np
+    from langchain.docstore.document import Document
+
+    groups = {filename: [filename] for filename in documents} if scope == "document" else {"corpus": list(documents)}
+    max_k = max(ks)
+    hits_at = {k: 0 for k in ks}
+    tokens_at = {k: 0 for k in ks}
+    reciprocal_ranks, index_bytes, build_seconds, resolved_types = [], 0, 0.0, set()
+
+    for files in groups.values():
+        # Row -> (file, chunk number within the file)
+        rows = [(filename, i) for filename in files for i in range(len(documents[filename][0]))]
+        start = time.perf_counter()
+        index, resolved = build_index(np.concatenate([vectors[filename] for filename in files]), index_type)
+        build_seconds += time.perf_counter() - start
+        index_bytes += len(faiss.serialize_index(index))
+        resolved_types.add(resolved)
+
+        members = [i for i, label in enumerate(labels) if label["file"] in files]
+        if not members:
+            continue
+        _, found = index.search(question_vectors[members], min(max_k, len(rows)))
+        for label_i, row_ids in zip(members, found):
+            label = labels[label_i]
+            ranked = [rows[row] for row in row_ids if row != -1]
+            relevant = [
+                filename == label["file"] and is_relevant(documents[filename][1][i], label_spans[label_i])
+                for filename, i in ranked
+            ]
+            reciprocal_ranks.append(1 / (relevant.index(True) + 1) if True in relevant else 0.0)
+            for k in ks:
+                hits_at[k] += any(relevant[:k])
+                docs = [
+                    Document(page_content=documents[filename][0][i], metadata={"source": filename, "chunk_id": i})
+                    for filename, i in ranked[:k]
+                ]
+                tokens_at[k] += packer.pack(docs).tokens
+
+    n = len(labels)
+    return {
+        "index_type": "/".join(sorted(resolved_types)),
+        "index_bytes": index_bytes,
+        "build_s": build_seconds,
+        "mrr": sum(reciprocal_ranks) / n,
+        "recall": {k: hits_at[k] / n for k in ks},
+        "context_tokens": {k: tokens_at[k] / n for k in ks}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="sentence-transformers")
+    parser.add_argument("--chunk-sizes", default="250,500,1000")
+    parser.add_argument("--overlaps", default="0,50,100")
+    parser.add_argument("--ks", default="3,5,8")
+    parser.add_argument("--index-types", default="flat,hnsw,ivf_flat,ivf_pq")
+    parser.add_argument("--scope", choices=("document", "corpus"), default="document",
+                        help="search each question's own document, as /api/query does, or one index of all PDFs")
+    parser.add_argument("--questions-per-file", type=int, default=50)
+    parser.add_argument("--question-words", type=int, default=12, help="words of the sentence kept as its question")
+    parser.add_argument("--labels", help="JSONL labels to use instead of generated ones")
+    parser.add_argument("--write-labels", help="save the generated labels to this JSONL file")
+    parser.add_argument("--token-budget", type=int, default=1500, help="ContextPacker budget, as CONTEXT_TOKEN_BUDGET")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="quality bar for the recommendation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write every row to this JSON file")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    pages_by_file = load_pages()
+    if args.labels:
+        with open(args.labels) as f:
+            labels = [json.loads(line) for line in f if line.strip()]
+    else:
+        labels = make_labels(pages_by_file, args.questions_per_file, args.question_words, args.seed)
+    if args.write_labels:
+        with open(args.write_labels, "w") as f:
+            f.writelines(json.dumps(label) + "\n" for label in labels)
+    label_spans = []
+    for label in labels:
+        offset = page_offsets(pages_by_file[label["file"]])[label["page"]]
+        label_spans.append((offset + label["start"], offset + label["end"]))
+
+    embedder = Embedder(args.model, backend=args.backend)
+    embedder.warm_up()
+    question_vectors = np.asarray(embedder.embed_documents([label["question"] for label in labels]), dtype=np.float32)
+    ks = sorted(int(k) for k in args.ks.split(","))
+    packer = ContextPacker(token_budget=args.token_budget)
+    print(f"{len(labels)} labeled questions over {len(pages_by_file)} PDFs, backend {args.backend}, scope {args.scope}")
+    print(f"{'size':>6}{'overlap':>8}  {'index':<10}{'k':>3}{'recall@k':>10}{'MRR':>7}{'ctx tokens':>12}"
+          f"{'chunks':>8}{'index KB':>10}{'ingest s':>10}")
+
+    rows = []
+    for chunk_size in (int(s) for s in args.chunk_sizes.split(",")):
+        for overlap in (int(o) for o in args.overlaps.split(",")):
+            if overlap >= chunk_size:
+                continue
+            start = time.perf_counter()
+            documents = chunk_documents(PageChunker(chunk_size, overlap), pages_by_file)
+            chunk_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            vectors = {
+                filename: np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+                for filename, (texts, _) in documents.items()
+            }
+            embed_seconds = time.perf_counter() - start
+            chunk_count = sum(len(texts) for texts, _ in documents.values())
+
+            for index_type in args.index_types.split(","):
+                result = evaluate(documents, vectors, labels, label_spans, question_vectors, index_type,
+                                  args.scope, ks, packer)
+                ingest_seconds = chunk_seconds + embed_seconds + result["build_s"]
+                for k in ks:
+                    row = {
+                        "chunk_size": chunk_size, "chunk_overlap": overlap, "index_type": index_type,
+                        "resolved_index_type": result["index_type"], "k": k,
+                        "recall": round(result["recall"][k], 4), "mrr": round(result["mrr"], 4),
+                        "context_tokens": round(result["context_tokens"][k], 1), "chunks": chunk_count,
+                        "index_bytes": result["index_bytes"], "ingest_s": round(ingest_seconds, 3)
+                    }
+                    rows.append(row)
+                    print(f"{chunk_size:>6}{overlap:>8}  {result['index_type']:<10}{k:>3}{row['recall']:>10.3f}"
+                          f"{row['mrr']:>7.3f}{row['context_tokens']:>12.0f}{chunk_count:>8}"
+                          f"{row['index_bytes'] / 1024:>10.0f}{ingest_seconds:>10.2f}")
+
+    passing = [row for row in rows if row["recall"] >= args.min_recall]
+    best = min(passing, key=lambda row: (row["context_tokens"], row["index_bytes"], row["ingest_s"]), default=None)
+    if best:
+        print(f"cheapest with recall@k >= {args.min_recall}: CHUNK_SIZE={best['chunk_size']} "
+              f"CHUNK_OVERLAP={best['chunk_overlap']} MAX_RETRIEVED_CHUNKS={best['k']} INDEX_TYPE={best['index_type']} "
+              f"(recall {best['recall']:.3f}, {best['context_tokens']:.0f} context tokens)")
+    else:
+        print(f"no configuration reaches recall@k >= {args.min_recall}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "questions": len(labels), "rows": rows, "recommended": best}, f, indent=2)
+        print(f"results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Import-time and cold-start benchmark for the backend package.
+
+Fails (exit code 1) when `import backend` pulls in a heavy dependency, when the
+import takes longer than --max-import-ms, or when /api/health does not answer
+within --max-startup-s of launching backend_server.py.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+HEAVY_MODULES = ["torch", "sentence_transformers", "langchain", "faiss", "fitz", "openai"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"import_ms": elapsed * 1000, "heavy": heavy}}))
+"""
+
+def bench_env():
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    return env
+
+def measure_import() -> dict:
+    probe = IMPORT_PROBE.format(heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=APP_DIR, env=bench_env(), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_startup(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "backend_server.py", "--host", "127.0.0.1", "--port", str(port)], cwd=APP_DIR, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=0.5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"/api/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=500.0)
+    parser.add_argument("--max-startup-s", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    startups = [measure_startup() for _ in range(args.runs)]
+    heavy = sorted({m for run in imports for m in run["heavy"]})
+
+    results = {
+        "import_ms_median": statistics.median(run["import_ms"] for run in imports),
+        "startup_s_median": statistics.median(startups),
+        "startup_s_max": max(startups),
+        "heavy_modules_imported": heavy,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import backend      : {results['import_ms_median']:.1f} ms (median of {args.runs})")
+        print(f"first /api/health   : {results['startup_s_median']:.3f} s median, {results['startup_s_max']:.3f} s max")
+        print(f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported eagerly: {heavy}")
+    if results["import_ms_median"] > args.max_import_ms:
+        failures.append(f"import took {results['import_ms_median']:.1f} ms > {args.max_import_ms} ms")
+    if results["startup_s_median"] > args.max_startup_s:
+        failures.append(f"startup took {results['startup_s_median']:.3f} s > {args.max_startup_s} s")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Time-to-first-token vs. full-generation latency against the fake LLM server.
+
+Runs LLMInterface.generate_answer and LLMInterface.stream_answer against a local
+FakeLLMServer with scripted latency and reports how soon the first token of a
+streamed answer arrives compared with the blocking call.
+
+    python benchmarks/bench_streaming.py --first-token-latency 0.3 --token-latency 0.02
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from backend.fake_llm import FakeLLMServer
+from backend.llm import LLMInterface
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with FakeLLMServer(first_token_latency=args.first_token_latency, token_latency=args.token_latency) as server:
+        llm = LLMInterface("benchmark", "fake", base_url=server.base_url)
+        blocking, first_token, streamed = [], [], []
+
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            llm.generate_answer("context", "question")
+            blocking.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            tokens = llm.stream_answer("context", "question")
+            next(tokens)
+            first_token.append(time.perf_counter() - start)
+            for _ in tokens:
+                pass
+            streamed.append(time.perf_counter() - start)
+
+    print(f"blocking answer     : {statistics.median(blocking) * 1000:.1f} ms median")
+    print(f"stream first token  : {statistics.median(first_token) * 1000:.1f} ms median")
+    print(f"stream full answer  : {statistics.median(streamed) * 1000:.1f} ms median")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Query throughput of the backend with 1..N worker processes.
+
+Starts backend_server.py with each --workers value against a fake LLM
+endpoint and a throwaway data directory, ingests one bundled PDF, then fires
+concurrent /api/query requests and reports queries/s, p50/p99 latency and
+the speed-up over a single worker. The answer cache is disabled so every
+query is embedded, searched and sent to the (fake) LLM.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --concurrency 32 --queries 1000
+"""
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+
+from bench_startup import free_port
+from common import APP_DIR, SAMPLE_QUESTIONS, bundled_pdfs, percentile
+
+from backend.fake_llm import FakeLLMServer
+
+def start_backend(workers: int, data_dir: str, llm_url: str, timeout: float = 120.0, extra_env: Optional[dict] = None):
+    port = free_port()
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.update({
+        "LLM_BASE_URL": llm_url,
+        "VECTOR_STORE_PATH": os.path.join(data_dir, "index"),
+        "UPLOAD_PATH": os.path.join(data_dir, "uploads"),
+        "PROCESSED_PATH": os.path.join(data_dir, "processed"),
+        "CACHE_PATH": os.path.join(data_dir, "cache"),
+        "ANSWER_CACHE_ENABLED": "0",
+        **(extra_env or {})
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "backend_server.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/health", timeout=0.5).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"backend with {workers} workers did not start within {timeout}s")
+
+def run(url: str, document_id: str, concurrency: int, total: int):
+    questions = list(itertools.islice(itertools.cycle(SAMPLE_QUESTIONS), total))
+    session = requests.Session()
+
+    def timed(question):
+        start = time.perf_counter()
+        response = session.post(f"{url}/api/query", data={"question": question, "document_id": document_id})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    # Warm every worker's embedding model before measuring
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, questions[:concurrency * 2]))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, questions))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, percentile(latencies, 50), percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    pdf_path = bundled_pdfs()[0]
+    print(f"document: {os.path.basename(pdf_path)}, {args.concurrency} concurrent clients, {args.queries} queries")
+    print(f"{'workers':<10}{'queries/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'speed-up':>10}")
+
+    baseline = None
+    with FakeLLMServer(answer="Benchmark answer.") as llm, tempfile.TemporaryDirectory() as data_dir:
+        for workers in (int(w) for w in args.workers.split(",")):
+            proc, url = start_backend(workers, data_dir, llm.base_url)
+            try:
+                with open(pdf_path, "rb") as f:
+                    upload = requests.post(f"{url}/api/upload", data={"wait": "true"},
+                                           files={"file": (os.path.basename(pdf_path), f, "application/pdf")}).json()
+                qps, p50, p99 = run(url, upload["document_id"], args.concurrency, args.queries)
+            finally:
+                proc.terminate()
+                proc.wait()
+            baseline = baseline or qps
+            print(f"{workers:<10}{qps:>12.1f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}{qps / baseline:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Shared helpers for the benchmark scripts: bundled PDFs, sample questions and percentiles."""
+import glob
+import math
+import os
+import sys
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, "app")
+UPLOADS_DIR = os.path.join(APP_DIR, "data", "uploads")
+
+if APP_DIR not in sys.path:
+    sys.path.append(APP_DIR)
+
+SAMPLE_QUESTIONS = [
+    "What is the main topic of this document?",
+    "Summarize the key points in bullet format",
+    "What are the main conclusions mentioned?",
+    "List all important dates mentioned",
+    "What methodology was used?",
+    "Who are the main authors or contributors?",
+    "What are the key findings?",
+    "What recommendations are provided?",
+    "Are there any limitations mentioned?",
+    "What is the scope of this document?",
+]
+
+def bundled_pdfs() -> List[str]:
+    return sorted(glob.glob(os.path.join(UPLOADS_DIR, "*.pdf")))
+
+def load_chunks(chunk_size: int = 500, chunk_overlap: int = 50) -> Dict[str, List[str]]:
+    """Chunks of every bundled PDF, keyed by file name"""
+    from backend.chunker import PageChunker
+    from backend.parser import PDFParser
+
+    chunker = PageChunker(chunk_size, chunk_overlap)
+    return {
+        os.path.basename(path): chunker.chunk_pages(PDFParser.iter_pages(path)).texts
+        for path in bundled_pdfs()
+    }
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile, good enough for benchmark reporting"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1
+    return ordered[rank]
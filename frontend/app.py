@@ -1,12 +1,11 @@
 import streamlit as st
 import requests
 import json
-import time
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from utils import formatResult, chatBubble, backendActivity
+from utils import formatResult, chatBubble, backendActivity, streamEvents
 from config import Config
 
 st.set_page_config(page_title="InferaRead - RAG PDF Query System",page_icon="",layout="wide",initial_sidebar_state="expanded")
@@ -112,6 +111,8 @@ if 'document_uploaded' not in st.session_state:
     st.session_state.document_uploaded = False
 if 'current_document' not in st.session_state:
     st.session_state.current_document = None
+if 'document_id' not in st.session_state:
+    st.session_state.document_id = None
 if 'query_count' not in st.session_state:
     st.session_state.query_count = 0
 if 'upload_stats' not in st.session_state:
@@ -254,14 +255,23 @@ def main():
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                response_times = [len(chat['response']) / 100 for chat in st.session_state.chat_history]
-                fig = px.line(
-                    x=list(range(1, len(response_times) + 1)),
-                    y=response_times,
-                    title="Response Complexity Over Time",
-                    labels={'x': 'Query Number', 'y': 'Response Complexity Score'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                # per-stage timings reported by the backend with every answer
+                stage_times = pd.DataFrame([
+                    {'Query Number': i, 'Stage': stage, 'Milliseconds': chat['timings'].get(f'{stage}_ms', 0)}
+                    for i, chat in enumerate(st.session_state.chat_history, 1) if chat.get('timings')
+                    for stage in ['embed', 'retrieve', 'context', 'generate']
+                ])
+                if not stage_times.empty:
+                    fig = px.bar(
+                        stage_times,
+                        x='Query Number',
+                        y='Milliseconds',
+                        color='Stage',
+                        title="Response Time Breakdown"
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("Response time breakdowns will appear here once the backend reports timings.")
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
@@ -354,96 +364,139 @@ def main():
 
 def uploadDocx(uploaded_file):
     try:
-        with st.spinner("Uploading and processing the relevant Chunks..."):
-            files = {"file": (uploaded_file.name, uploaded_file.getvalue(), "application/pdf")}
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            for i in range(0, 101, 20):
-                progress_bar.progress(i)
-                if i == 0:
-                    status_text.text("Uploading file...")
-                elif i == 20:
-                    status_text.text("Extracting text...")
-                elif i == 40:
-                    status_text.text("Creating embeddings...")
-                elif i == 60:
-                    status_text.text("Building vector store...")
-                elif i == 80:
-                    status_text.text("Finalizing...")
-                time.sleep(0.5)
-            
-            response = requests.post(f"{Config.BACKEND_URL}/api/upload", files=files, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result['status'] == 'success':
-                    st.session_state.document_uploaded = True
-                    st.session_state.current_document = uploaded_file.name
-                    st.session_state.upload_stats = {
-                        'chunks': result.get('chunks_created', 0),
-                        'text_length': result.get('text_length', 0),
-                        'upload_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    
-                    progress_bar.progress(100)
-                    status_text.text("Processing complete!")
-                    
-                    st.success(f"""**Document processed successfully!**
-                    - **File:** {uploaded_file.name}
-                    - **Chunks Created:** {result.get('chunks_created', 0)}
-                    - **Text Length:** {result.get('text_length', 0):,} characters
-                    You can now start asking questions about your document!""")
-                else:
-                    st.error(f"Upload failed: {result.get('message', 'Unknown error')}")
-            else:
-                st.error(f"Server error: {response.status_code}")
-                
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        status_text.text("Uploading file...")
+
+        # hand requests the buffer itself rather than a getvalue() copy of it
+        uploaded_file.seek(0)
+        files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
+        response = requests.post(f"{Config.BACKEND_URL}/api/upload", files=files, timeout=Config.UPLOAD_TIMEOUT)
+        if response.status_code == 413:
+            st.error(f"Upload rejected: {response.json().get('message', 'file too large')}")
+            return
+        if response.status_code not in (200, 202):
+            st.error(f"Server error: {response.status_code}")
+            return
+
+        result = response.json()
+        if result['status'] == 'accepted':
+            # the backend ingests in the background; follow the job's real progress until it finishes
+            job = result
+            events = requests.get(f"{Config.BACKEND_URL}/api/jobs/{result['job_id']}/events", stream=True, timeout=(5, Config.UPLOAD_TIMEOUT))
+            for job in streamEvents(events):
+                progress_bar.progress(int(job.get('progress', 0) * 100))
+                status_text.text(jobStatus(job))
+            result = job.get('result') or {"status": "error", "message": job.get('message', 'Ingestion did not finish')}
+
+        if result['status'] == 'success':
+            st.session_state.document_uploaded = True
+            st.session_state.current_document = uploaded_file.name
+            st.session_state.document_id = result.get('document_id')
+            st.session_state.upload_stats = {
+                'chunks': result.get('chunks_created', 0),
+                'text_length': result.get('text_length', 0),
+                'upload_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+            progress_bar.progress(100)
+            status_text.text("Processing complete!")
+
+            st.success(f"""**Document processed successfully!**
+            - **File:** {uploaded_file.name}
+            - **Chunks Created:** {result.get('chunks_created', 0)}
+            - **Text Length:** {result.get('text_length', 0):,} characters
+            You can now start asking questions about your document!""")
+        else:
+            st.error(f"Upload failed: {result.get('message', 'Unknown error')}")
+
     except requests.exceptions.Timeout:
         st.error("Upload timeout. Please try again with a smaller file.")
     except Exception as e:
         st.error(f"Upload error: {str(e)}")
 
+def jobStatus(job):
+    # one status line per ingestion stage, with the job's page and chunk counters
+    stage = job.get('stage')
+    if stage == 'queued':
+        return "Waiting for a free ingestion slot..."
+    if stage == 'extracting':
+        return (f"Parsed {job.get('pages_parsed', 0)}/{job.get('pages_total', 0)} pages, "
+                f"embedded {job.get('chunks_embedded', 0)}/{job.get('chunks_total', 0)} chunks "
+                f"({job.get('chunks_per_second', 0)} chunks/s)...")
+    if stage == 'indexing':
+        return "Building vector store..."
+    if stage == 'done':
+        return "Processing complete!"
+    if stage == 'cancelled':
+        return "Processing cancelled"
+    return "Processing failed"
+
 def process_query(query, complexity="Simple", max_sources=5):
     try:
         with st.spinner("Thinking..."):
             data = {"question": query}
-            response = requests.post(f"{Config.BACKEND_URL}/api/query", data=data, timeout=15)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result['status'] == 'success':
-                    chat_entry = {
-                        'query': query,
-                        'response': result['answer'],
-                        'sources': result.get('sources', 0),
-                        'document': result.get('document', 'Unknown'),
-                        'timestamp': datetime.now().strftime('%H:%M:%S')
-                    }
-                    st.session_state.chat_history.append(chat_entry)
-                    st.session_state.query_count += 1
-                    st.success("**Query processed successfully!**")
-                    
-                    col1, col2 = st.columns([3, 1])
-                    
-                    with col1:
-                        st.markdown("### Response:")
-                        st.markdown(f"""
-                        <div style="background-color: #f8f9fa; padding: 1rem; border-radius: 10px; border-left: 4px solid #007bff;">
-                            {result['answer']}
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown("### Details:")
-                        st.info(f"**Sources Used:** {result.get('sources', 0)}")
-                        st.info(f"**Document:** {result.get('document', 'Unknown')}")
-                        st.info(f"**Time:** {datetime.now().strftime('%H:%M:%S')}")
-                else:
-                    st.error(f"Query failed: {result.get('message', 'Unknown error')}")
-            else:
-                st.error(f"Server error: {response.status_code}")
-                
+            if st.session_state.document_id:
+                data["document_id"] = st.session_state.document_id
+            response = requests.post(f"{Config.BACKEND_URL}/api/query/stream", data=data, stream=True, timeout=(5, Config.REQUEST_TIMEOUT))
+
+        if response.status_code != 200:
+            st.error(f"Server error: {response.status_code}")
+            return
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown("### Response:")
+            answer_box = st.empty()
+
+        answer = ""
+        result = {}
+        timings = {}
+        for event in streamEvents(response):
+            if event['event'] == 'start':
+                result = event
+            elif event['event'] == 'token':
+                # render tokens as they arrive so the first words show up right away
+                answer += event['content']
+                answer_box.markdown(f"""
+                <div style="background-color: #f8f9fa; padding: 1rem; border-radius: 10px; border-left: 4px solid #007bff;">
+                    {answer}
+                </div>
+                """, unsafe_allow_html=True)
+            elif event['event'] == 'done':
+                timings = event.get('timings', {})
+            elif event['event'] == 'error':
+                st.error(f"Query failed: {event.get('message', 'Unknown error')}")
+                return
+
+        chat_entry = {
+            'query': query,
+            'response': answer.strip(),
+            'sources': result.get('sources', 0),
+            'document': result.get('document', 'Unknown'),
+            'timings': timings,
+            'timestamp': datetime.now().strftime('%H:%M:%S')
+        }
+        st.session_state.chat_history.append(chat_entry)
+        st.session_state.query_count += 1
+
+        with col2:
+            st.markdown("### Details:")
+            st.info(f"**Sources Used:** {result.get('sources', 0)}")
+            st.info(f"**Document:** {result.get('document', 'Unknown')}")
+            if result.get('pages'):
+                st.info(f"**Pages:** {', '.join(str(page) for page in result['pages'])}")
+            st.info(f"**Time:** {datetime.now().strftime('%H:%M:%S')}")
+            if 'total_ms' in timings:
+                st.info(f"**Latency:** {timings['total_ms']:.0f} ms ({timings.get('generate_ms', 0):.0f} ms in the LLM)")
+            if result.get('cached'):
+                st.info(f"**Cache:** {result.get('cache_tier', 'exact')} hit")
+            if result.get('gated'):
+                st.info("**Relevance Gate:** question is outside the document, answered without the LLM")
+            if 'tokens_sent' in result:
+                st.info(f"**Prompt Tokens:** {result['tokens_sent']} sent, {result.get('tokens_saved', 0)} saved")
+        st.success("**Query processed successfully!**")
+
     except requests.exceptions.Timeout:
         st.error("Query timeout. Please try again.")
     except Exception as e:
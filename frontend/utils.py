@@ -2,7 +2,7 @@ import requests
 import streamlit as st
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from config import Config
 
 def backendActivity() -> Dict[str, Any]:
@@ -63,12 +63,18 @@ def chatBubble(message: str, is_user: bool = True, timestamp: str = None) -> str
         """
         # the above if else is used to create a chat bubble for the user and the bot, with different styles and alignments. If the message is from the user, it will be aligned to the right with a blue background, and if it is from the bot, it will be aligned to the left with a light gray background.
 
+def streamEvents(response) -> Iterator[Dict[str, Any]]:
+    # parses the server-sent events of /api/query/stream and /api/jobs/{id}/events, one JSON payload per "data:" line
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
 def fileUpload(uploaded_file) -> Dict[str, Any]:
     if uploaded_file is None:
         return {"valid": False, "error": "No file uploaded"}
     if not uploaded_file.name.lower().endswith('.pdf'):
         return {"valid": False, "error": "Only PDF files are supported"}
-    fileSize = len(uploaded_file.getvalue()) / (1024 * 1024)
+    fileSize = uploaded_file.size / (1024 * 1024)  # size is known up front, no need to copy the bytes
     if fileSize > Config.MAX_FILE_SIZE_MB:
         return {"valid": False, "error": f"File size ({fileSize:.1f}MB) exceeds limit ({Config.MAX_FILE_SIZE_MB}MB)"}
     return {"valid": True, "size_mb": fileSize}
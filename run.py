@@ -14,7 +14,7 @@ class InferaReadRunner:
         
     def check_requirements(self):
         print("Checking requirements...")
-        backend_files = ["app/model.ipynb",".env"]
+        backend_files = ["app/backend_server.py","app/backend/__init__.py",".env"]
         for file_path in backend_files:
             if not (self.project_root / file_path).exists():
                 print(f"Missing required file: {file_path}")
@@ -33,8 +33,6 @@ class InferaReadRunner:
         print("Starting backend server...")
         try:
             backend_script = self.project_root / "app" / "backend_server.py"
-            if not backend_script.exists():
-                self.backendScript()
             self.backend_process = subprocess.Popen([sys.executable, str(backend_script)], cwd=self.project_root / "app")
             time.sleep(3)
             
@@ -45,29 +43,6 @@ class InferaReadRunner:
             print(f"Failed to start backend: {e}")
             return False
     
-    def backendScript(self):
-        backend_script_content = '''
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        import subprocess
-        import time
-
-        print("Starting backend server from notebook code...")
-        print("Please ensure your model.ipynb is running or convert it to a .py file")
-        print("Backend should be available at http://localhost:8000")
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("Backend server stopped.")
-        '''
-        backend_script = self.project_root / "app" / "backend_server.py"
-        with open(backend_script, 'w') as f:
-            f.write(backend_script_content)
-        
-        print("Created backend server script. Please ensure your Jupyter notebook is running!")
-    
     def frontend(self):
         print("Starting frontend application...")
         try:
@@ -100,11 +75,7 @@ class InferaReadRunner:
                 return
 
             print("\n Starting services...")
-            print("\n  IMPORTANT: Make sure to run your Jupyter notebook (model.ipynb) first!")
-            print(" The notebook contains the backend server code.")
-            print("Press Enter when the notebook is running...")
-            input()
-            if self.frontend():
+            if self.backend() and self.frontend():
                 print("\n InferaRead is now running!")
                 print("\n Access URLs:")
                 print("   • Backend API: http://localhost:8000")
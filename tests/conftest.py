@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, "app")
+UPLOADS_DIR = os.path.join(APP_DIR, "data", "uploads")
+BENCHMARKS_DIR = os.path.join(ROOT_DIR, "benchmarks")
+
+sys.path.insert(0, APP_DIR)
+# The benchmark scripts import their helpers as top-level modules
+sys.path.append(BENCHMARKS_DIR)
+
+def bundled_pdf(name: str) -> str:
+    return os.path.join(UPLOADS_DIR, name)
+
+def upload_pdf(client, name: str = "AkshatRajSaxenaResume.pdf", **form) -> dict:
+    """Upload a bundled PDF through the API, by default waiting for its ingestion"""
+    with open(bundled_pdf(name), "rb") as f:
+        response = client.post("/api/upload", files={"file": (name, f, "application/pdf")}, data={"wait": "true", **form})
+    return response.json()
+
+def sse_events(body: str) -> list:
+    """Payloads of the `data:` lines of a server-sent event stream"""
+    return [json.loads(line[len("data:"):]) for line in body.splitlines() if line.startswith("data:")]
+
+@pytest.fixture
+def app_env(tmp_path, monkeypatch):
+    """Config environment with a throwaway data directory and the model-free embedding backend"""
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_BASE_URL", "http://127.0.0.1:9/v1")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    for name in ("VECTOR_STORE_PATH", "UPLOAD_PATH", "PROCESSED_PATH", "CACHE_PATH"):
+        monkeypatch.setenv(name, str(tmp_path / name.lower()))
+    return tmp_path
+
+@pytest.fixture
+def fake_llm(app_env, monkeypatch):
+    """Local OpenAI-compatible server that the app's LLM calls go to, without retries or warm-up"""
+    from backend.fake_llm import FakeLLMServer
+
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+    monkeypatch.setenv("INGEST_EXECUTOR", "thread")
+    monkeypatch.setenv("WARMUP_ON_STARTUP", "0")
+    with FakeLLMServer(seed=0) as server:
+        monkeypatch.setenv("LLM_BASE_URL", server.base_url)
+        yield server
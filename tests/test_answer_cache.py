@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("numpy")
+
+from backend.answer_cache import AnswerCache
+
+SCOPE = ("a" * 64, 1)
+RESPONSE = {"status": "success", "answer": "Forty-two"}
+
+def never_embed():
+    raise AssertionError("the exact tier must not embed")
+
+def test_exact_hit_ignores_case_spacing_and_trailing_punctuation():
+    cache = AnswerCache()
+    cache.put(SCOPE, "What is the answer?", RESPONSE, [1.0, 0.0])
+
+    cached, vector = cache.get(SCOPE, "  what IS the   answer ", never_embed)
+    assert cached == {**RESPONSE, "cache_tier": "exact"}
+    assert vector is None
+    assert cache.stats()["exact_hits"] == 1
+
+def test_semantic_hit_reuses_a_near_duplicate_and_returns_the_vector():
+    cache = AnswerCache(similarity_threshold=0.95)
+    cache.put(SCOPE, "What is the answer?", RESPONSE, [1.0, 0.0])
+
+    cached, vector = cache.get(SCOPE, "Tell me the answer", lambda: [0.99, 0.05])
+    assert cached == {**RESPONSE, "cache_tier": "semantic"}
+    assert vector == [0.99, 0.05]
+
+    cached, vector = cache.get(SCOPE, "Something unrelated", lambda: [0.0, 1.0])
+    assert cached is None
+    assert vector == [0.0, 1.0]
+    assert cache.stats() == {"entries": 1, "exact_hits": 0, "semantic_hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_similarity_zero_disables_the_semantic_tier():
+    cache = AnswerCache(similarity_threshold=0)
+    cache.put(SCOPE, "What is the answer?", RESPONSE, [1.0, 0.0])
+    assert cache.get(SCOPE, "Tell me the answer", never_embed) == (None, None)
+
+def test_answers_are_scoped_to_the_index_version():
+    cache = AnswerCache()
+    cache.put(SCOPE, "What is the answer?", RESPONSE, [1.0, 0.0])
+
+    newer = (SCOPE[0], SCOPE[1] + 1)
+    assert cache.get(newer, "What is the answer?", lambda: [1.0, 0.0])[0] is None
+
+def test_invalidate_drops_every_version_of_a_document():
+    cache = AnswerCache()
+    other = ("b" * 64, 1)
+    cache.put(SCOPE, "What is the answer?", RESPONSE, [1.0, 0.0])
+    cache.put((SCOPE[0], 2), "What is the answer?", RESPONSE, [1.0, 0.0])
+    cache.put(other, "What is the answer?", RESPONSE, [1.0, 0.0])
+
+    cache.invalidate(SCOPE[0])
+    assert cache.get(SCOPE, "What is the answer?", lambda: [1.0, 0.0])[0] is None
+    assert cache.get((SCOPE[0], 2), "What is the answer?", lambda: [1.0, 0.0])[0] is None
+    assert cache.get(other, "What is the answer?", never_embed)[0] is not None
+
+def test_expired_and_least_recently_used_entries_are_dropped(monkeypatch):
+    from types import SimpleNamespace
+
+    import backend.answer_cache as answer_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = AnswerCache(max_entries=2, ttl_seconds=10)
+    cache.put(SCOPE, "first", RESPONSE, [1.0, 0.0])
+    cache.put(SCOPE, "second", RESPONSE, [0.0, 1.0])
+    cache.get(SCOPE, "first")
+    cache.put(SCOPE, "third", RESPONSE, [0.7, 0.7])
+
+    assert cache.get(SCOPE, "second")[0] is None
+    assert cache.get(SCOPE, "first")[0] is not None
+
+    now[0] += 11
+    assert cache.get(SCOPE, "first", lambda: [1.0, 0.0])[0] is None
+    assert cache.stats()["entries"] == 1
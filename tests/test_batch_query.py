@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from conftest import upload_pdf
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+pytest.importorskip("fitz")
+pytest.importorskip("langchain")
+
+QUESTIONS = [
+    "Which programming languages are listed?",
+    "Where did the candidate study?",
+    "which programming languages are listed",
+]
+
+@pytest.fixture
+def client(fake_llm, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+
+    monkeypatch.setenv("RELEVANCE_GATE_ENABLED", "0")
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "0")
+    with TestClient(create_app()) as client:
+        assert upload_pdf(client)["status"] == "success"
+        yield client
+
+def batch(client, questions, **body) -> list:
+    response = client.post("/api/query/batch", json={"questions": questions, **body})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+def test_one_line_per_question_then_a_summary(client, fake_llm):
+    served = fake_llm.requests_served
+    lines = batch(client, QUESTIONS, concurrency=2)
+
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    for result in results:
+        assert result["question"] == QUESTIONS[result["index"]]
+        assert result["status"] == "success"
+        assert result["answer"] == fake_llm.answer
+        assert result["sources"] > 0
+
+    assert summary["summary"] is True
+    assert summary["questions"] == 3
+    assert summary["unique_questions"] == 2
+    assert summary["succeeded"] == 3 and summary["failed"] == 0
+    # The repeated question is answered once
+    assert fake_llm.requests_served - served == 2
+
+def test_llm_errors_are_reported_per_question(client, fake_llm):
+    fake_llm.error_rate = 1.0
+    lines = batch(client, QUESTIONS[:2])
+
+    assert [line["status"] for line in lines[:-1]] == ["error", "error"]
+    assert lines[-1]["succeeded"] == 0 and lines[-1]["failed"] == 2
+
+@pytest.mark.parametrize("body", [{"questions": []}, {"questions": ["hi"], "concurrency": 0}])
+def test_invalid_batches_are_rejected(client, body):
+    assert client.post("/api/query/batch", json=body).status_code == 400
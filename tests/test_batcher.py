@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.batcher import QueryBatcher
+from backend.retriever import Retriever
+
+class CountingEmbedder:
+    """Embeds a text as [len(text)] and records every embedding pass"""
+
+    def __init__(self):
+        self.passes = []
+
+    def embed_documents(self, texts):
+        self.passes.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+class RecordingStore:
+    """Vector store stand-in whose hits echo the query vector"""
+
+    def __init__(self):
+        self.searches = []
+
+    def batch_search(self, vectors, k):
+        self.searches.append(len(vectors))
+        return [[(f"doc {vector[0]:.0f} #{i}", float(i)) for i in range(k)] for vector in vectors]
+
+def test_query_vector_and_hits_come_from_one_batch():
+    embedder, store = CountingEmbedder(), RecordingStore()
+    batcher = QueryBatcher(embedder, max_batch_size=4, max_wait_ms=1)
+
+    retrieval = Retriever(store, None, batcher).embed_and_retrieve("four", k=2)
+    assert retrieval.vector == [4.0]
+    assert retrieval.hits == [("doc 4 #0", 0.0), ("doc 4 #1", 1.0)]
+    assert retrieval.embed_seconds >= 0 and retrieval.search_seconds >= 0
+    assert batcher.batches == 1
+    assert embedder.passes == [["four"]]
+    assert store.searches == [1]
+
+def test_concurrent_queries_share_one_embedding_pass_and_search():
+    embedder, store = CountingEmbedder(), RecordingStore()
+    batcher = QueryBatcher(embedder, max_batch_size=8, max_wait_ms=500)
+    questions = ["a", "bb", "ccc", "dddd"]
+    results = {}
+
+    def ask(question):
+        results[question] = batcher.embed_and_search(store, question, 1)
+
+    threads = [threading.Thread(target=ask, args=(question,)) for question in questions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert batcher.batches == 1
+    assert sorted(embedder.passes[0]) == questions
+    assert store.searches == [4]
+    assert {question: result.vector for question, result in results.items()} == {q: [float(len(q))] for q in questions}
+
+def test_full_batch_is_processed_without_waiting_for_the_window():
+    embedder, store = CountingEmbedder(), RecordingStore()
+    batcher = QueryBatcher(embedder, max_batch_size=2, max_wait_ms=60_000)
+    results = []
+    threads = [threading.Thread(target=lambda q=q: results.append(batcher.search(store, q, 1))) for q in ("x", "yy")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(results) == 2
+    assert batcher.batches == 1
+
+def test_lone_query_is_flushed_when_the_window_closes():
+    embedder = CountingEmbedder()
+    batcher = QueryBatcher(embedder, max_batch_size=16, max_wait_ms=20)
+    assert batcher.embed("solo") == [4.0]
+    assert batcher.embed("again") == [5.0]
+    assert batcher.batches == 2
+    assert batcher.stats()["avg_batch_size"] == 1.0
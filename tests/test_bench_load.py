@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("requests")
+
+import bench_load
+from common import SAMPLE_QUESTIONS
+
+from backend.metrics import MetricsRegistry
+from backend.relevance import OFF_TOPIC_QUESTIONS
+
+def test_parse_mix_defaults_weights_to_one():
+    assert bench_load.parse_mix("repeat=3,offtopic") == {"repeat": 3.0, "offtopic": 1.0}
+    with pytest.raises(SystemExit):
+        bench_load.parse_mix("repeat,random=2")
+
+def test_questions_follow_the_mix_and_the_seed():
+    mix = {"repeat": 1, "unique": 1, "offtopic": 1, "file": 0}
+    questions = bench_load.make_questions(mix, 300, ["from a file"], seed=7)
+
+    assert questions == bench_load.make_questions(mix, 300, ["from a file"], seed=7)
+    assert {source for source, _ in questions} == {"repeat", "unique", "offtopic"}
+    for source, question in questions:
+        if source == "repeat":
+            assert question in SAMPLE_QUESTIONS
+        elif source == "offtopic":
+            assert question in OFF_TOPIC_QUESTIONS
+    unique = [question for source, question in questions if source == "unique"]
+    assert len(set(unique)) == len(unique)
+
+def test_distinct_copies_change_the_bytes_only_after_the_first():
+    data = b"%PDF-1.4\n%%EOF"
+    assert bench_load.distinct_copy(data, 0) == data
+    copies = {bench_load.distinct_copy(data, copy) for copy in range(1, 4)}
+    assert len(copies) == 3 and all(copy.startswith(data) for copy in copies)
+
+def test_server_stage_means_reads_the_histograms(monkeypatch):
+    registry = MetricsRegistry()
+    stages = registry.histogram("rag_stage_duration_seconds", "Stage time", ("pipeline", "stage"))
+    stages.observe(0.01, pipeline="query", stage="embed")
+    stages.observe(0.03, pipeline="query", stage="embed")
+    stages.observe(1.5, pipeline="ingest", stage="parse")
+    monkeypatch.setattr(bench_load.requests, "get", lambda url: SimpleNamespace(text=registry.render()))
+
+    assert bench_load.server_stage_means("http://backend") == {"ingest:parse": 1500.0, "query:embed": 20.0}
+
+def results(pages_per_second, levels):
+    return {
+        "ingestion": {"pages_per_second": pages_per_second},
+        "queries": [{"concurrency": c, "throughput_qps": qps, "p95_ms": p95, "p99_ms": p95 * 2} for c, qps, p95 in levels]
+    }
+
+def test_compare_flags_regressions_beyond_the_tolerance():
+    baseline = results(100, [(1, 10, 50), (8, 40, 120)])
+
+    assert bench_load.compare(results(95, [(1, 9.5, 54), (8, 40, 120)]), baseline, 0.1) == []
+    failures = bench_load.compare(results(80, [(1, 10, 50), (8, 40, 150), (32, 1, 9999)]), baseline, 0.1)
+    assert failures == [
+        "ingestion: pages_per_second 100 -> 80 (-20.0%)",
+        "concurrency 8: p95_ms 120 -> 150 (+25.0%)",
+        "concurrency 8: p99_ms 240 -> 300 (+25.0%)",
+    ]
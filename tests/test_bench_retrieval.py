@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("backend")
+
+import bench_retrieval
+
+from backend.chunker import PageChunker
+
+PAGES = [
+    (1, "The parser keeps page offsets for every chunk it returns. Short one."),
+    (2, "Retrieval quality is scored against labeled sentence spans on each page. "
+        "Every configuration is evaluated with the same labels, whatever its chunking."),
+]
+
+def test_page_offsets_match_the_joined_text():
+    offsets = bench_retrieval.page_offsets(PAGES)
+    text = PageChunker.PAGE_SEPARATOR.join(page for _, page in PAGES)
+    assert offsets == {1: 0, 2: len(PAGES[0][1]) + len(PageChunker.PAGE_SEPARATOR)}
+    assert text[offsets[2]:].startswith("Retrieval quality")
+
+def test_labels_are_long_sentences_with_their_page_spans():
+    labels = bench_retrieval.make_labels({"doc.pdf": PAGES}, per_file=10, question_words=4, seed=0)
+    pages = dict(PAGES)
+
+    # "Short one." has fewer than eight words
+    assert len(labels) == 3
+    for label in labels:
+        sentence = pages[label["page"]][label["start"]:label["end"]]
+        assert sentence[0].isupper() and sentence.endswith(".")
+        assert label["file"] == "doc.pdf" and label["question"]
+    assert labels == bench_retrieval.make_labels({"doc.pdf": PAGES}, per_file=10, question_words=4, seed=0)
+
+def test_chunk_spans_point_into_the_joined_text():
+    documents = bench_retrieval.chunk_documents(PageChunker(60, 10), {"doc.pdf": PAGES})
+    texts, spans = documents["doc.pdf"]
+    joined = PageChunker.PAGE_SEPARATOR.join(page for _, page in PAGES)
+
+    assert len(texts) > 1
+    for text, (start, end) in zip(texts, spans):
+        assert joined[start:end] == text
+
+@pytest.mark.parametrize("span, label_span, relevant", [
+    ((0, 100), (40, 60), True),    # the chunk covers the passage
+    ((50, 60), (0, 100), True),    # a short chunk inside a long passage
+    ((0, 100), (90, 130), False),  # a quarter of the passage
+    ((0, 10), (20, 30), False),
+])
+def test_relevance_needs_half_of_the_shorter_span(span, label_span, relevant):
+    assert bench_retrieval.is_relevant(span, label_span) is relevant
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.cache import IngestCache
+
+def stored_bytes(cache: IngestCache) -> int:
+    db = sqlite3.connect(cache.path)
+    return db.execute(
+        "SELECT (SELECT COALESCE(SUM(size), 0) FROM extractions) + (SELECT COALESCE(SUM(size), 0) FROM embeddings)"
+    ).fetchone()[0]
+
+def test_running_size_matches_the_tables_through_eviction(tmp_path):
+    cache = IngestCache(str(tmp_path / "cache.sqlite"), max_mb=0.05)
+    for i in range(100):
+        cache.put_vectors([f"chunk {i} {j}" for j in range(5)], [[float(j)] * 96 for j in range(5)], "model")
+        cache.put_text(f"file {i % 7}", "v1", "x" * (100 + 37 * i))
+        assert cache.size_bytes() == stored_bytes(cache)
+        assert cache.size_bytes() <= cache.max_bytes
+    assert cache.stats()["evictions"] > 0
+
+def test_lookups_count_in_memory_until_flushed(tmp_path):
+    cache = IngestCache(str(tmp_path / "cache.sqlite"))
+    cache.put_vectors(["a"], [[1.0, 2.0]], "model")
+    other_process = IngestCache(cache.path)
+
+    assert other_process.get_vectors(["a", "b"], "model") == {IngestCache.chunk_hash("a"): [1.0, 2.0]}
+    assert cache.stats()["embedding_hits"] == 0
+    other_process.flush_counters()
+    stats = cache.stats()
+    assert (stats["embedding_hits"], stats["embedding_misses"]) == (1, 1)
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import bundled_pdf
+
+pytest.importorskip("backend")
+
+from backend.chunker import PageChunker, TextChunker
+
+PDFS = ("AkshatRajSaxenaResume.pdf", "predictionModellingEVS.pdf")
+
+def pdf_pages(name: str):
+    pytest.importorskip("fitz")
+    from backend.parser import PDFParser
+
+    return list(PDFParser.iter_pages(bundled_pdf(name)))
+
+def assert_provenance(batch, pages):
+    """Every chunk's text is found again from its recorded pages and offsets"""
+    texts = dict(pages)
+    for i, chunk in enumerate(batch.texts):
+        first, last = batch.pages[i], batch.end_pages[i]
+        if first == last:
+            assert texts[first][batch.starts[i]:batch.ends[i]] == chunk
+        else:
+            assert chunk.startswith(texts[first][batch.starts[i]:])
+            assert chunk.endswith(texts[last][:batch.ends[i]])
+
+def test_no_repeated_tails_after_paragraph_breaks():
+    chunks = PageChunker(20, 10).chunk_text("aaaa bbbb cccc dddd\n\neeee ffff gggg hhhh iiii")
+    assert chunks == ["aaaa bbbb cccc dddd", "eeee ffff gggg hhhh", "gggg hhhh iiii"]
+
+def test_provenance_across_pages():
+    pages = [(0, "First page.\nIt has two lines"), (1, ""), (2, "The third page " * 10), (3, "  last  ")]
+    batch = PageChunker(40, 10).chunk_pages(pages)
+    assert batch.texts[0] == "First page.\nIt has two lines"
+    assert batch.texts[-1] == "last"
+    assert (batch.pages[-1], batch.starts[-1], batch.ends[-1]) == (3, 2, 6)
+    assert_provenance(batch, pages)
+
+@pytest.mark.parametrize("name", PDFS)
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(500, 50), (200, 0), (1000, 100)])
+def test_matches_text_chunker_on_bundled_pdfs(name, chunk_size, chunk_overlap):
+    pytest.importorskip("langchain")
+    pages = pdf_pages(name)
+    batch = PageChunker(chunk_size, chunk_overlap).chunk_pages(pages)
+    text = PageChunker.PAGE_SEPARATOR.join(text for _, text in pages)
+    assert batch.texts == TextChunker(chunk_size, chunk_overlap).chunk_text(text)
+    assert all(len(chunk) <= chunk_size for chunk in batch.texts)
+    assert_provenance(batch, pages)
+
+@pytest.mark.parametrize("name", PDFS)
+def test_page_ranges_chunk_like_whole_document(name):
+    """Chunking per page range may only differ where a chunk would have spanned the range boundary"""
+    pages = pdf_pages(name)
+    chunker = PageChunker(500, 50)
+    whole = len(chunker.chunk_pages(pages).texts)
+    per_page = sum(len(chunker.chunk_pages([page]).texts) for page in pages)
+    assert abs(per_page - whole) <= len(pages)
@@ -0,0 +1,66 @@
+from typing import NamedTuple
+
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.context import ContextPacker, Tokenizer
+
+class Doc(NamedTuple):
+    """Stands in for a LangChain Document"""
+    page_content: str
+    metadata: dict
+
+def words(prefix: str, n: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+def packer(token_budget: int = 1500) -> ContextPacker:
+    # An unknown encoding makes the tokenizer count words and punctuation, whether or not tiktoken is installed
+    return ContextPacker(token_budget=token_budget, max_overlap=100, tokenizer=Tokenizer("no-such-encoding"))
+
+def test_consecutive_chunks_merge_without_their_overlap():
+    docs = [
+        Doc("alpha beta gamma delta", {"source": "a.pdf", "chunk_id": 0}),
+        Doc("gamma delta epsilon", {"source": "a.pdf", "chunk_id": 1}),
+    ]
+    assert packer().merge_adjacent(docs) == ["alpha beta gamma delta epsilon"]
+
+def test_passages_keep_the_rank_of_their_best_chunk():
+    docs = [
+        Doc("far away chunk", {"source": "a.pdf", "chunk_id": 5}),
+        Doc("first part", {"source": "a.pdf", "chunk_id": 0}),
+        Doc("second part", {"source": "a.pdf", "chunk_id": 1}),
+        Doc("first part", {"source": "a.pdf", "chunk_id": 0}),
+    ]
+    assert packer().merge_adjacent(docs) == ["far away chunk", "first part\nsecond part"]
+
+def test_chunks_of_different_documents_are_not_merged():
+    docs = [Doc("one", {"source": "a.pdf", "chunk_id": 0}), Doc("two", {"source": "b.pdf", "chunk_id": 1})]
+    assert packer().merge_adjacent(docs) == ["one", "two"]
+
+def test_near_duplicate_passages_are_dropped():
+    text = words("w", 40)
+    docs = [Doc(text, {"source": "a.pdf", "chunk_id": 0}), Doc(text + " extra", {"source": "b.pdf", "chunk_id": 0})]
+    packed = packer().pack(docs)
+    assert packed.text == text
+    assert packed.blocks == 1
+    assert packed.duplicates == 1
+    assert packed.naive_tokens == 81
+
+def test_budget_cuts_the_last_passage_or_drops_a_short_tail():
+    docs = [Doc(words("a", 100), {"source": "a.pdf", "chunk_id": 0}), Doc(words("b", 100), {"source": "b.pdf", "chunk_id": 0})]
+
+    packed = packer(token_budget=150).pack(docs)
+    assert packed.tokens == 150
+    assert packed.truncated
+    assert packed.text == words("a", 100) + "\n\n" + words("b", 50)
+
+    packed = packer(token_budget=110).pack(docs)
+    assert packed.tokens == 100
+    assert packed.truncated
+    assert packed.text == words("a", 100)
+
+def test_everything_fits_within_a_large_budget():
+    docs = [Doc(words("a", 10), {"source": "a.pdf", "chunk_id": 0})]
+    packed = packer().pack(docs)
+    assert (packed.tokens, packed.naive_tokens, packed.truncated) == (10, 10, False)
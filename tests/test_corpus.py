@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+
+from backend.corpus import CorpusIndex
+from backend.embedder import Embedder
+
+DOCUMENTS = {
+    "solar": ["solar panels convert sunlight", "photovoltaic cells on rooftops"],
+    "vehicles": ["electric vehicles charge overnight", "battery range of electric cars"],
+    "wind": ["wind turbines spin offshore"],
+}
+
+@pytest.fixture
+def embedder():
+    return Embedder("hashing", backend="hashing")
+
+def add(corpus: CorpusIndex, document_id: str) -> int:
+    chunks = DOCUMENTS[document_id]
+    vectors = corpus.embeddings.embed_documents(chunks)
+    return corpus.add_document(document_id, chunks, vectors, [{"chunk_id": i} for i in range(len(chunks))])
+
+def sources(corpus: CorpusIndex, query: str, k: int = 5):
+    return [doc.metadata["document_id"] for doc in corpus.similarity_search(query, k)]
+
+def test_workers_apply_each_others_updates(tmp_path, embedder):
+    writer = CorpusIndex(str(tmp_path), embedder)
+    reader = CorpusIndex(str(tmp_path), embedder)
+
+    assert add(writer, "solar") == 2
+    assert reader.documents() == {"solar": 2}
+
+    add(writer, "vehicles")
+    assert reader.documents() == {"solar": 2, "vehicles": 2}
+    assert reader.index.ntotal == 4
+    assert sources(reader, "electric vehicles charge", k=1) == ["vehicles"]
+
+    writer.remove_document("vehicles")
+    assert "vehicles" not in sources(reader, "electric vehicles charge")
+    assert len(reader.similarity_search("electric vehicles charge", k=5)) == 2
+
+def test_compaction_starts_a_new_generation(tmp_path, embedder):
+    writer = CorpusIndex(str(tmp_path), embedder, compact_ratio=1.0)
+    reader = CorpusIndex(str(tmp_path), embedder)
+    for document_id in DOCUMENTS:
+        add(writer, document_id)
+    writer.remove_document("solar")
+    assert reader.stats()["tombstones"] == 2
+
+    writer.compact()
+    assert writer.index.ntotal == 3
+    assert reader.stats()["tombstones"] == 0
+    assert reader.index.ntotal == 3
+
+    add(writer, "solar")
+    assert sorted(reader.documents()) == ["solar", "vehicles", "wind"]
+    reopened = CorpusIndex(str(tmp_path), embedder)
+    assert reopened.documents() == reader.documents()
+    assert sources(reopened, "solar panels convert sunlight", k=1) == ["solar"]
+
+def test_document_without_chunks_is_ignored(tmp_path, embedder):
+    corpus = CorpusIndex(str(tmp_path), embedder)
+    assert corpus.add_document("empty", [], [], []) == 0
+    assert corpus.stats()["chunks"] == 0
@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("langchain_core")
+
+from backend.embedder import Embedder
+from backend.embeddings import HashingEmbeddings, create_embeddings
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+def test_hashing_backend_is_deterministic_and_unit_length():
+    embeddings = create_embeddings("hashing", "ignored")
+    assert isinstance(embeddings, HashingEmbeddings)
+
+    vector = embeddings.embed_query("Solar panels convert sunlight")
+    assert len(vector) == 384
+    assert math.isclose(math.sqrt(sum(x * x for x in vector)), 1.0, rel_tol=1e-9)
+    assert embeddings.embed_documents(["Solar panels convert sunlight"]) == [vector]
+
+def test_hashing_vectors_are_closer_for_shared_words():
+    embeddings = HashingEmbeddings()
+    query = embeddings.embed_query("how do solar panels convert sunlight")
+    related = embeddings.embed_query("solar panels convert sunlight into power")
+    unrelated = embeddings.embed_query("bake sourdough bread at home")
+    assert cosine(query, related) > cosine(query, unrelated)
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_embeddings("word2vec", "model")
+
+def test_identity_separates_vector_spaces():
+    assert Embedder("sentence-transformers/all-MiniLM-L6-v2").identity == "sentence-transformers/all-MiniLM-L6-v2"
+    assert Embedder("sentence-transformers/all-MiniLM-L6-v2", backend="onnx-int8").identity == \
+        "onnx-int8:sentence-transformers/all-MiniLM-L6-v2"
+    assert Embedder("anything", backend="hashing").identity == "hashing"
+
+def test_embedder_builds_the_configured_backend_lazily():
+    embedder = Embedder("anything", backend="hashing")
+    assert not embedder.is_loaded
+    assert embedder.embed_documents(["a b", "c"]) == HashingEmbeddings().embed_documents(["a b", "c"])
+    assert embedder.is_loaded
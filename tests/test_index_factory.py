@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.index_factory import (HNSW_THRESHOLD, IVF_PQ_THRESHOLD, IVF_THRESHOLD, choose_index_type, create_index,
+                                   ivf_nlist, pq_subquantizers)
+
+def test_auto_picks_the_index_type_by_vector_count():
+    assert choose_index_type(0) == "flat"
+    assert choose_index_type(HNSW_THRESHOLD - 1) == "flat"
+    assert choose_index_type(HNSW_THRESHOLD) == "hnsw"
+    assert choose_index_type(IVF_THRESHOLD) == "ivf_flat"
+    assert choose_index_type(IVF_PQ_THRESHOLD) == "ivf_pq"
+
+def test_ivf_lists_leave_enough_training_points_per_centroid():
+    assert ivf_nlist(10) == 1
+    assert ivf_nlist(1_000_000) == 4000
+    assert ivf_nlist(10_000) == 256
+    assert ivf_nlist(10 ** 12) == 65536
+
+def test_pq_subvectors_divide_the_dimension():
+    assert pq_subquantizers(384) == 48
+    assert pq_subquantizers(100) == 10
+    assert pq_subquantizers(7) == 1
+
+def test_untrainable_types_fall_back_to_flat():
+    pytest.importorskip("faiss")
+
+    _, resolved = create_index(16, 50, "ivf_flat")
+    assert resolved == "flat"
+    _, resolved = create_index(16, 5000, "ivf_pq")
+    assert resolved == "ivf_flat"
+
+def test_unknown_options_are_rejected():
+    pytest.importorskip("faiss")
+
+    with pytest.raises(ValueError):
+        create_index(16, 10, "annoy")
+    with pytest.raises(ValueError):
+        create_index(16, 10, "flat", storage="int4")
+
+def test_rebuild_keeps_vector_positions():
+    faiss = pytest.importorskip("faiss")
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("langchain")
+    from langchain.docstore.document import Document
+    from langchain.docstore.in_memory import InMemoryDocstore
+    from langchain.vectorstores import FAISS
+
+    from backend.index_factory import rebuild_vector_store
+
+    vectors = np.random.default_rng(0).standard_normal((200, 16)).astype(np.float32)
+    index = faiss.IndexFlatL2(16)
+    index.add(vectors)
+    ids = {i: str(i) for i in range(200)}
+    store = FAISS(None, index, InMemoryDocstore({str(i): Document(page_content=str(i)) for i in range(200)}), ids)
+
+    assert rebuild_vector_store(store, "hnsw") == "hnsw"
+    assert isinstance(store.index, faiss.IndexHNSWFlat)
+    _, nearest = store.index.search(vectors[:20], 1)
+    assert nearest[:, 0].tolist() == list(range(20))
+    assert rebuild_vector_store(FAISS(None, faiss.IndexFlatL2(16), InMemoryDocstore({}), {}), "hnsw") is None
@@ -0,0 +1,39 @@
+import shutil
+import threading
+
+import pytest
+
+from conftest import bundled_pdf
+
+pytest.importorskip("fastapi")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+
+def test_process_executor_ingests_right_after_startup(app_env, monkeypatch):
+    """The first upload must not hang on a lock inherited from the warm-up thread by forked workers"""
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+
+    monkeypatch.setenv("INGEST_EXECUTOR", "process")
+    monkeypatch.setenv("INGEST_WORKERS", "2")
+    monkeypatch.setenv("WARMUP_ON_STARTUP", "1")
+    pdf = app_env / "sample.pdf"
+    shutil.copy(bundled_pdf("AkshatRajSaxenaResume.pdf"), pdf)
+
+    result = {}
+    with TestClient(create_app()) as client:
+        def upload():
+            with open(pdf, "rb") as f:
+                result["response"] = client.post(
+                    "/api/upload", files={"file": ("sample.pdf", f, "application/pdf")}, data={"wait": "true"}
+                )
+
+        thread = threading.Thread(target=upload, daemon=True)
+        thread.start()
+        thread.join(timeout=120)
+        assert not thread.is_alive(), "ingestion through the process pool did not finish"
+
+    body = result["response"].json()
+    assert body["status"] == "success", body
+    assert body["chunks_created"] > 0
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from conftest import bundled_pdf, sse_events
+
+pytest.importorskip("backend")
+
+from backend.jobs import JobProgress, JobStore
+
+def test_counter_updates_are_throttled_but_stages_are_not(tmp_path):
+    store = JobStore(str(tmp_path))
+    job_id = store.create("doc.pdf")["job_id"]
+    progress = JobProgress(store, job_id, min_interval=60)
+
+    progress.pages(10)
+    for _ in range(5):
+        progress.parsed(2, 4)
+    assert store.get(job_id)["pages_parsed"] == 0
+
+    progress.stage("indexing")
+    job = store.get(job_id)
+    assert job["stage"] == "indexing"
+    assert (job["pages_parsed"], job["chunks_total"]) == (10, 20)
+
+def test_finished_jobs_are_read_back_from_their_file(tmp_path):
+    store = JobStore(str(tmp_path))
+    job_id = store.create("doc.pdf")["job_id"]
+    JobProgress(store, job_id).finish({"status": "cancelled", "message": "stopped"})
+
+    job = JobStore(str(tmp_path)).get(job_id)
+    assert (job["status"], job["stage"], job["message"]) == ("cancelled", "cancelled", "stopped")
+
+@pytest.fixture
+def api(fake_llm):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+
+    return TestClient(create_app())
+
+def submit(client, name: str = "AkshatRajSaxenaResume.pdf") -> dict:
+    with open(bundled_pdf(name), "rb") as f:
+        response = client.post("/api/upload", files={"file": (name, f, "application/pdf")})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "accepted"
+    return job
+
+def test_upload_job_runs_to_success(api):
+    pytest.importorskip("faiss")
+    pytest.importorskip("fitz")
+    pytest.importorskip("langchain")
+
+    with api as client:
+        job_id = submit(client)["job_id"]
+        events = sse_events(client.get(f"/api/jobs/{job_id}/events").text)
+        job = client.get(f"/api/jobs/{job_id}").json()
+
+    assert events[-1]["status"] == "success" and events[-1]["stage"] == "done"
+    assert [event["progress"] for event in events] == sorted(event["progress"] for event in events)
+    assert job["progress"] == 1.0
+    assert job["result"]["status"] == "success" and job["result"]["document_id"]
+    assert job["pages_parsed"] == job["pages_total"] > 0
+
+def test_job_that_raises_is_marked_failed(api, monkeypatch):
+    async def crash(*args, **kwargs):
+        raise RuntimeError("parser crashed")
+
+    with api as client:
+        monkeypatch.setattr(client.app.state.rag_app, "ingest_pdf", crash)
+        job_id = submit(client)["job_id"]
+        events = sse_events(client.get(f"/api/jobs/{job_id}/events").text)
+
+    assert events[-1]["status"] == "error" and events[-1]["stage"] == "failed"
+    assert "parser crashed" in events[-1]["message"]
+
+def test_jobs_running_at_shutdown_are_marked_cancelled(api, monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.Event().wait()
+
+    with api as client:
+        rag_app = client.app.state.rag_app
+        monkeypatch.setattr(rag_app, "ingest_pdf", hang)
+        job_id = submit(client)["job_id"]
+        assert client.get(f"/api/jobs/{job_id}").json()["status"] == "queued"
+
+    job = rag_app.jobs.get(job_id)
+    assert (job["status"], job["stage"]) == ("cancelled", "cancelled")
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("httpx")
+
+from backend.llm_client import AsyncLLMClient
+
+def test_cancelled_caller_cancels_the_request_waiting_for_its_hedge():
+    started, cancelled = asyncio.Event(), []
+
+    async def complete_once(payload, timeout):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(payload)
+            raise
+
+    async def scenario():
+        client = AsyncLLMClient("http://127.0.0.1:9/v1", "test-key", hedge_after_s=30)
+        client._complete_once = complete_once
+        call = asyncio.ensure_future(client.complete({"id": 1}))
+        await asyncio.wait_for(started.wait(), 5)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        # Checked before asyncio.run cancels whatever is left at shutdown
+        await asyncio.sleep(0.01)
+        assert cancelled == [{"id": 1}]
+        assert client.hedges == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.metrics import MetricsRegistry, Timings, query_outcome
+
+def test_counter_renders_one_total_per_label_set():
+    registry = MetricsRegistry()
+    queries = registry.counter("rag_queries", "Answered questions", ("endpoint", "outcome"))
+    queries.inc(endpoint="query", outcome="success")
+    queries.inc(2, endpoint="query", outcome="success")
+    queries.inc(endpoint="stream", outcome="error")
+
+    assert registry.render().splitlines() == [
+        "# HELP rag_queries Answered questions",
+        "# TYPE rag_queries counter",
+        'rag_queries_total{endpoint="query",outcome="success"} 3',
+        'rag_queries_total{endpoint="stream",outcome="error"} 1',
+    ]
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = MetricsRegistry()
+    stages = registry.histogram("rag_stage_duration_seconds", "Stage time", ("pipeline", "stage"), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        stages.observe(seconds, pipeline="query", stage="embed")
+
+    assert registry.render().splitlines()[2:] == [
+        'rag_stage_duration_seconds_bucket{pipeline="query",stage="embed",le="0.1"} 1',
+        'rag_stage_duration_seconds_bucket{pipeline="query",stage="embed",le="1"} 3',
+        'rag_stage_duration_seconds_bucket{pipeline="query",stage="embed",le="+Inf"} 4',
+        'rag_stage_duration_seconds_sum{pipeline="query",stage="embed"} 4.05',
+        'rag_stage_duration_seconds_count{pipeline="query",stage="embed"} 4',
+    ]
+
+def test_label_values_are_escaped_and_extra_samples_rendered():
+    registry = MetricsRegistry()
+    registry.counter("rag_http", "Requests", ("route",)).inc(route='/a"b\\c')
+    lines = registry.render([("rag_cache_entries", "gauge", "Entries", 7)]).splitlines()
+    assert 'rag_http_total{route="/a\\"b\\\\c"} 1' in lines
+    assert lines[-3:] == ["# HELP rag_cache_entries Entries", "# TYPE rag_cache_entries gauge", "rag_cache_entries 7"]
+
+def test_timings_accumulate_stages_per_pipeline():
+    timings = Timings("ingest")
+    timings.add("embed", 0.25)
+    timings.add("embed", 0.25)
+    assert timings.as_dict()["embed_ms"] == 500.0
+    assert timings.pipeline == "ingest"
+
+def test_query_outcomes():
+    assert query_outcome({"status": "error"}) == "error"
+    assert query_outcome({"status": "success", "cached": True}) == "cached"
+    assert query_outcome({"status": "success", "gated": True}) == "gated"
+    assert query_outcome({"status": "success"}) == "success"
+
+def test_metrics_endpoint_serves_the_text_format(app_env):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+    from backend.metrics import observe_stage
+
+    observe_stage("retrieve", 0.002)
+    with TestClient(create_app()) as client:
+        client.get("/api/health")
+        response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE rag_stage_duration_seconds histogram" in body
+    assert 'rag_stage_duration_seconds_count{pipeline="query",stage="retrieve"}' in body
+    assert 'rag_http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}' in body
+    assert "rag_llm_requests_total 0" in body
@@ -0,0 +1,92 @@
+import os
+import pstats
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.profiling import CaptureRunning, Profiler, report_path
+
+def test_only_one_capture_runs_at_a_time(tmp_path):
+    profiler = Profiler()
+    with pytest.raises(ValueError):
+        profiler.start("flame", str(tmp_path))
+
+    profiler.start("memory", str(tmp_path), seconds=60)
+    with pytest.raises(CaptureRunning):
+        profiler.start("sample", str(tmp_path), seconds=60)
+    assert profiler.stop()["status"] == "finished"
+    assert profiler.stop() is None
+
+def test_memory_capture_flags_overlapping_ingestions_and_stops_after_them(tmp_path):
+    profiler = Profiler()
+    profiler.start("memory", str(tmp_path), requests=3, seconds=60)
+    assert profiler.tracing_memory
+
+    with profiler.track_ingestion("first.pdf"):
+        with profiler.track_ingestion("second.pdf"):
+            buffer = bytearray(2 * 1024 * 1024)
+        del buffer
+    with profiler.track_ingestion("third.pdf"):
+        pass
+
+    # The third ingestion reached the request limit
+    assert profiler.capture is None
+    assert [(name, shared) for name, _, shared in profiler.last.ingestions] == [
+        ("second.pdf", True), ("first.pdf", True), ("third.pdf", False)
+    ]
+    assert profiler.last.ingestions[0][1] >= 2
+
+    with open(os.path.join(str(tmp_path), profiler.status()["report"])) as f:
+        report = f.read()
+    assert "ingestion peak" in report and "third.pdf" in report
+    assert "overlapped other ingestions" in report
+
+def test_cprofile_capture_includes_wrapped_calls(tmp_path):
+    profiler = Profiler()
+    def work():
+        return sum(range(1000))
+
+    assert profiler.wrap(work) is work
+    profiler.start("cprofile", str(tmp_path), requests=1, seconds=60)
+    thread = threading.Thread(target=profiler.wrap(work))
+    thread.start()
+    thread.join()
+    profiler.request_done()
+
+    status = profiler.status()
+    assert status["status"] == "finished" and status["requests_seen"] == 1
+    stats = pstats.Stats(os.path.join(str(tmp_path), status["report"]))
+    assert any(name == "work" for _, _, name in stats.stats)
+
+def test_sample_capture_writes_collapsed_stacks(tmp_path):
+    profiler = Profiler()
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(100))
+
+    thread = threading.Thread(target=spin, name="spinner")
+    thread.start()
+    try:
+        profiler.start("sample", str(tmp_path), seconds=60, interval_ms=1)
+        time.sleep(0.05)
+        status = profiler.stop()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert status["samples"] > 0
+    with open(os.path.join(str(tmp_path), status["report"])) as f:
+        lines = f.read().splitlines()
+    assert any(line.startswith("spinner;") and "spin (test_profiling.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+def test_report_names_cannot_leave_the_report_directory(tmp_path):
+    (tmp_path / "ok.txt").write_text("report")
+    assert report_path(str(tmp_path), "ok.txt") == os.path.join(str(tmp_path), "ok.txt")
+    assert report_path(str(tmp_path), "../ok.txt") is None
+    assert report_path(str(tmp_path), "missing.txt") is None
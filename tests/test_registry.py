@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+pytest.importorskip("backend")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+
+import numpy as np
+
+from backend.chunk_store import MappedFlatIndex, MappedVectorStore
+from backend.embedder import Embedder
+from backend.registry import IndexRegistry
+from backend.storage import write_json_atomic
+
+TEXTS = ["solar panels convert sunlight", "electric vehicles charge overnight", "wind turbines spin offshore"]
+DOCUMENT_ID = "ab" * 32
+
+@pytest.fixture
+def embedder():
+    return Embedder("hashing", backend="hashing")
+
+def langchain_store(embedder):
+    from langchain.vectorstores import FAISS
+
+    return FAISS.from_texts(TEXTS, embedder.embeddings, metadatas=[{"chunk_id": i} for i in range(len(TEXTS))])
+
+def test_register_and_reopen(tmp_path, embedder):
+    IndexRegistry(str(tmp_path), embedder).register(DOCUMENT_ID, langchain_store(embedder), {"filename": "a.pdf"})
+
+    reopened = IndexRegistry(str(tmp_path), embedder)
+    store = reopened.get(DOCUMENT_ID)
+    assert reopened.version(DOCUMENT_ID) == 1
+    doc = store.similarity_search(TEXTS[1], k=1)[0]
+    assert doc.page_content == TEXTS[1]
+    assert doc.metadata["chunk_id"] == 1
+
+def test_flat_index_is_searched_through_a_memory_map(tmp_path, embedder):
+    vector_store = langchain_store(embedder)
+    IndexRegistry(str(tmp_path), embedder).register(DOCUMENT_ID, vector_store, {"filename": "a.pdf"})
+
+    store = IndexRegistry(str(tmp_path), embedder).get(DOCUMENT_ID)
+    assert isinstance(store.index, MappedFlatIndex)
+    assert isinstance(store.index.vectors, np.memmap)
+    assert not os.path.exists(os.path.join(store.path, MappedVectorStore.INDEX_FILE))
+
+    queries = np.asarray(embedder.embeddings.embed_documents(TEXTS), dtype=np.float32)
+    expected_distances, expected_indices = vector_store.index.search(queries, 5)
+    distances, indices = store.index.search(queries, 5)
+    assert indices.tolist() == expected_indices.tolist()
+    assert np.allclose(distances[indices != -1], expected_distances[expected_indices != -1], atol=1e-4)
+
+def test_other_index_types_are_stored_with_faiss(tmp_path, embedder):
+    import faiss
+
+    vector_store = langchain_store(embedder)
+    vector_store.index = faiss.IndexHNSWFlat(vector_store.index.d, 8)
+    vector_store.index.add(np.asarray(embedder.embeddings.embed_documents(TEXTS), dtype=np.float32))
+    IndexRegistry(str(tmp_path), embedder).register(DOCUMENT_ID, vector_store, {"filename": "a.pdf"})
+
+    store = IndexRegistry(str(tmp_path), embedder).get(DOCUMENT_ID)
+    assert isinstance(store.index, faiss.IndexHNSWFlat)
+    assert store.similarity_search(TEXTS[1], k=1)[0].page_content == TEXTS[1]
+
+def test_legacy_index_is_only_served_after_explicit_conversion(tmp_path, embedder):
+    registry = IndexRegistry(str(tmp_path), embedder)
+    index_dir = os.path.join(registry.path(DOCUMENT_ID), "v1")
+    langchain_store(embedder).save_local(index_dir)
+    write_json_atomic(os.path.join(registry.path(DOCUMENT_ID), IndexRegistry.META_FILE),
+                      {"document_id": DOCUMENT_ID, "version": 1, "index_dir": "v1"})
+
+    assert registry.get(DOCUMENT_ID) is None
+    assert registry.needs_conversion(DOCUMENT_ID)
+    assert os.path.exists(os.path.join(index_dir, MappedVectorStore.LEGACY_FILE))
+
+    assert registry.convert_legacy(DOCUMENT_ID)
+    assert not registry.needs_conversion(DOCUMENT_ID)
+    assert not os.path.exists(os.path.join(index_dir, MappedVectorStore.LEGACY_FILE))
+    assert registry.get(DOCUMENT_ID).similarity_search(TEXTS[2], k=1)[0].page_content == TEXTS[2]
+
+def test_embedder_does_not_unpickle_vector_stores(tmp_path, embedder):
+    langchain_store(embedder).save_local(str(tmp_path))
+    assert Embedder("hashing", backend="hashing").load_vector_store(str(tmp_path)) is None
+
+    assert MappedVectorStore.convert_legacy(str(tmp_path), embedder.embeddings)
+    store = Embedder("hashing", backend="hashing").load_vector_store(str(tmp_path))
+    assert store.similarity_search(TEXTS[0], k=1)[0].page_content == TEXTS[0]
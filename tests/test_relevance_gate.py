@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from conftest import bundled_pdf, upload_pdf
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+pytest.importorskip("fitz")
+pytest.importorskip("langchain")
+
+@pytest.fixture
+def client(fake_llm, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+
+    monkeypatch.setenv("RELEVANCE_GATE_ENABLED", "1")
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "0")
+    with TestClient(create_app()) as client:
+        yield client
+
+def ask(client, question: str, **form) -> dict:
+    return client.post("/api/query", data={"question": question, **form}).json()
+
+def test_gated_questions_never_reach_the_llm(client, fake_llm):
+    from backend.relevance import NO_ANSWER
+
+    rag_app = client.app.state.rag_app
+    document_id = upload_pdf(client)["document_id"]
+    served = fake_llm.requests_served
+
+    # Nothing is that close to the document, so every question is gated
+    rag_app.registry.update_metadata(document_id, relevance={"threshold": 1e-9})
+    gated = ask(client, "What is the capital of France?")
+    assert gated["status"] == "success" and gated["gated"] is True
+    assert gated["answer"] == NO_ANSWER
+    assert gated["tokens_sent"] == 0
+    assert fake_llm.requests_served == served
+
+    rag_app.registry.update_metadata(document_id, relevance={"threshold": None})
+    answered = ask(client, "Which projects are listed?")
+    assert not answered.get("gated") and answered["answer"] == fake_llm.answer
+    assert fake_llm.requests_served == served + 1
+
+    metrics = client.get("/api/metrics").text
+    assert "rag_relevance_gate_checked_total 2" in metrics
+    assert "rag_relevance_gate_gated_total 1" in metrics
+
+def add_to_corpus(client, name: str) -> dict:
+    with open(bundled_pdf(name), "rb") as f:
+        result = client.post("/api/documents", files={"file": (name, f, "application/pdf")}).json()
+    assert result["status"] == "success" and result["corpus_chunks_added"] > 0
+    return result
+
+def wait_for_calibration(corpus, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        calibration = corpus.relevance
+        if calibration and calibration["corpus_version"] == corpus.version:
+            return calibration
+        time.sleep(0.05)
+    raise AssertionError("the corpus was not recalibrated")
+
+def test_corpus_is_recalibrated_on_the_next_query_not_on_every_add(client):
+    corpus = client.app.state.rag_app.corpus
+    add_to_corpus(client, "AkshatRajSaxenaResume.pdf")
+    add_to_corpus(client, "sample.pdf")
+    assert corpus.relevance is None
+
+    assert ask(client, "Which projects are listed?", document_id="corpus")["status"] == "success"
+    first = wait_for_calibration(corpus)
+
+    add_to_corpus(client, "predictionModellingEVS.pdf")
+    assert corpus.relevance == first
+
+    ask(client, "Which projects are listed?", document_id="corpus")
+    assert wait_for_calibration(corpus)["corpus_version"] > first["corpus_version"]
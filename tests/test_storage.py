@@ -0,0 +1,23 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("backend")
+
+from backend.storage import write_json_atomic
+
+def test_concurrent_writers_in_one_process_each_land_a_whole_file(tmp_path):
+    path = str(tmp_path / "job.json")
+
+    def write(i):
+        for _ in range(50):
+            write_json_atomic(path, {"writer": i, "payload": "x" * 10000})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    with open(path) as f:
+        assert len(json.load(f)["payload"]) == 10000
+    assert os.listdir(tmp_path) == ["job.json"]
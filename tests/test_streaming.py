@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import sse_events, upload_pdf
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+pytest.importorskip("fitz")
+pytest.importorskip("langchain")
+
+QUESTION = "Which programming languages and projects are listed?"
+
+@pytest.fixture
+def client(fake_llm, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend import create_app
+
+    # Every question must reach the LLM
+    monkeypatch.setenv("RELEVANCE_GATE_ENABLED", "0")
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "0")
+    with TestClient(create_app()) as client:
+        assert upload_pdf(client)["status"] == "success"
+        yield client
+
+def stream(client, question: str = QUESTION) -> list:
+    response = client.post("/api/query/stream", data={"question": question})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return sse_events(response.text)
+
+def test_tokens_arrive_in_order_between_start_and_done(client, fake_llm):
+    events = stream(client)
+
+    assert events[0]["event"] == "start"
+    assert events[0]["status"] == "success"
+    assert events[0]["sources"] > 0
+    assert [event["content"] for event in events[1:-1]] == fake_llm.tokens()
+    assert all(event["event"] == "token" for event in events[1:-1])
+
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["status"] == "success"
+    assert done["timings"]["generate_ms"] > 0
+    assert "first_token_ms" in done["timings"]
+
+def test_llm_server_error_ends_the_stream_with_an_error_event(client, fake_llm):
+    fake_llm.error_rate = 1.0
+    events = stream(client)
+
+    assert events[0]["event"] == "start"
+    assert not any(event["event"] in ("token", "done") for event in events)
+    assert events[-1]["event"] == "error"
+    assert events[-1]["status"] == "error"
+    assert "500" in events[-1]["message"]